@@ -3,6 +3,11 @@ import uuid
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 
+from app.api.v1.applications import DbDep
+from app.config import get_settings
+from app.db.repositories.deferred_email_repo import DeferredEmailRepository
+from app.services.quota import QuotaStatus, utc_today
+
 router = APIRouter()
 
 # NOTE: In-memory job store — Phase 5 replaces this with DB-backed worker_runs table.
@@ -44,6 +49,18 @@ def trigger_email_check(background_tasks: BackgroundTasks):
     return {"job_id": job_id, "status": "pending"}
 
 
+@router.get("/quota")
+def get_llm_quota(db: DbDep):
+    """Today's shared LLM request budget and the emails waiting on it."""
+    settings = get_settings()
+    provider = settings.llm_provider.strip().lower()
+    deferred = DeferredEmailRepository(db).count()
+    if settings.llm_daily_request_limit <= 0:
+        return {"provider": provider, "daily_limit": None, "deferred_emails": deferred}
+    status = QuotaStatus.load(db, provider, settings.llm_daily_request_limit, utc_today())
+    return {**status.to_dict(), "deferred_emails": deferred}
+
+
 @router.get("/{job_id}")
 def get_job_status(job_id: str):
     if job_id not in _jobs:
@@ -14,13 +14,87 @@ class Settings(BaseSettings):
     email_pass: str
     imap_server: str = "imap.comcast.net"
     email_limit: int = 10
+    imap_mailbox: str = "inbox"
+    # Only fetch UIDs above the stored checkpoint; full resync on UIDVALIDITY change
+    imap_incremental_sync: bool = True
+    imap_fetch_batch_size: int = 50
+    # Fetch sender/subject first and skip the bodies of job board alerts
+    # (header_prefilter); an alert whose body confirms an application is lost.
+    imap_header_first: bool = False
+    # Fetch only text sections via BODYSTRUCTURE; the byte cap leaves room for HTML
+    # markup around the text the LLM prompt is condensed from.
+    imap_partial_bodies: bool = False
+    imap_body_max_bytes: int = 16384
+    # Processes for MIME decoding + HTML rendering; 0 parses inline in the fetch loop
+    email_parse_workers: int = 0
+    # HTML -> text backend: "stdlib" (default, same output as bs4), "lxml" or "bs4"
+    html_renderer: str = "stdlib"
+    # Characters of normalized body to keep; prompts condense what is kept down to
+    # LLM_BODY_TOKEN_BUDGET. 0 keeps the full body.
+    email_body_max_chars: int = 0
+    # Comma-separated job board / ATS domains added to quick_filter's built-in list;
+    # subdomains match too (e.g. "ashbyhq.com,smartrecruiters.com")
+    job_board_extra_domains: str = ""
 
     # Database
     database_url: str
+    # Application emails stored per transaction (one bulk upsert + commit per batch)
+    db_persist_batch_size: int = 100
+    # Also store emails the LLM classified as non-applications, the negative labels the
+    # pre-classifier trains on. Off by default: it keeps the body of every such email.
+    persist_rejected_emails: bool = False
 
     # LLM — set to "groq" for production, "ollama" for local dev
     llm_provider: str = "ollama"
     groq_api_key: str | None = None
+    # Client-side token bucket; Groq's free tier allows 30 req/min. 0 disables it.
+    groq_requests_per_minute: float = 30
+    # LLM calls in flight at once (async adapters); 1 classifies emails sequentially
+    llm_max_concurrency: int = 1
+    # Emails per batched classification prompt (instructions sent once per batch);
+    # 1 sends one prompt per email
+    llm_batch_size: int = 1
+    # Daily LLM requests shared by every run (Groq free tier: 14400); 0 is unlimited.
+    # Emails the budget cannot cover are deferred to the next run.
+    llm_daily_request_limit: int = 0
+    # Part of the daily budget only confirmation-matched emails may use
+    llm_quota_priority_reserve: int = 100
+    # LLM requests one worker run may make; 0 is unlimited. When this or the daily
+    # limit applies, candidates are ranked and the lowest-priority ones deferred.
+    llm_max_requests_per_run: int = 0
+    # Estimated tokens of body per email in a prompt: the most informative sentences
+    # plus greeting and sign-off. 0 sends the first 2000 characters instead.
+    llm_body_token_budget: int = 350
+    # Seconds before a provider request is abandoned and retried; 0 keeps the SDK default
+    llm_request_timeout_seconds: float = 60
+    # Retries per provider for timeouts, 429s and 5xx, with jittered exponential backoff
+    # (or the provider's Retry-After). Waits longer than the max delay fail over instead.
+    llm_max_retries: int = 3
+    llm_retry_base_delay_seconds: float = 1.0
+    llm_retry_max_delay_seconds: float = 60.0
+    # Consecutive failures before a provider is skipped (0 disables the breaker), and how
+    # long it is skipped before a trial call
+    llm_circuit_failure_threshold: int = 5
+    llm_circuit_reset_seconds: float = 60.0
+    # Provider tried when LLM_PROVIDER fails ("groq" or "ollama"); empty disables failover
+    llm_fallback_provider: str = ""
+    # Classification cache: in-process LRU entries (0 disables caching) and how long
+    # the persistent rows in classification_cache stay valid (0 keeps it in-process)
+    llm_cache_max_entries: int = 1024
+    llm_cache_ttl_hours: int = 720
+    # Near-duplicate reuse: emails whose body SimHash is within this many bits of an
+    # already-classified email from the same sender reuse its decision and stage
+    # (0 disables), and how many stored emails seed the index each run
+    llm_near_duplicate_max_distance: int = 4
+    llm_near_duplicate_history: int = 2000
+    # Trained pre-classifier (python -m app.llm.preclassifier train); unset calls the LLM
+    # for every email that passes quick_filter.
+    preclassifier_model_path: str | None = None
+    # Also auto-accept high-scoring emails; they are stored as low confidence for review
+    preclassifier_auto_accept: bool = False
+    # Answer known ATS templates (Greenhouse, Lever, Workday...) from their subject and
+    # body without the LLM; see python -m app.llm.ats_templates report
+    ats_templates_enabled: bool = True
 
 
 @lru_cache
@@ -1,8 +1,11 @@
 from datetime import datetime
 
 from sqlalchemy import (
+    JSON,
+    BigInteger,
     Boolean,
     Column,
+    Date,
     DateTime,
     ForeignKey,
     Integer,
@@ -78,6 +81,10 @@ class Email(Base):
     subject = Column(String(1000))
     received_date = Column(DateTime, nullable=False, index=True)
     body = Column(Text)
+    # near_duplicate.simhash of the body (signed), for reusing classifications of templates
+    body_simhash = Column(BigInteger, nullable=True)
+    # Root Message-ID of the conversation (References / In-Reply-To)
+    thread_id = Column(String(512), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     analysis = relationship(
@@ -103,6 +110,8 @@ class WorkerRun(Base):
     applications_found = Column(Integer, default=0, nullable=False)
     emails_saved = Column(Integer, default=0, nullable=False)
     error_message = Column(Text, nullable=True)
+    # QuickFilterStats.to_dict(): decisions per reason code, per-rule hits and timings
+    filter_stats = Column(JSON, nullable=True)
 
     analyses = relationship("EmailAnalysis", back_populates="worker_run")
 
@@ -110,6 +119,98 @@ class WorkerRun(Base):
         return f"<WorkerRun(id={self.id}, status='{self.status}')>"
 
 
+class MailboxSyncState(Base):
+    __tablename__ = "mailbox_sync_states"
+
+    id = Column(Integer, primary_key=True)
+    account = Column(String(255), nullable=False)
+    mailbox = Column(String(255), nullable=False)
+    # IMAP UIDs and UIDVALIDITY are unsigned 32-bit values.
+    uidvalidity = Column(BigInteger, nullable=True)
+    last_uid = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
+    __table_args__ = (
+        UniqueConstraint("account", "mailbox", name="unique_account_mailbox"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<MailboxSyncState(account='{self.account}', mailbox='{self.mailbox}', "
+            f"last_uid={self.last_uid})>"
+        )
+
+
+class ClassificationCacheEntry(Base):
+    __tablename__ = "classification_cache"
+
+    id = Column(Integer, primary_key=True)
+    # sha256 of provider, model, prompt version and the normalized email input
+    key = Column(String(64), unique=True, nullable=False, index=True)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100))
+    # EmailClassification fields
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<ClassificationCacheEntry(key='{self.key[:12]}', provider='{self.provider}')>"
+
+
+class LLMQuotaUsage(Base):
+    __tablename__ = "llm_quota_usage"
+
+    id = Column(Integer, primary_key=True)
+    provider = Column(String(50), nullable=False)
+    # UTC day the provider's daily request limit applies to
+    day = Column(Date, nullable=False)
+    # Requests made vs. claimed by runs still in progress
+    used = Column(Integer, default=0, nullable=False)
+    reserved = Column(Integer, default=0, nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
+    __table_args__ = (
+        UniqueConstraint("provider", "day", name="unique_provider_day"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<LLMQuotaUsage(provider='{self.provider}', day={self.day}, "
+            f"used={self.used}, reserved={self.reserved})>"
+        )
+
+
+class DeferredEmail(Base):
+    """Fetched emails whose classification was postponed to a later run."""
+
+    __tablename__ = "deferred_emails"
+
+    id = Column(Integer, primary_key=True)
+    message_id = Column(String(512), unique=True, nullable=True, index=True)
+    uid = Column(String(255), nullable=False)
+    sender = Column(String(255), nullable=False)
+    subject = Column(String(1000))
+    received_date = Column(DateTime, nullable=True)
+    body = Column(Text)
+    thread_id = Column(String(512), nullable=True)
+    reason = Column(String(50), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<DeferredEmail(id={self.id}, uid='{self.uid}', reason='{self.reason}')>"
+
+
 class EmailAnalysis(Base):
     __tablename__ = "email_analyses"
 
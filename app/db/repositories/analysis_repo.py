@@ -1,4 +1,4 @@
-from app.db.models import EmailAnalysis
+from app.db.models import Email, EmailAnalysis
 from app.db.repositories.base import BaseRepository
 from app.llm.base import EmailClassification
 
@@ -45,3 +45,11 @@ class AnalysisRepository(BaseRepository):
             .filter(EmailAnalysis.worker_run_id == worker_run_id)
             .all()
         )
+
+    def get_labeled_emails(self) -> list[tuple[Email, EmailAnalysis]]:
+        return (
+            self.session.query(Email, EmailAnalysis)
+            .join(EmailAnalysis, EmailAnalysis.email_id == Email.id)
+            .order_by(Email.id)
+            .all()
+        )
@@ -1,8 +1,11 @@
 from datetime import datetime, timezone
 from sqlalchemy import func
-from app.db.models import Application
+from app.db.models import Application, Company, Email, EmailAnalysis
 from app.db.repositories.base import BaseRepository
 
+# Stages after which no further mail about an application is expected.
+CLOSED_STAGES = ("rejected",)
+
 
 class ApplicationRepository(BaseRepository):
     def get_all(self) -> list[Application]:
@@ -14,6 +17,51 @@ class ApplicationRepository(BaseRepository):
     def get_by_stage(self, stage: str) -> list[Application]:
         return self.session.query(Application).filter(Application.stage == stage).all()
 
+    def get_open_sender_domains(self) -> set[str]:
+        """
+        Domains that mail about still-open applications came from: senders of
+        linked emails plus any domain recorded on the company.
+        """
+        senders = (
+            self.session.query(Email.sender)
+            .join(EmailAnalysis, EmailAnalysis.email_id == Email.id)
+            .join(Application, EmailAnalysis.application_id == Application.id)
+            .filter(Application.stage.notin_(CLOSED_STAGES))
+            .distinct()
+        )
+        company_domains = (
+            self.session.query(Company.domain)
+            .join(Application, Application.company_id == Company.id)
+            .filter(Application.stage.notin_(CLOSED_STAGES), Company.domain.isnot(None))
+            .distinct()
+        )
+        domains = {sender.rpartition("@")[2].strip(" >").lower() for (sender,) in senders}
+        domains.update(domain.strip().lower() for (domain,) in company_domains)
+        domains.discard("")
+        return domains
+
+    def get_open_threads(self) -> list[tuple]:
+        """
+        (message_id, thread_id, application_id, company, position, stage) for
+        stored emails of threads linked to a still-open application.
+        """
+        return (
+            self.session.query(
+                Email.message_id,
+                Email.thread_id,
+                Application.id,
+                Company.name,
+                Application.position,
+                Application.stage,
+            )
+            .join(EmailAnalysis, EmailAnalysis.email_id == Email.id)
+            .join(Application, EmailAnalysis.application_id == Application.id)
+            .join(Company, Application.company_id == Company.id)
+            .filter(Email.thread_id.isnot(None), Application.stage.notin_(CLOSED_STAGES))
+            .order_by(Email.received_date)
+            .all()
+        )
+
     def find_by_company_and_position(self, company_id: int, position: str) -> Application | None:
         return (
             self.session.query(Application)
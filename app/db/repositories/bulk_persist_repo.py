@@ -0,0 +1,309 @@
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db.models import Application, Company, Email, EmailAnalysis
+from app.db.repositories.application_repo import ApplicationRepository
+from app.db.repositories.base import BaseRepository
+from app.utils.fingerprint import simhash, to_signed64
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+@dataclass
+class BulkSaveResult:
+    saved: int = 0
+    # Message-IDs that were already stored
+    duplicates: list[str] = field(default_factory=list)
+    # (message_id or uid, error) for rows that could not be stored
+    failed: list[tuple[str, str]] = field(default_factory=list)
+
+    def merge(self, other: "BulkSaveResult") -> None:
+        self.saved += other.saved
+        self.duplicates.extend(other.duplicates)
+        self.failed.extend(other.failed)
+
+
+class BulkPersistRepository(BaseRepository):
+    """
+    Stores a batch of classified EmailData (applications and rejected emails
+    alike) with a handful of set-based statements: INSERT ... ON CONFLICT DO
+    NOTHING for emails, companies and applications, ON CONFLICT DO UPDATE for
+    analyses. The caller commits once per batch. If the batch fails as a whole
+    it is retried row by row, each in its own savepoint, so one bad email does
+    not cost the others.
+    """
+
+    def save(
+        self,
+        emails: list,
+        companies=None,
+        worker_run_id: int | None = None,
+        model_used: str | None = None,
+    ) -> BulkSaveResult:
+        """
+        `companies` is the run's CompanyDomainIndex; corporate sender domains
+        of linked companies without one are stored on Company and added to
+        the index once their savepoint is released.
+        """
+        if not emails:
+            return BulkSaveResult()
+        try:
+            return self._save_all(emails, companies, worker_run_id, model_used)
+        except SQLAlchemyError as exc:
+            print(f"Bulk save of {len(emails)} emails failed ({exc}); retrying one at a time")
+        result = BulkSaveResult()
+        for email_data in emails:
+            try:
+                result.merge(self._save_all([email_data], companies, worker_run_id, model_used))
+            except SQLAlchemyError as exc:
+                result.failed.append((email_data.message_id or email_data.uid, str(exc)))
+        return result
+
+    def _save_all(
+        self, emails: list, companies, worker_run_id: int | None, model_used: str | None
+    ) -> BulkSaveResult:
+        """`_save` in a savepoint; learned domains reach the index only if it holds."""
+        learned: list[tuple[str, int, str]] = []
+        with self.session.begin_nested():
+            result = self._save(emails, companies, learned, worker_run_id, model_used)
+        for domain, company_id, name in learned:
+            companies.add(domain, company_id, name)
+        return result
+
+    def _insert(self, model):
+        dialect = self.session.get_bind().dialect.name
+        if dialect not in _DIALECT_INSERTS:
+            raise ValueError(f"Bulk persistence supports PostgreSQL and SQLite, not {dialect}")
+        return _DIALECT_INSERTS[dialect](model)
+
+    def _save(
+        self,
+        emails: list,
+        companies,
+        learned: list[tuple[str, int, str]],
+        worker_run_id: int | None,
+        model_used: str | None,
+    ) -> BulkSaveResult:
+        result = BulkSaveResult()
+        email_ids = self._insert_emails(emails, result)
+        stored = [email_data for email_data in emails if _key(email_data) in email_ids]
+        application_ids = self._link_applications(stored, companies, learned)
+
+        now = datetime.utcnow()
+        analyses = [
+            {
+                "email_id": email_ids[_key(email_data)],
+                "worker_run_id": worker_run_id,
+                "application_id": application_ids.get(id(email_data)),
+                "is_application": bool(email_data.is_application),
+                "detected_company": email_data.company,
+                "detected_position": email_data.position,
+                "detected_stage": email_data.stage,
+                "confidence": email_data.confidence,
+                # Only applications go to review; rejected emails are stored as labels.
+                "needs_review": bool(email_data.is_application)
+                and email_data.confidence not in ("high", "medium"),
+                # Answers that skipped the LLM record what gave them instead.
+                "model_used": email_data.source or model_used,
+                "created_at": now,
+            }
+            for email_data in stored
+        ]
+        if analyses:
+            stmt = self._insert(EmailAnalysis)
+            refreshed = {
+                column: stmt.excluded[column]
+                for column in analyses[0]
+                if column not in ("email_id", "created_at")
+            }
+            self.session.execute(
+                stmt.on_conflict_do_update(index_elements=["email_id"], set_=refreshed),
+                analyses,
+            )
+        self.session.flush()
+        result.saved = len(stored)
+        return result
+
+    def _insert_emails(self, emails: list, result: BulkSaveResult) -> dict[tuple, int]:
+        """Insert new emails; returns (message_id, uid) -> id for the rows inserted."""
+        rows = {}
+        for email_data in emails:
+            if _key(email_data) in rows:
+                result.duplicates.append(email_data.message_id)
+                continue
+            fingerprint = simhash(email_data.body)
+            rows[_key(email_data)] = {
+                "message_id": email_data.message_id,
+                "uid": email_data.uid,
+                "sender": email_data.sender,
+                "subject": email_data.subject,
+                "body": email_data.body,
+                "body_simhash": None if fingerprint is None else to_signed64(fingerprint),
+                "received_date": email_data.date or datetime.utcnow(),
+                "thread_id": email_data.thread_id,
+                "created_at": datetime.utcnow(),
+            }
+        stmt = (
+            self._insert(Email)
+            .on_conflict_do_nothing(index_elements=["message_id"])
+            .returning(Email.id, Email.message_id, Email.uid)
+        )
+        inserted = {
+            (message_id, uid): email_id
+            for email_id, message_id, uid in self.session.execute(stmt, list(rows.values()))
+        }
+        result.duplicates.extend(key[0] for key in rows if key not in inserted)
+        return inserted
+
+    def _link_applications(
+        self, emails: list, companies, learned: list[tuple[str, int, str]]
+    ) -> dict[int, int]:
+        """id(email_data) -> application id for the emails that link to one."""
+        linked = [
+            email_data
+            for email_data in sorted(emails, key=_date_order)
+            if email_data.application_id is not None
+            or (
+                email_data.is_application
+                and email_data.confidence in ("high", "medium")
+                and email_data.company
+                and email_data.position
+            )
+        ]
+        if not linked:
+            return {}
+        # Thread follow-ups know their application, known sender domains their company.
+        unresolved = [e for e in linked if e.application_id is None and e.company_id is None]
+        company_ids = self._resolve_companies(unresolved, companies, learned)
+        company_of = {
+            id(e): e.company_id or company_ids[e.company.lower()]
+            for e in linked
+            if e.application_id is None
+        }
+        applications = self._resolve_applications(
+            [e for e in linked if e.application_id is None],
+            company_of,
+            {e.application_id for e in linked if e.application_id is not None},
+        )
+
+        application_ids = {}
+        app_repo = ApplicationRepository(self.session)
+        for email_data in linked:
+            if email_data.application_id is not None:
+                key = "id", email_data.application_id
+            else:
+                key = company_of[id(email_data)], email_data.position.lower()
+            application = applications.get(key)
+            if application is None:
+                continue  # the thread's application was deleted since the run started
+            app_repo.update_stage(application, email_data.stage, email_data.date)
+            application_ids[id(email_data)] = application.id
+        return application_ids
+
+    def _resolve_companies(
+        self, emails: list, companies, learned: list[tuple[str, int, str]]
+    ) -> dict[str, int]:
+        """
+        lower(name) -> company id, inserting the companies not stored yet and
+        learning the sender domain of those without one.
+        """
+        by_name = {}
+        for email_data in emails:
+            by_name.setdefault(email_data.company.lower(), email_data)
+        if not by_name:
+            return {}
+        found = self._select_companies(list(by_name))
+        missing = [name for name in by_name if name not in found]
+        if missing:
+            self.session.execute(
+                self._insert(Company).on_conflict_do_nothing(index_elements=["name"]),
+                [
+                    {"name": by_name[name].company, "created_at": datetime.utcnow()}
+                    for name in missing
+                ],
+            )
+            found.update(self._select_companies(missing))
+        claimed = set()
+        for name, (company_id, stored_name, domain) in found.items():
+            if companies is None or domain is not None:
+                continue
+            domain = companies.learnable_domain(by_name[name].sender, stored_name)
+            if domain and domain not in claimed:
+                claimed.add(domain)
+                learned.append((domain, company_id, stored_name))
+                self.session.execute(
+                    update(Company)
+                    .where(Company.id == company_id, Company.domain.is_(None))
+                    .values(domain=domain)
+                )
+        return {name: company_id for name, (company_id, _, _) in found.items()}
+
+    def _select_companies(self, names: list[str]) -> dict[str, tuple]:
+        rows = self.session.execute(
+            select(Company.id, Company.name, Company.domain).where(
+                func.lower(Company.name).in_(names)
+            )
+        )
+        return {name.lower(): (company_id, name, domain) for company_id, name, domain in rows}
+
+    def _resolve_applications(
+        self, emails: list, company_of: dict[int, int], ids: set[int]
+    ) -> dict:
+        """
+        ("id", application_id) and (company_id, lower(position)) -> Application.
+        Applications not stored yet are inserted from their earliest email:
+        its spelling of the position, its stage and its date.
+        """
+        wanted = {}
+        for email_data in emails:
+            key = company_of[id(email_data)], email_data.position.lower()
+            wanted.setdefault(key, email_data)
+        applications = self._select_applications({company_id for company_id, _ in wanted}, ids)
+        missing = [key for key in wanted if key not in applications]
+        if missing:
+            self.session.execute(
+                self._insert(Application).on_conflict_do_nothing(
+                    index_elements=["company_id", "position"]
+                ),
+                [_application_row(key[0], wanted[key]) for key in missing],
+            )
+            applications.update(self._select_applications({key[0] for key in missing}, set()))
+        return applications
+
+    def _select_applications(self, company_ids: set[int], ids: set[int]) -> dict:
+        applications = {}
+        query = self.session.query(Application).filter(
+            or_(Application.company_id.in_(company_ids), Application.id.in_(ids))
+        )
+        for application in query:
+            applications["id", application.id] = application
+            applications[application.company_id, application.position.lower()] = application
+        return applications
+
+
+def _key(email_data) -> tuple:
+    return email_data.message_id, email_data.uid
+
+
+def _application_row(company_id: int, email_data) -> dict:
+    date = email_data.date
+    if date is None:
+        date = datetime.utcnow()
+    elif date.tzinfo:
+        date = date.astimezone(UTC).replace(tzinfo=None)
+    return {
+        "company_id": company_id,
+        "position": email_data.position,
+        "stage": email_data.stage or "applied",
+        "applied_date": date,
+        "last_updated": date,
+    }
+
+
+def _date_order(email_data) -> float:
+    """Oldest first, so the newest email decides the stage; undated emails first."""
+    return email_data.date.timestamp() if email_data.date else float("-inf")
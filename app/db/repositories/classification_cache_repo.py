@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from app.db.models import ClassificationCacheEntry
+from app.db.repositories.base import BaseRepository
+
+
+class ClassificationCacheRepository(BaseRepository):
+    def find(self, key: str) -> ClassificationCacheEntry | None:
+        return (
+            self.session.query(ClassificationCacheEntry)
+            .filter(ClassificationCacheEntry.key == key)
+            .first()
+        )
+
+    def get(self, key: str, now: datetime) -> dict | None:
+        entry = self.find(key)
+        if not entry or entry.expires_at <= now:
+            return None
+        return entry.payload
+
+    def put(
+        self,
+        key: str,
+        payload: dict,
+        provider: str,
+        model: str | None,
+        expires_at: datetime,
+    ) -> ClassificationCacheEntry:
+        # An expired row for the same key is refreshed in place.
+        entry = self.find(key)
+        if not entry:
+            entry = ClassificationCacheEntry(key=key)
+            self.session.add(entry)
+        entry.provider = provider
+        entry.model = model
+        entry.payload = payload
+        entry.created_at = datetime.utcnow()
+        entry.expires_at = expires_at
+        self.session.flush()
+        return entry
+
+    def purge_expired(self, now: datetime) -> int:
+        return (
+            self.session.query(ClassificationCacheEntry)
+            .filter(ClassificationCacheEntry.expires_at <= now)
+            .delete(synchronize_session=False)
+        )
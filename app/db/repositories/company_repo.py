@@ -18,3 +18,11 @@ class CompanyRepository(BaseRepository):
             self.session.add(company)
             self.session.flush()
         return company
+
+    def get_domains(self) -> list[tuple[str, int, str]]:
+        """(domain, company_id, name) for every company with a known sender domain."""
+        return (
+            self.session.query(Company.domain, Company.id, Company.name)
+            .filter(Company.domain.isnot(None))
+            .all()
+        )
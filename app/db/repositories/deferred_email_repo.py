@@ -0,0 +1,39 @@
+from app.db.models import DeferredEmail
+from app.db.repositories.base import BaseRepository
+
+
+class DeferredEmailRepository(BaseRepository):
+    def add(self, email_data, reason: str) -> DeferredEmail | None:
+        if email_data.message_id and self.find_by_message_id(email_data.message_id):
+            return None
+        deferred = DeferredEmail(
+            message_id=email_data.message_id,
+            uid=email_data.uid,
+            sender=email_data.sender,
+            subject=email_data.subject,
+            received_date=email_data.date,
+            body=email_data.body,
+            thread_id=email_data.thread_id,
+            reason=reason,
+        )
+        self.session.add(deferred)
+        self.session.flush()
+        return deferred
+
+    def find_by_message_id(self, message_id: str) -> DeferredEmail | None:
+        return (
+            self.session.query(DeferredEmail)
+            .filter(DeferredEmail.message_id == message_id)
+            .first()
+        )
+
+    def get_all(self) -> list[DeferredEmail]:
+        return self.session.query(DeferredEmail).order_by(DeferredEmail.id).all()
+
+    def delete(self, deferred: list[DeferredEmail]) -> None:
+        for row in deferred:
+            self.session.delete(row)
+        self.session.flush()
+
+    def count(self) -> int:
+        return self.session.query(DeferredEmail).count()
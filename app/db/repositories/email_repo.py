@@ -1,7 +1,13 @@
 from datetime import datetime
 
-from app.db.models import Email
+from sqlalchemy import or_
+
+from app.db.models import Email, EmailAnalysis
 from app.db.repositories.base import BaseRepository
+from app.utils.fingerprint import simhash, to_signed64
+
+# Bound parameters per IN (...) query; SQLite builds before 3.32 allow 999 in total.
+_IN_CHUNK = 450
 
 
 class EmailRepository(BaseRepository):
@@ -20,6 +26,30 @@ class EmailRepository(BaseRepository):
             return True
         return self.find_by_uid(uid) is not None
 
+    def find_known(
+        self, message_ids: list[str], uids: list[str]
+    ) -> tuple[set[str], set[str]]:
+        """
+        The given Message-IDs and UIDs that are already stored, resolved with
+        one IN (...) query per chunk instead of one lookup per email.
+        """
+        message_ids = list(dict.fromkeys(m for m in message_ids if m))
+        uids = list(dict.fromkeys(u for u in uids if u))
+        known_ids: set[str] = set()
+        known_uids: set[str] = set()
+        for start in range(0, max(len(message_ids), len(uids)), _IN_CHUNK):
+            id_chunk = set(message_ids[start : start + _IN_CHUNK])
+            uid_chunk = set(uids[start : start + _IN_CHUNK])
+            rows = self.session.query(Email.message_id, Email.uid).filter(
+                or_(Email.message_id.in_(list(id_chunk)), Email.uid.in_(list(uid_chunk)))
+            )
+            for message_id, uid in rows:
+                if message_id in id_chunk:
+                    known_ids.add(message_id)
+                if uid in uid_chunk:
+                    known_uids.add(uid)
+        return known_ids, known_uids
+
     def create(
         self,
         message_id: str | None,
@@ -28,14 +58,18 @@ class EmailRepository(BaseRepository):
         subject: str,
         body: str,
         received_date: datetime,
+        thread_id: str | None = None,
     ) -> Email:
+        fingerprint = simhash(body)
         record = Email(
             message_id=message_id,
             uid=uid,
             sender=sender,
             subject=subject,
             body=body,
+            body_simhash=None if fingerprint is None else to_signed64(fingerprint),
             received_date=received_date,
+            thread_id=thread_id,
         )
         self.session.add(record)
         self.session.flush()
@@ -43,3 +77,34 @@ class EmailRepository(BaseRepository):
 
     def get_all(self) -> list[Email]:
         return self.session.query(Email).all()
+
+    def get_fingerprints(self, limit: int) -> list[tuple[str, str, str, int, dict]]:
+        """
+        (sender, subject, body, body_simhash, classification payload) of the
+        most recent fingerprinted emails that have an analysis.
+        """
+        rows = (
+            self.session.query(Email, EmailAnalysis)
+            .join(EmailAnalysis, EmailAnalysis.email_id == Email.id)
+            .filter(Email.body_simhash.isnot(None))
+            .order_by(Email.received_date.desc())
+            .limit(limit)
+            .all()
+        )
+        # Oldest first, so the newest email is the template a lookup settles on.
+        return [
+            (
+                email.sender,
+                email.subject or "",
+                email.body or "",
+                email.body_simhash,
+                {
+                    "is_application": analysis.is_application,
+                    "company": analysis.detected_company,
+                    "position": analysis.detected_position,
+                    "stage": analysis.detected_stage,
+                    "confidence": analysis.confidence or "low",
+                },
+            )
+            for email, analysis in reversed(rows)
+        ]
@@ -0,0 +1,60 @@
+from datetime import date
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app.db.models import LLMQuotaUsage
+from app.db.repositories.base import BaseRepository
+
+
+class LLMQuotaRepository(BaseRepository):
+    """
+    Per-provider, per-day request counters. Reservations are conditional
+    UPDATEs, so concurrent workers and API-triggered runs cannot claim more
+    than the daily limit between them.
+    """
+
+    def find(self, provider: str, day: date) -> LLMQuotaUsage | None:
+        return (
+            self.session.query(LLMQuotaUsage)
+            .populate_existing()
+            .filter(LLMQuotaUsage.provider == provider, LLMQuotaUsage.day == day)
+            .first()
+        )
+
+    def get_or_create(self, provider: str, day: date) -> LLMQuotaUsage:
+        usage = self.find(provider, day)
+        if usage:
+            return usage
+        try:
+            with self.session.begin_nested():
+                self.session.add(LLMQuotaUsage(provider=provider, day=day, used=0, reserved=0))
+        except IntegrityError:
+            pass  # another process created the row first
+        return self.find(provider, day)
+
+    def try_reserve(self, provider: str, day: date, amount: int, ceiling: int) -> bool:
+        """Claim `amount` requests if used + reserved stays within `ceiling`."""
+        result = self.session.execute(
+            update(LLMQuotaUsage)
+            .where(
+                LLMQuotaUsage.provider == provider,
+                LLMQuotaUsage.day == day,
+                LLMQuotaUsage.used + LLMQuotaUsage.reserved + amount <= ceiling,
+            )
+            .values(reserved=LLMQuotaUsage.reserved + amount)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def settle(self, provider: str, day: date, reserved: int, used: int) -> None:
+        """Turn a reservation into `used` requests and hand the rest back."""
+        self.session.execute(
+            update(LLMQuotaUsage)
+            .where(LLMQuotaUsage.provider == provider, LLMQuotaUsage.day == day)
+            .values(
+                reserved=LLMQuotaUsage.reserved - reserved,
+                used=LLMQuotaUsage.used + used,
+            )
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,33 @@
+from app.db.models import MailboxSyncState
+from app.db.repositories.base import BaseRepository
+from app.email_client.client import SyncCheckpoint
+
+
+class SyncStateRepository(BaseRepository):
+    def find(self, account: str, mailbox: str) -> MailboxSyncState | None:
+        return (
+            self.session.query(MailboxSyncState)
+            .filter(
+                MailboxSyncState.account == account,
+                MailboxSyncState.mailbox == mailbox,
+            )
+            .first()
+        )
+
+    def get_checkpoint(self, account: str, mailbox: str) -> SyncCheckpoint:
+        state = self.find(account, mailbox)
+        if not state:
+            return SyncCheckpoint()
+        return SyncCheckpoint(uidvalidity=state.uidvalidity, last_uid=state.last_uid or 0)
+
+    def save_checkpoint(
+        self, account: str, mailbox: str, checkpoint: SyncCheckpoint
+    ) -> MailboxSyncState:
+        state = self.find(account, mailbox)
+        if not state:
+            state = MailboxSyncState(account=account, mailbox=mailbox)
+            self.session.add(state)
+        state.uidvalidity = checkpoint.uidvalidity
+        state.last_uid = checkpoint.last_uid
+        self.session.flush()
+        return state
@@ -17,12 +17,14 @@ class WorkerRunRepository(BaseRepository):
         emails_fetched: int,
         applications_found: int,
         emails_saved: int,
+        filter_stats: dict | None = None,
     ) -> None:
         run.finished_at = datetime.utcnow()
         run.status = "completed"
         run.emails_fetched = emails_fetched
         run.applications_found = applications_found
         run.emails_saved = emails_saved
+        run.filter_stats = filter_stats
 
     def fail(self, run: WorkerRun, error_message: str) -> None:
         run.finished_at = datetime.utcnow()
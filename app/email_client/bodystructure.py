@@ -0,0 +1,142 @@
+"""
+IMAP BODYSTRUCTURE parsing for partial body fetches.
+
+The client uses this to find the text/html and text/plain sections of a message
+so it can fetch just those (capped with a partial range) instead of the full
+RFC822 source with every attachment.
+"""
+import base64
+import binascii
+import quopri
+import re
+from dataclasses import dataclass
+
+_TOKEN_RE = re.compile(rb'\s*(\(|\)|"(?:[^"\\]|\\.)*"|\{\d+\}|[^\s()"]+)')
+
+
+class BodyStructureError(ValueError):
+    """Raised when a BODYSTRUCTURE response cannot be parsed."""
+
+
+@dataclass
+class TextSection:
+    section: str
+    subtype: str  # "plain" or "html"
+    charset: str | None
+    encoding: str | None
+
+
+def extract_bodystructure(fetch_text: bytes) -> list:
+    """Parse the BODYSTRUCTURE item out of the non-literal text of a FETCH response."""
+    marker = fetch_text.upper().find(b"BODYSTRUCTURE")
+    if marker < 0:
+        raise BodyStructureError("No BODYSTRUCTURE in FETCH response.")
+    tokens = _TOKEN_RE.findall(fetch_text, marker + len(b"BODYSTRUCTURE"))
+    structure, _ = _parse_list(tokens, 0)
+    return structure
+
+
+def text_sections(structure: list) -> list[TextSection]:
+    """
+    Return the sections _extract_body would render: every inline text/html part,
+    or every inline text/plain part when the message has no HTML.
+    """
+    html: list[TextSection] = []
+    plain: list[TextSection] = []
+    is_multipart = bool(structure) and isinstance(structure[0], list)
+    for part in _walk(structure, "" if is_multipart else "1"):
+        if part.subtype == "html":
+            html.append(part)
+        else:
+            plain.append(part)
+    return html or plain
+
+
+def decode_section(data: bytes, section: TextSection) -> str:
+    encoding = (section.encoding or "").lower()
+    if encoding == "base64":
+        compact = re.sub(rb"[^A-Za-z0-9+/=]", b"", data)
+        # A partial fetch can end mid-quantum; drop the incomplete tail.
+        compact = compact[: len(compact) - len(compact) % 4]
+        try:
+            data = base64.b64decode(compact)
+        except (binascii.Error, ValueError):
+            return ""
+    elif encoding == "quoted-printable":
+        data = quopri.decodestring(data)
+
+    charset = section.charset or "utf-8"
+    try:
+        return data.decode(charset, errors="ignore")
+    except (LookupError, UnicodeDecodeError):
+        return data.decode("utf-8", errors="ignore")
+
+
+def _walk(node: list, section: str):
+    if node and isinstance(node[0], list):
+        # multipart: (child)(child)... subtype [extension data]
+        index = 0
+        for child in node:
+            if not isinstance(child, list):
+                break
+            index += 1
+            child_section = f"{section}.{index}" if section else str(index)
+            yield from _walk(child, child_section)
+        return
+
+    if len(node) < 7:
+        raise BodyStructureError(f"Malformed body part at section {section}.")
+    maintype = _text(node[0]).lower()
+    subtype = _text(node[1]).lower()
+    if maintype != "text" or subtype not in ("plain", "html"):
+        return
+    # text parts carry a line count, so disposition sits at index 9
+    disposition = node[9] if len(node) > 9 else None
+    if isinstance(disposition, list) and _text(disposition[0]).lower() == "attachment":
+        return
+    params = _params(node[2])
+    yield TextSection(
+        section=section,
+        subtype=subtype,
+        charset=params.get("charset"),
+        encoding=_text(node[5]) or None,
+    )
+
+
+def _params(value) -> dict[str, str]:
+    if not isinstance(value, list):
+        return {}
+    pairs = [_text(v) for v in value]
+    return {k.lower(): v for k, v in zip(pairs[::2], pairs[1::2], strict=False)}
+
+
+def _text(value) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def _parse_list(tokens: list[bytes], pos: int) -> tuple[list, int]:
+    if pos >= len(tokens) or tokens[pos] != b"(":
+        raise BodyStructureError("Expected '(' in BODYSTRUCTURE.")
+    pos += 1
+    items: list = []
+    while pos < len(tokens):
+        token = tokens[pos]
+        if token == b")":
+            return items, pos + 1
+        if token == b"(":
+            child, pos = _parse_list(tokens, pos)
+            items.append(child)
+            continue
+        if token.startswith(b"{"):
+            raise BodyStructureError("Literals inside BODYSTRUCTURE are not supported.")
+        items.append(_atom(token))
+        pos += 1
+    raise BodyStructureError("Unterminated BODYSTRUCTURE list.")
+
+
+def _atom(token: bytes) -> str | None:
+    if token.upper() == b"NIL":
+        return None
+    if token.startswith(b'"'):
+        return re.sub(rb"\\(.)", rb"\1", token[1:-1]).decode("utf-8", errors="ignore")
+    return token.decode("utf-8", errors="ignore")
@@ -1,93 +1,174 @@
 import email
 import imaplib
 import re
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from email.header import decode_header
 from email.utils import parsedate_to_datetime
 from typing import Any
 
-from bs4 import BeautifulSoup
-
 from app.config import get_settings
+from app.email_client.bodystructure import (
+    BodyStructureError,
+    TextSection,
+    decode_section,
+    extract_bodystructure,
+    text_sections,
+)
+from app.email_client.html_text import get_renderer, html_to_text
+from app.email_client.quick_filter import header_prefilter
+
+_FETCH_START_RE = re.compile(rb"^\d+ \(")
+_FETCH_UID_RE = re.compile(rb"UID (\d+)")
+_FETCH_LITERAL_RE = re.compile(rb"(RFC822|BODY\[([^\]]*)\])(?:<\d+>)?\s*\{\d+\}$")
+_HEADER_FIELDS_ITEM = "BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)]"
+_URL_RE = re.compile(r"http\S+")
+_WWW_RE = re.compile(r"www\.\S+")
+_UNSUBSCRIBE_RE = re.compile(r"(?i)unsubscribe")
+_WHITESPACE_RE = re.compile(r"\s+")
+_SIGNATURE_MARKERS = ("--", "__", "==")
+
+
+@dataclass
+class FetchOptions:
+    """Tuning knobs for how messages are pulled over IMAP."""
+
+    batch_size: int = 50
+    # Fetch a few headers first and only download bodies that pass header_prefilter.
+    header_first: bool = False
+    # Use BODYSTRUCTURE to fetch only the text sections, each capped at body_max_bytes.
+    partial_bodies: bool = False
+    body_max_bytes: int = 16384
+    # >0 parses MIME/HTML in that many worker processes while the next batch downloads.
+    parse_workers: int = 0
+    # HTML -> text backend, see app.email_client.html_text.HTML_RENDERERS.
+    html_renderer: str = "stdlib"
+    # Stop normalizing a body once this many characters are produced; None keeps it all.
+    body_max_chars: int | None = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "FetchOptions":
+        return cls(
+            batch_size=settings.imap_fetch_batch_size,
+            header_first=settings.imap_header_first,
+            partial_bodies=settings.imap_partial_bodies,
+            body_max_bytes=settings.imap_body_max_bytes,
+            parse_workers=settings.email_parse_workers,
+            html_renderer=settings.html_renderer,
+            body_max_chars=settings.email_body_max_chars or None,
+        )
+
+
+@dataclass
+class _FetchedMessage:
+    uid: str
+    text: bytes
+    # Literal payloads keyed by item: "RFC822" or the BODY[...] section spec.
+    literals: dict[str, bytes]
+
+    @property
+    def payload(self) -> bytes:
+        return next(iter(self.literals.values()), b"")
+
+
+@dataclass
+class SyncCheckpoint:
+    """Highest UID already fetched from a mailbox, valid only for one UIDVALIDITY."""
+
+    uidvalidity: int | None = None
+    last_uid: int = 0
 
 
 def _connect_to_inbox():
     settings = get_settings()
     mail = imaplib.IMAP4_SSL(settings.imap_server)
     mail.login(settings.email_user, settings.email_pass)
-    mail.select("inbox")
+    mail.select(settings.imap_mailbox)
     return mail
 
 
-def fetch_recent_emails(limit: int) -> list[dict]:
+def fetch_recent_emails(
+    limit: int,
+    checkpoint: SyncCheckpoint | None = None,
+    options: FetchOptions | None = None,
+) -> list[dict]:
+    """Fetch and parse up to `limit` emails from the inbox; see iter_emails."""
+    return list(iter_emails(limit, checkpoint=checkpoint, options=options))
+
+
+def iter_emails(
+    limit: int,
+    checkpoint: SyncCheckpoint | None = None,
+    options: FetchOptions | None = None,
+) -> Iterator[dict]:
+    """
+    Yield parsed emails one at a time, holding at most one FETCH batch in memory.
+
+    Without a checkpoint the newest `limit` messages are returned. With a checkpoint
+    only UIDs above `checkpoint.last_uid` are searched (oldest first, so a backlog
+    drains across runs without gaps) and the checkpoint is advanced in place as
+    each batch is consumed. A UIDVALIDITY mismatch discards the checkpoint and
+    falls back to a full resync.
+
+    Messages are requested `options.batch_size` UIDs per FETCH command, so a run
+    costs one round trip per batch rather than one per message. With
+    `options.header_first`, each batch is screened on From/Subject before any
+    body is transferred. With `options.partial_bodies`, only the text sections
+    named by BODYSTRUCTURE are downloaded, each capped at `options.body_max_bytes`.
+    With `options.parse_workers`, decoding and HTML rendering run in a process
+    pool; output and order are identical to the serial path.
+
+    The IMAP connection stays open until the generator is exhausted or closed.
+    """
+    options = options or FetchOptions()
+    # Reject an unknown renderer before connecting rather than once per message.
+    get_renderer(options.html_renderer)
     mail = None
+    pool = (
+        ProcessPoolExecutor(max_workers=options.parse_workers)
+        if options.parse_workers > 0
+        else None
+    )
     try:
         mail = _connect_to_inbox()
-        status, data = mail.uid("search", None, "ALL")
-        if status != "OK":
-            raise RuntimeError(f"IMAP search failed: {status}")
-
-        if not data or not data[0]:
-            print("No emails found in inbox")
-            return []
-
-        mail_uids = data[0].split()
-        recent_uids = mail_uids[-limit:] if len(mail_uids) > limit else mail_uids
-
-        results = []
-        for uid in recent_uids:
+        recent_uids = _search_uids(mail, limit, checkpoint)
+
+        advance = checkpoint is not None
+        # (uids, results or futures) per batch; with a pool, batch N is parsed in
+        # worker processes while batch N+1 is being fetched.
+        pending: list[tuple[list[bytes], list]] = []
+
+        def drain(keep: int) -> Iterator[dict]:
+            while len(pending) > keep:
+                batch_uids, results = pending.pop(0)
+                for result in results:
+                    parsed = result.result() if isinstance(result, Future) else result
+                    if parsed is not None:
+                        yield parsed
+                if advance:
+                    checkpoint.last_uid = max(
+                        checkpoint.last_uid, *(int(uid) for uid in batch_uids)
+                    )
+
+        for batch in _chunked(recent_uids, options.batch_size):
             try:
-                status, msg_data = mail.uid("fetch", uid, "(RFC822)")
-                if status != "OK":
-                    print(f"Warning: failed to fetch {uid.decode()}")
-                    continue
-
-                for part in msg_data:
-                    if not isinstance(part, tuple):
-                        continue
-
-                    msg = email.message_from_bytes(part[1])
-                    sender = _optional_str(msg.get("From"))
-                    message_id = _optional_str(msg.get("Message-ID"))
-                    if not message_id:
-                        uid_str = uid.decode() if isinstance(uid, bytes) else str(uid)
-                        print(
-                            f"Skipping email {uid_str}: missing required Message-ID header"
-                        )
-                        continue
-
-                    email_date = None
-                    date_str = msg.get("Date")
-                    if date_str:
-                        try:
-                            email_date = parsedate_to_datetime(date_str)
-                        except Exception as e:
-                            print(f"Warning: could not parse date for {uid.decode()}: {e}")
-
-                    raw_subject = msg.get("Subject")
-                    subject = _decode_subject(raw_subject)
-
-                    body = _extract_body(msg)
-                    raw_headers = dict(msg.items())
-
-                    results.append({
-                        "message_id": message_id,
-                        "uid": uid.decode(),
-                        "sender": sender,
-                        "subject": subject,
-                        "received_date": email_date,
-                        "body_text": _optional_str(body),
-                        "raw_headers": raw_headers or None,
-                        # Backward-compat aliases; remove after service migration.
-                        "body": body,
-                        "date": email_date,
-                    })
+                jobs = _fetch_parse_jobs(mail, batch, options)
             except Exception as e:
-                uid_str = uid.decode() if isinstance(uid, bytes) else str(uid)
-                print(f"Error processing email {uid_str}: {e}")
+                print(f"Error fetching UIDs {_format_uid_set(batch)}: {e}")
+                yield from drain(0)
+                # Hold the checkpoint before this batch so the next run retries it.
+                advance = False
                 continue
-
-        return results
+            if pool is None:
+                pending.append((batch, [_run_parse_job(job) for job in jobs]))
+            else:
+                pending.append((batch, [pool.submit(_run_parse_job, job) for job in jobs]))
+            yield from drain(1 if pool is not None else 0)
+        yield from drain(0)
     finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
         if mail:
             try:
                 mail.close()
@@ -96,7 +177,277 @@ def fetch_recent_emails(limit: int) -> list[dict]:
                 print(f"Warning: error closing IMAP connection: {e}")
 
 
-def _extract_body(msg) -> str:
+@dataclass
+class _ParseJob:
+    """Raw bytes for one message; picklable so it can be parsed in a worker process."""
+
+    uid: str
+    raw: bytes
+    # Set for partial fetches, where `raw` is only the header block.
+    sections: list[tuple[TextSection, bytes]] | None = None
+    renderer: str = "stdlib"
+    max_chars: int | None = None
+
+
+def _run_parse_job(job: _ParseJob) -> dict | None:
+    try:
+        if job.sections is None:
+            return _parse_message(
+                job.uid, job.raw, renderer=job.renderer, max_chars=job.max_chars
+            )
+        html_parts: list[str] = []
+        plain_parts: list[str] = []
+        for section, data in job.sections:
+            text = decode_section(data, section)
+            if not text:
+                continue
+            (html_parts if section.subtype == "html" else plain_parts).append(text)
+        body = _render_body(html_parts, plain_parts, job.renderer, job.max_chars)
+        return _parse_message(job.uid, job.raw, body=body)
+    except Exception as e:
+        print(f"Error processing email {job.uid}: {e}")
+        return None
+
+
+def _fetch_parse_jobs(mail, batch: list[bytes], options: FetchOptions) -> list[_ParseJob]:
+    if options.header_first:
+        batch = _screen_headers(mail, batch)
+        if not batch:
+            return []
+    if options.partial_bodies:
+        jobs = _fetch_partial(mail, batch, options.body_max_bytes)
+    else:
+        jobs = [
+            _ParseJob(uid=message.uid, raw=message.payload)
+            for message in _fetch_batch(mail, batch, "RFC822")
+        ]
+    for job in jobs:
+        job.renderer = options.html_renderer
+        job.max_chars = options.body_max_chars
+    return jobs
+
+
+def _parse_message(
+    uid_str: str,
+    raw: bytes,
+    body: str | None = None,
+    renderer: str = "stdlib",
+    max_chars: int | None = None,
+) -> dict | None:
+    """Parse a fetched message; `body` is given when `raw` holds only the header."""
+    msg = email.message_from_bytes(raw)
+    sender = _optional_str(msg.get("From"))
+    message_id = _optional_str(msg.get("Message-ID"))
+    if not message_id:
+        print(f"Skipping email {uid_str}: missing required Message-ID header")
+        return None
+
+    email_date = None
+    date_str = msg.get("Date")
+    if date_str:
+        try:
+            email_date = parsedate_to_datetime(date_str)
+        except Exception as e:
+            print(f"Warning: could not parse date for {uid_str}: {e}")
+
+    raw_subject = msg.get("Subject")
+    subject = _decode_subject(raw_subject)
+
+    if body is None:
+        body = _extract_body(msg, renderer, max_chars)
+    raw_headers = dict(msg.items())
+
+    return {
+        "message_id": message_id,
+        "uid": uid_str,
+        "sender": sender,
+        "subject": subject,
+        "received_date": email_date,
+        "body_text": _optional_str(body),
+        "raw_headers": raw_headers or None,
+    }
+
+
+def _screen_headers(mail, uids: list[bytes]) -> list[bytes]:
+    """Return the UIDs whose headers pass header_prefilter and carry a Message-ID."""
+    wanted: list[bytes] = []
+    for message in _fetch_batch(mail, uids, _HEADER_FIELDS_ITEM):
+        headers = email.message_from_bytes(message.payload)
+        if not _optional_str(headers.get("Message-ID")):
+            print(f"Skipping email {message.uid}: missing required Message-ID header")
+            continue
+        sender = _optional_str(headers.get("From"))
+        subject = _decode_subject(headers.get("Subject"))
+        if not header_prefilter(sender, subject):
+            print(f"Header filter: skipping {message.uid} before body download ({subject!r})")
+            continue
+        wanted.append(message.uid.encode())
+    return wanted
+
+
+def _fetch_partial(mail, uids: list[bytes], max_bytes: int) -> list[_ParseJob]:
+    """
+    Fetch header + BODYSTRUCTURE for a batch, then only the text sections each
+    message needs, capped with a `<0.max_bytes>` partial range. Attachments are
+    never transferred. Messages whose structure cannot be parsed fall back to a
+    full RFC822 fetch.
+    """
+    headers: dict[str, bytes] = {}
+    plans: dict[str, list[TextSection]] = {}
+    fallback: list[bytes] = []
+    for message in _fetch_batch(mail, uids, "BODYSTRUCTURE BODY.PEEK[HEADER]"):
+        header = message.literals.get("HEADER", b"")
+        if not _optional_str(email.message_from_bytes(header).get("Message-ID")):
+            print(f"Skipping email {message.uid}: missing required Message-ID header")
+            continue
+        try:
+            plans[message.uid] = text_sections(extract_bodystructure(message.text))
+        except BodyStructureError as e:
+            print(f"Warning: {e} Falling back to full fetch for {message.uid}")
+            fallback.append(message.uid.encode())
+            continue
+        headers[message.uid] = header
+
+    # Messages with the same section layout share one FETCH command.
+    by_layout: dict[tuple[str, ...], list[bytes]] = {}
+    for uid_str, sections in plans.items():
+        layout = tuple(s.section for s in sections)
+        by_layout.setdefault(layout, []).append(uid_str.encode())
+
+    section_data: dict[str, dict[str, bytes]] = {}
+    for layout, layout_uids in by_layout.items():
+        if not layout:
+            continue
+        items = " ".join(f"BODY.PEEK[{section}]<0.{max_bytes}>" for section in layout)
+        for message in _fetch_batch(mail, layout_uids, items):
+            section_data[message.uid] = message.literals
+
+    jobs = [
+        _ParseJob(
+            uid=uid_str,
+            raw=headers[uid_str],
+            sections=[
+                (section, section_data.get(uid_str, {}).get(section.section, b""))
+                for section in sections
+            ],
+        )
+        for uid_str, sections in plans.items()
+    ]
+    if fallback:
+        jobs.extend(
+            _ParseJob(uid=message.uid, raw=message.payload)
+            for message in _fetch_batch(mail, fallback, "RFC822")
+        )
+    return jobs
+
+
+def _fetch_batch(mail, uids: list[bytes], items: str) -> list[_FetchedMessage]:
+    """Run one UID FETCH for a whole UID set and group the response per message."""
+    status, msg_data = mail.uid("fetch", _format_uid_set(uids), f"(UID {items})")
+    if status != "OK":
+        print(f"Warning: failed to fetch {_format_uid_set(uids)}")
+        return []
+
+    # imaplib yields (prefix, literal) tuples plus bare bytes for trailing text;
+    # a prefix like b"12 (" starts the next message.
+    grouped: list[tuple[bytes, dict[str, bytes]]] = []
+    for part in msg_data:
+        prefix, literal = part if isinstance(part, tuple) else (part, None)
+        if not isinstance(prefix, bytes):
+            continue
+        if _FETCH_START_RE.match(prefix) or not grouped:
+            grouped.append((b"", {}))
+        text, literals = grouped[-1]
+        grouped[-1] = (text + prefix, literals)
+        if literal is not None:
+            match = _FETCH_LITERAL_RE.search(prefix)
+            key = (match.group(2) or match.group(1)).decode().upper() if match else "RFC822"
+            literals[key] = literal
+
+    fetched: list[_FetchedMessage] = []
+    for text, literals in grouped:
+        if not literals and b"BODYSTRUCTURE" not in text.upper():
+            continue
+        match = _FETCH_UID_RE.search(text)
+        if match:
+            uid_str = match.group(1).decode()
+        elif len(uids) == 1:
+            uid_str = uids[0].decode()
+        else:
+            print(f"Warning: FETCH response without UID: {text[:80]!r}")
+            continue
+        fetched.append(_FetchedMessage(uid=uid_str, text=text, literals=literals))
+    return fetched
+
+
+def _format_uid_set(uids: list[bytes]) -> str:
+    """Collapse UIDs into an IMAP sequence set, e.g. ``1001:1100,1105``."""
+    numbers = sorted({int(uid) for uid in uids})
+    ranges: list[str] = []
+    start = prev = numbers[0]
+    for number in numbers[1:]:
+        if number == prev + 1:
+            prev = number
+            continue
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+        start = prev = number
+    ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ",".join(ranges)
+
+
+def _chunked(items: list, size: int) -> list[list]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _search_uids(mail, limit: int, checkpoint: SyncCheckpoint | None) -> list[bytes]:
+    criteria = "ALL"
+    incremental = False
+    if checkpoint is not None:
+        uidvalidity = _get_uidvalidity(mail)
+        if uidvalidity is not None and uidvalidity == checkpoint.uidvalidity:
+            if checkpoint.last_uid:
+                criteria = f"UID {checkpoint.last_uid + 1}:*"
+                incremental = True
+        else:
+            if checkpoint.uidvalidity is not None:
+                print(
+                    f"UIDVALIDITY changed ({checkpoint.uidvalidity} -> {uidvalidity}); "
+                    "running full resync"
+                )
+            checkpoint.uidvalidity = uidvalidity
+            checkpoint.last_uid = 0
+
+    status, data = mail.uid("search", None, criteria)
+    if status != "OK":
+        raise RuntimeError(f"IMAP search failed: {status}")
+
+    if not data or not data[0]:
+        print("No emails found in inbox")
+        return []
+
+    mail_uids = data[0].split()
+    if incremental:
+        # `n:*` always matches the highest UID, even when it is below n.
+        new_uids = [uid for uid in mail_uids if int(uid) > checkpoint.last_uid]
+        if not new_uids:
+            print(f"No new emails since UID {checkpoint.last_uid}")
+        return new_uids[:limit]
+    return mail_uids[-limit:] if len(mail_uids) > limit else mail_uids
+
+
+def _get_uidvalidity(mail) -> int | None:
+    # SELECT leaves UIDVALIDITY among the untagged responses; no extra round trip.
+    _, data = mail.response("UIDVALIDITY")
+    if not data or data[0] is None:
+        return None
+    try:
+        return int(data[-1])
+    except (TypeError, ValueError):
+        return None
+
+
+def _extract_body(msg, renderer: str = "stdlib", max_chars: int | None = None) -> str:
     """Extract clean text from email content using HTML-first parsing."""
     html_parts: list[str] = []
     plain_parts: list[str] = []
@@ -124,13 +475,22 @@ def _extract_body(msg) -> str:
             else:
                 plain_parts.append(decoded_payload)
 
+    return _render_body(html_parts, plain_parts, renderer, max_chars)
+
+
+def _render_body(
+    html_parts: list[str],
+    plain_parts: list[str],
+    renderer: str = "stdlib",
+    max_chars: int | None = None,
+) -> str:
     # Prefer HTML rendering when available; fallback to plaintext.
     if html_parts:
-        rendered = " ".join(_html_to_text(part) for part in html_parts)
+        rendered = " ".join(_html_to_text(part, renderer) for part in html_parts)
     else:
         rendered = " ".join(plain_parts)
 
-    return _normalize_body_text(rendered)
+    return _normalize_body_text(rendered, max_chars)
 
 
 def _decode_payload(part: Any) -> str:
@@ -144,24 +504,47 @@ def _decode_payload(part: Any) -> str:
         return payload.decode("utf-8", errors="ignore")
 
 
-def _html_to_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-
-    for tag in soup(["script", "style"]):
-        tag.decompose()
-
-    # Use line separators so list/table structures do not collapse into one token.
-    return soup.get_text(separator="\n")
-
-
-def _normalize_body_text(body: str) -> str:
-    # Clean up noise
-    body = re.sub(r"http\S+", "", body)
-    body = re.sub(r"www\.\S+", "", body)
-    body = re.sub(r"\s+", " ", body)
-    body = re.sub(r"(--|__|==).*", "", body)
-    body = re.sub(r"(?i)unsubscribe.*", "", body)
-    return body.strip()
+def _html_to_text(html: str, renderer: str = "stdlib") -> str:
+    return html_to_text(html, renderer)
+
+
+def _normalize_body_text(body: str, max_chars: int | None = None) -> str:
+    """
+    Drop URLs, collapse whitespace and cut at the first signature marker
+    (--, __, ==) or "unsubscribe". With `max_chars`, only a growing prefix of
+    `body` is cleaned until the first `max_chars` characters of the result are
+    settled, so long newsletters are not scanned end to end.
+    """
+    if max_chars is not None:
+        size = 4 * max_chars + 64
+        while size < len(body):
+            # Extend to whitespace so no URL or marker is split at the boundary.
+            boundary = _WHITESPACE_RE.search(body, size)
+            if boundary is None:
+                break
+            text, cut = _strip_noise(body[: boundary.end()])
+            if cut or len(text) > max_chars:
+                return text[:max_chars]
+            size *= 2
+    text, _ = _strip_noise(body)
+    return text if max_chars is None else text[:max_chars]
+
+
+def _strip_noise(body: str) -> tuple[str, bool]:
+    """Return the cleaned text and whether a signature/unsubscribe cut was made."""
+    body = _URL_RE.sub("", body)
+    body = _WWW_RE.sub("", body)
+    # Markers never contain whitespace, so they can be located before collapsing it.
+    end = len(body)
+    for marker in _SIGNATURE_MARKERS:
+        index = body.find(marker, 0, end)
+        if index != -1:
+            end = index
+    unsubscribe = _UNSUBSCRIBE_RE.search(body, 0, end)
+    if unsubscribe is not None:
+        end = unsubscribe.start()
+    # str.split() uses the same whitespace definition as \s and also strips the ends.
+    return " ".join(body[:end].split()), end < len(body)
 
 
 def _decode_subject(raw_subject: Any) -> str | None:
@@ -0,0 +1,199 @@
+"""
+HTML -> text renderers for email bodies.
+
+`stdlib` (the default) streams tokens through html.parser without building a
+tree. It uses the same tokenizer as BeautifulSoup's "html.parser" builder and
+mirrors its string boundaries, entity handling and whitespace-only collapsing,
+so its output is identical to the BeautifulSoup renderer. `lxml` is faster
+still when installed, but its tokenizer differs on malformed markup.
+`bs4` is the original tree-based renderer, kept as the fallback.
+"""
+import re
+from collections.abc import Callable
+from html.entities import html5
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+HTML_RENDERERS = ("stdlib", "lxml", "bs4")
+
+_SKIP_TAGS = frozenset({"script", "style"})
+_PRESERVE_WHITESPACE_TAGS = frozenset({"pre", "textarea"})
+# Void elements BeautifulSoup closes immediately instead of pushing on its tag stack.
+_VOID_TAGS = frozenset({
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame",
+    "hr", "image", "img", "input", "isindex", "keygen", "link", "menuitem", "meta",
+    "nextid", "param", "source", "spacer", "track", "wbr",
+})
+_ASCII_SPACES = str.maketrans("", "", "\x20\x0a\x09\x0c\x0d")
+_ENTITIES = {name.rstrip(";"): char for name, char in html5.items()}
+_DECIMAL_REF_RE = re.compile("^([0-9]+)(.*)")
+_HEX_REF_RE = re.compile("^([0-9a-f]+)(.*)")
+_warned_missing_lxml = False
+
+
+def html_to_text(html: str, renderer: str = "stdlib") -> str:
+    """Render `html` to newline-separated text with script/style content dropped."""
+    return get_renderer(renderer)(html)
+
+
+def get_renderer(name: str) -> Callable[[str], str]:
+    key = name.strip().lower()
+    if key == "stdlib":
+        return _render_stdlib
+    if key == "bs4":
+        return _render_bs4
+    if key == "lxml":
+        if _lxml_html is None:
+            global _warned_missing_lxml
+            if not _warned_missing_lxml:
+                print("Warning: lxml is not installed; using the stdlib HTML renderer")
+                _warned_missing_lxml = True
+            return _render_stdlib
+        return _render_lxml
+    raise ValueError(
+        f"Invalid HTML_RENDERER value: {name!r}. Expected one of: "
+        + ", ".join(repr(r) for r in HTML_RENDERERS)
+        + "."
+    )
+
+
+def _render_bs4(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+
+    # Use line separators so list/table structures do not collapse into one token.
+    return soup.get_text(separator="\n")
+
+
+def _render_stdlib(html: str) -> str:
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return "\n".join(parser.strings)
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Collects the strings BeautifulSoup.get_text would return. Consecutive data
+    events are merged until the next tag, comment or declaration, which is
+    where BeautifulSoup ends a NavigableString. Only a stack of open tag names
+    is kept, to know whether text sits inside script/style or pre/textarea.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self.strings: list[str] = []
+        self._pending: list[str] = []
+        self._open_tags: list[str] = []
+        # Void tags already closed on open; a later </br> is then swallowed.
+        self._closed_void: list[str] = []
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending = []
+        open_tags = self._open_tags
+        if any(tag in _SKIP_TAGS for tag in open_tags):
+            return
+        if not data.translate(_ASCII_SPACES) and not any(
+            tag in _PRESERVE_WHITESPACE_TAGS for tag in open_tags
+        ):
+            data = "\n" if "\n" in data else " "
+        self.strings.append(data)
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._flush()
+        if tag in _VOID_TAGS:
+            self._closed_void.append(tag)
+        else:
+            self._open_tags.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._flush()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        self._flush()
+        # Like BeautifulSoup, close the most recent matching tag and everything
+        # opened after it; ignore end tags with no open match.
+        for index in range(len(self._open_tags) - 1, -1, -1):
+            if self._open_tags[index] == tag:
+                del self._open_tags[index:]
+                break
+
+    def handle_data(self, data: str) -> None:
+        self._pending.append(data)
+
+    def handle_entityref(self, name: str) -> None:
+        self._pending.append(_ENTITIES.get(name, f"&{name}"))
+
+    def handle_charref(self, name: str) -> None:
+        self._pending.append(_numeric_reference(name))
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self._pending.append(data[len("CDATA["):])
+            self._flush()
+
+    def handle_comment(self, data: str) -> None:
+        self._flush()
+
+    def handle_decl(self, decl: str) -> None:
+        self._flush()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush()
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+
+def _numeric_reference(name: str) -> str:
+    """Dereference `&#...;` the way BeautifulSoup does, keeping trailing junk as text."""
+    base, pattern = 10, _DECIMAL_REF_RE
+    if name[:1] in ("x", "X"):
+        name, base, pattern = name[1:], 16, _HEX_REF_RE
+    extra = ""
+    try:
+        number = int(name, base)
+    except ValueError:
+        match = pattern.search(name)
+        if match is None:
+            return name
+        number, extra = int(match.group(1), base), match.group(2)
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd" + extra
+    if 0x80 <= number <= 0x9F:
+        try:
+            return bytes([number]).decode("cp1252") + extra
+        except UnicodeDecodeError:
+            pass
+    return chr(number) + extra
+
+
+try:
+    import lxml.html as _lxml_html
+    from lxml import etree as _lxml_etree
+except ModuleNotFoundError:
+    _lxml_html = None
+    _lxml_etree = None
+
+
+def _render_lxml(html: str) -> str:
+    if not html.strip():
+        return ""
+    try:
+        root = _lxml_html.document_fromstring(html)
+    except _lxml_etree.ParserError:
+        return ""
+    _lxml_etree.strip_elements(root, "script", "style", with_tail=False)
+    return "\n".join(root.itertext(_lxml_etree.Element))
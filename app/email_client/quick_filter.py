@@ -1,4 +1,8 @@
 import re
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from time import perf_counter
 
 # Keyword indicators that an email is about a submitted application
 JOB_KEYWORDS = [
@@ -55,45 +59,398 @@ _APPLICATION_STATUS_PATTERNS = [
 ]
 
 
-def _extract_domain(sender: str) -> str | None:
+_REGEX_METACHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+@dataclass(frozen=True)
+class _Rule:
+    """
+    One pattern, compiled once. Patterns made only of literals joined by ".*"
+    are matched with str.find, which is much faster than re for these; the rest
+    run their regex only when every literal it requires is present.
+    """
+
+    pattern: str
+    literals: tuple[str, ...]
+    regex: re.Pattern | None
+
+    def matches(self, scan: "_TextScan") -> bool:
+        if self.regex is None:
+            return _find_in_order(scan, self.literals)
+        for literal in self.literals:
+            if scan.find(literal) == -1:
+                return False
+        return self.regex.search(scan.text) is not None
+
+
+class _TextScan:
+    """
+    Lowercased email text plus the first index of every literal looked up so
+    far. Rules share literals ("job", "new", "application"), so each distinct
+    literal is searched for at most once per email.
+    """
+
+    __slots__ = ("text", "_first")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._first: dict[str, int] = {}
+
+    def find(self, literal: str, start: int = 0) -> int:
+        first = self._first.get(literal)
+        if first is None:
+            first = self._first[literal] = self._search(literal)
+        if first == -1 or first >= start:
+            return first
+        return self.text.find(literal, start)
+
+    def _search(self, literal: str) -> int:
+        # A literal cannot occur if one of its substrings is already known absent.
+        for part in _SUBSTRINGS.get(literal, ()):
+            if self._first.get(part) == -1:
+                return -1
+        return self.text.find(literal)
+
+
+def _find_in_order(scan: _TextScan, literals: tuple[str, ...]) -> bool:
+    """Same result as re.search(".*".join(literals), text): in order, on one line."""
+    if len(literals) == 1:
+        return scan.find(literals[0]) != -1
+    text = scan.text
+    start = 0
+    while True:
+        index = scan.find(literals[0], start)
+        if index == -1:
+            return False
+        position = index + len(literals[0])
+        for literal in literals[1:]:
+            index = scan.find(literal, position)
+            if index == -1:
+                return False
+            if text.find("\n", position, index) != -1:
+                # ".*" cannot cross a line break; retry from the line this literal is on.
+                break
+            position = index + len(literal)
+        else:
+            return True
+        start = text.rfind("\n", 0, index) + 1
+
+
+def _compile_rule(pattern: str) -> _Rule:
+    pieces = _split_on_wildcards(pattern)
+    if pieces and all(not _REGEX_METACHARS.intersection(piece) for piece in pieces):
+        return _Rule(pattern, tuple(pieces), None)
+    literals = tuple(prefix for prefix in map(_literal_prefix, pieces) if prefix)
+    return _Rule(pattern, literals, re.compile(pattern))
+
+
+def _split_on_wildcards(pattern: str) -> list[str]:
+    """Split on top-level ".*"; patterns with a top-level "|" return no pieces."""
+    pieces: list[str] = []
+    depth = 0
+    start = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif depth == 0 and char == "|":
+            return []
+        elif depth == 0 and pattern.startswith(".*", index):
+            pieces.append(pattern[start:index])
+            start = index + 2
+            index += 2
+            continue
+        index += 1
+    pieces.append(pattern[start:])
+    return [piece for piece in pieces if piece]
+
+
+def _literal_prefix(piece: str) -> str:
+    for index, char in enumerate(piece):
+        if char in _REGEX_METACHARS:
+            # A quantifier makes the character before it optional.
+            return piece[: index - 1 if char in "?*+{" else index]
+    return piece
+
+
+class _RuleGroup:
+    def __init__(self, name: str, patterns: list[str]) -> None:
+        self.name = name
+        self.rules = tuple(_compile_rule(p) for p in patterns)
+        self.keys = tuple(f"{name}:{p}" for p in patterns)
+
+    def hits(self, scan: _TextScan) -> list[str]:
+        return [rule.pattern for rule in self.rules if rule.matches(scan)]
+
+    def any(self, scan: _TextScan, stats: "QuickFilterStats | None" = None) -> bool:
+        if stats is None:
+            return any(rule.matches(scan) for rule in self.rules)
+        for rule, key in zip(self.rules, self.keys):
+            start = perf_counter()
+            matched = rule.matches(scan)
+            stats.record_rule(key, matched, perf_counter() - start)
+            if matched:
+                return True
+        return False
+
+
+_POSTING_RULES = _RuleGroup("posting", JOB_POSTING_PATTERNS)
+_CONFIRMATION_RULES = _RuleGroup("confirmation", _APPLICATION_CONFIRMATION_PATTERNS)
+_STATUS_RULES = _RuleGroup("status", _APPLICATION_STATUS_PATTERNS)
+_KEYWORDS = tuple(JOB_KEYWORDS)
+_LITERALS = {
+    literal
+    for group in (_POSTING_RULES, _CONFIRMATION_RULES, _STATUS_RULES)
+    for rule in group.rules
+    for literal in rule.literals
+} | set(_KEYWORDS)
+_SUBSTRINGS = {
+    literal: parts
+    for literal in _LITERALS
+    if (parts := tuple(part for part in _LITERALS if part != literal and part in literal))
+}
+
+
+def _has_keywords(scan: _TextScan, count: int) -> bool:
+    found = 0
+    for keyword in _KEYWORDS:
+        if scan.find(keyword) != -1:
+            found += 1
+            if found >= count:
+                return True
+    return False
+
+
+@dataclass
+class RuleHits:
+    """Every rule that matched one email, as reported by match_rules."""
+
+    sender_domain: str | None = None
+    job_board: bool = False
+    posting: list[str] = field(default_factory=list)
+    confirmation: list[str] = field(default_factory=list)
+    status: list[str] = field(default_factory=list)
+    keywords: list[str] = field(default_factory=list)
+
+
+def match_rules(sender: str, subject: str, email_content: str) -> RuleHits:
+    """Run every quick_filter rule once over the lowercased subject + body."""
+    scan = _TextScan(f"{subject} {email_content}".lower())
+    sender_domain = extract_domain(sender)
+    return RuleHits(
+        sender_domain=sender_domain,
+        job_board=is_job_board_domain(sender_domain),
+        posting=_POSTING_RULES.hits(scan),
+        confirmation=_CONFIRMATION_RULES.hits(scan),
+        status=_STATUS_RULES.hits(scan),
+        keywords=[kw for kw in _KEYWORDS if scan.find(kw) != -1],
+    )
+
+
+def extract_domain(sender: str) -> str | None:
+    """Lower-cased domain of the address in `sender`, or None without one."""
     match = re.search(r"@([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})", sender)
     return match.group(1).lower() if match else None
 
 
-def quick_filter(sender: str, subject: str, email_content: str) -> bool:
+def is_job_board_domain(sender_domain: str | None) -> bool:
     """
-    Fast pre-screen before sending to LLM.
-    Returns True if the email is worth classifying, False if it can be skipped.
-    Keeps LLM call count low by catching obvious non-application emails early.
+    True if `sender_domain` is a job board domain or a subdomain of one, so
+    mail.indeed.com matches indeed.com but notindeed.com does not. One set
+    lookup per label suffix, however many domains are configured.
     """
-    text = f"{subject} {email_content}".lower()
-    sender_domain = _extract_domain(sender)
+    if not sender_domain:
+        return False
+    index = 0
+    while True:
+        if sender_domain[index:] in _JOB_BOARD_SUFFIXES:
+            return True
+        index = sender_domain.find(".", index) + 1
+        if not index:
+            return False
+
+
+def _normalize_domain(domain: str) -> str:
+    return domain.strip().lower().lstrip("@.").rstrip(".")
+
+
+def register_job_board_domains(domains: Iterable[str]) -> None:
+    """Add extra job board / ATS domains, e.g. from JOB_BOARD_EXTRA_DOMAINS."""
+    _JOB_BOARD_SUFFIXES.update(d for d in map(_normalize_domain, domains) if d)
+
+
+_JOB_BOARD_SUFFIXES: set[str] = set()
+register_job_board_domains(JOB_BOARD_DOMAINS)
+
+
+def header_prefilter(sender: str | None, subject: str | None) -> bool:
+    """
+    Sender/subject-only pre-screen used before message bodies are downloaded.
+    Returns False only for job board alerts: a job board sender whose subject
+    reads as a posting and carries no confirmation or status language.
+
+    This is not quick_filter on less text. quick_filter would still pass such
+    an email if its body confirmed an application, and that email is lost
+    here; every other rejection needs the body, so it is left to quick_filter.
+    """
+    if not is_job_board_domain(extract_domain(sender or "")):
+        return True
+    scan = _TextScan((subject or "").lower())
+    return (
+        not _POSTING_RULES.any(scan)
+        or _CONFIRMATION_RULES.any(scan)
+        or _STATUS_RULES.any(scan)
+    )
+
+
+# Reason codes returned by quick_filter_reason / quick_filter_batch
+REASON_JOB_BOARD = "job_board_no_confirmation"
+REASON_POSTING = "posting_pattern"
+REASON_KEYWORDS = "keyword_score"
+REASON_CONFIRMATION = "confirmation_match"
+REASON_NO_SIGNAL = "no_signal"
+
+# EmailClassification-style source recorded on emails the filter rejected
+SOURCE_QUICK_FILTER = "quick_filter"
+
+
+@dataclass
+class QuickFilterStats:
+    """
+    Decision counts per reason code, plus how often each rule was evaluated,
+    how often it matched and the time spent in it. Groups short-circuit, so a
+    rule's hits are the emails where it was the deciding match in its group.
+    """
+
+    emails: int = 0
+    passed: int = 0
+    seconds: float = 0.0
+    reasons: Counter = field(default_factory=Counter)
+    rule_evaluations: Counter = field(default_factory=Counter)
+    rule_hits: Counter = field(default_factory=Counter)
+    rule_seconds: dict[str, float] = field(default_factory=dict)
+
+    def record_rule(self, key: str, matched: bool, seconds: float) -> None:
+        self.rule_evaluations[key] += 1
+        if matched:
+            self.rule_hits[key] += 1
+        self.rule_seconds[key] = self.rule_seconds.get(key, 0.0) + seconds
+
+    def record_decision(self, passed: bool, reason: str, seconds: float) -> None:
+        self.emails += 1
+        self.passed += passed
+        self.reasons[reason] += 1
+        self.seconds += seconds
+
+    def to_dict(self) -> dict:
+        """JSON-ready summary, stored on WorkerRun.filter_stats."""
+        return {
+            "emails": self.emails,
+            "passed": self.passed,
+            "llm_calls_saved": self.emails - self.passed,
+            "seconds": round(self.seconds, 6),
+            "reasons": dict(self.reasons),
+            "rules": {
+                key: {
+                    "evaluated": count,
+                    "hits": self.rule_hits[key],
+                    "seconds": round(self.rule_seconds.get(key, 0.0), 6),
+                }
+                for key, count in self.rule_evaluations.items()
+            },
+        }
+
+
+def quick_filter_reason(
+    sender: str,
+    subject: str,
+    email_content: str,
+    stats: QuickFilterStats | None = None,
+) -> tuple[bool, str]:
+    """quick_filter's decision together with the reason code that produced it."""
+    start = perf_counter()
+    scan = _TextScan(f"{subject} {email_content}".lower())
+    passed, reason = _decide(scan, extract_domain(sender), stats)
+    if stats is not None:
+        stats.record_decision(passed, reason, perf_counter() - start)
+    return passed, reason
+
+
+def quick_filter_batch(
+    emails: Iterable[tuple[str, str, str]],
+    stats: QuickFilterStats | None = None,
+) -> tuple[list[bool], list[str]]:
+    """
+    Run quick_filter over (sender, subject, email_content) tuples without
+    logging. Returns the decisions and the reason code for each email.
+    """
+    decisions: list[bool] = []
+    reasons: list[str] = []
+    for sender, subject, email_content in emails:
+        passed, reason = quick_filter_reason(sender, subject, email_content, stats)
+        decisions.append(passed)
+        reasons.append(reason)
+    return decisions, reasons
+
+
+def _decide(
+    scan: _TextScan, sender_domain: str | None, stats: QuickFilterStats | None
+) -> tuple[bool, str]:
+    # Rule groups are evaluated lazily; none is scanned unless the decision needs it.
+    has_confirmation = None
 
     # Job board emails: only pass through if they contain application confirmation language
-    if sender_domain:
-        for domain in JOB_BOARD_DOMAINS:
-            if domain in sender_domain:
-                has_confirmation = any(
-                    re.search(p, text) for p in _APPLICATION_CONFIRMATION_PATTERNS
-                )
-                if not has_confirmation:
-                    print(f"Quick filter: job board email from {sender_domain} without confirmation language")
-                    return False
-                break
+    if stats is None:
+        is_job_board = is_job_board_domain(sender_domain)
+    else:
+        start = perf_counter()
+        is_job_board = is_job_board_domain(sender_domain)
+        stats.record_rule("job_board", is_job_board, perf_counter() - start)
+    if is_job_board:
+        has_confirmation = _CONFIRMATION_RULES.any(scan, stats)
+        if not has_confirmation:
+            return False, REASON_JOB_BOARD
 
     # Generic job postings: skip unless they also mention the user's application status
-    for pattern in JOB_POSTING_PATTERNS:
-        if re.search(pattern, text):
-            if any(re.search(p, text) for p in _APPLICATION_STATUS_PATTERNS):
-                break  # Ambiguous — let LLM decide
-            return False
+    # (then it is ambiguous and the LLM decides). The five status rules are checked
+    # first since a hit there makes the nineteen posting rules irrelevant.
+    if not _STATUS_RULES.any(scan, stats) and _POSTING_RULES.any(scan, stats):
+        return False, REASON_POSTING
 
     # Score by application-related keyword hits
-    if sum(1 for kw in JOB_KEYWORDS if kw in text) >= 2:
-        return True
+    if stats is None:
+        enough_keywords = _has_keywords(scan, 2)
+    else:
+        start = perf_counter()
+        enough_keywords = _has_keywords(scan, 2)
+        stats.record_rule("keywords", enough_keywords, perf_counter() - start)
+    if enough_keywords:
+        return True, REASON_KEYWORDS
 
     # Strong single-pattern match
-    if any(re.search(p, text) for p in _APPLICATION_CONFIRMATION_PATTERNS):
-        return True
+    if has_confirmation is None:
+        has_confirmation = _CONFIRMATION_RULES.any(scan, stats)
+    if has_confirmation:
+        return True, REASON_CONFIRMATION
+    return False, REASON_NO_SIGNAL
 
-    return False
+
+def quick_filter(sender: str, subject: str, email_content: str) -> bool:
+    """
+    Fast pre-screen before sending to LLM.
+    Returns True if the email is worth classifying, False if it can be skipped.
+    Keeps LLM call count low by catching obvious non-application emails early.
+    """
+    passed, reason = quick_filter_reason(sender, subject, email_content)
+    if reason == REASON_JOB_BOARD:
+        print(
+            f"Quick filter: job board email from {extract_domain(sender)} "
+            "without confirmation language"
+        )
+    return passed
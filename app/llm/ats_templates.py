@@ -0,0 +1,373 @@
+"""
+Deterministic extraction for known ATS email templates.
+
+Greenhouse, Lever, Workday and the other applicant tracking systems send
+confirmations, rejections and interview invitations with very regular
+subjects ("Thank you for applying to X", "Your application for Y at Z").
+Each registered template is a sender-domain check plus a subject regex with
+`company`/`position` groups, optionally completed from the body.
+ATSTemplateClassifier answers matching emails in microseconds and forwards
+everything else to the wrapped classifier.
+
+    python -m app.llm.ats_templates report [--include-low-confidence]
+
+reports, per template, how many stored emails it matches and how often it
+agrees with the stored LLM analysis.
+"""
+import argparse
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from email.utils import parseaddr
+
+from sqlalchemy.orm import Session
+
+from app.email_client.quick_filter import extract_domain, is_job_board_domain
+from app.llm.base import (
+    EmailClassification,
+    EmailInput,
+    LLMClassifier,
+    classify_email_async,
+    classify_emails,
+    classify_emails_async,
+)
+
+SOURCE_ATS_TEMPLATE = "ats_template"
+# Longer captures are a regex running past the field, not a company or role name.
+_MAX_FIELD_CHARS = 100
+
+_REJECTION = (
+    r"unfortunately|not (?:be )?(?:moving|move) forward|other candidates|"
+    r"decided to (?:pursue|proceed with|move forward with) other|no longer (?:being )?considered"
+)
+_COMPANY = r"(?P<company>[^\n!?:|]+?)"
+_POSITION = r"(?P<position>[^\n!?|]+?)"
+_END = r"\s*[!.]?\s*$"
+_ROLE_WORD = r"(?:role|position|opening|job|requisition)"
+
+
+@dataclass(frozen=True)
+class ATSTemplate:
+    """
+    `subject` must match; missing fields are searched for in the body with
+    `body`. `domains` limits the template to those senders (and their
+    subdomains); empty means any job board / ATS sender. `requires` and
+    `excludes` are lowercase patterns that must and must not match the
+    lowercased body (IGNORECASE alternations are several times slower).
+    """
+
+    name: str
+    subject: re.Pattern
+    stage: str = "applied"
+    body: re.Pattern | None = None
+    domains: tuple[str, ...] = ()
+    requires: re.Pattern | None = None
+    excludes: re.Pattern | None = None
+
+
+def template(
+    name: str,
+    subject: str,
+    stage: str = "applied",
+    body: str | None = None,
+    domains: tuple[str, ...] = (),
+    requires: str | None = None,
+    excludes: str | None = None,
+) -> ATSTemplate:
+    """Build an ATSTemplate from pattern strings (matched case-insensitively)."""
+    return ATSTemplate(
+        name=name,
+        subject=re.compile(subject, re.IGNORECASE),
+        stage=stage,
+        body=_compile(body),
+        domains=tuple(d.lower() for d in domains),
+        requires=_compile(requires, 0),
+        excludes=_compile(excludes, 0),
+    )
+
+
+def _compile(pattern: str | None, flags: int = re.IGNORECASE) -> re.Pattern | None:
+    return None if pattern is None else re.compile(pattern, flags)
+
+
+_BODY_POSITION = (
+    rf"(?:applying|application|interest in|applied)(?: (?:for|to))? (?:the |our )?"
+    rf"{_POSITION} {_ROLE_WORD}"
+)
+
+TEMPLATES: list[ATSTemplate] = [
+    template(
+        "interview_invitation",
+        rf"^(?:invitation to interview|interview (?:invitation|request))"
+        rf"(?: for (?:the )?{_POSITION})?(?: (?:at|with|from) | - ){_COMPANY}{_END}",
+        stage="interview",
+        body=_BODY_POSITION,
+    ),
+    template(
+        "application_update_rejection",
+        rf"^(?:an )?(?:update (?:on|regarding)|regarding|re:) your application"
+        rf"(?: for (?:the )?{_POSITION}(?: {_ROLE_WORD})?)?"
+        rf"(?: (?:to|at|with) | - ){_COMPANY}{_END}",
+        stage="rejected",
+        body=_BODY_POSITION,
+        requires=_REJECTION,
+    ),
+    template(
+        "greenhouse_confirmation",
+        rf"^thank you for (?:applying|your application) to {_COMPANY}{_END}",
+        body=_BODY_POSITION,
+        domains=("greenhouse.io", "greenhouse-mail.io"),
+        excludes=_REJECTION,
+    ),
+    template(
+        "lever_confirmation",
+        rf"^(?:thanks|thank you) for (?:applying|your application|your interest)"
+        rf"(?: (?:to|in))? {_COMPANY}{_END}",
+        body=_BODY_POSITION,
+        domains=("lever.co",),
+        excludes=_REJECTION,
+    ),
+    template(
+        "workday_confirmation",
+        rf"^(?:thank you for applying|application received|we received your application)"
+        rf"(?:\s*[:!,-]\s*|\s+(?:for|to)\s+)(?:the )?{_POSITION}"
+        rf"(?: {_ROLE_WORD})?(?: (?:at|with) {_COMPANY})?{_END}",
+        # Workday tenants send as "Acme Careers <acme@myworkday.com>".
+        domains=("myworkday.com", "workday.com"),
+        excludes=_REJECTION,
+    ),
+    template(
+        "application_for_position_at_company",
+        rf"^(?:your application for|thank you for applying (?:for|to)) (?:the )?{_POSITION}"
+        rf"(?: {_ROLE_WORD})? (?:at|with) {_COMPANY}{_END}",
+        excludes=_REJECTION,
+    ),
+    template(
+        "thank_you_for_applying",
+        rf"^(?:thanks|thank you) for (?:applying|your application) to {_COMPANY}{_END}",
+        body=_BODY_POSITION,
+        excludes=_REJECTION,
+    ),
+]
+
+
+def register_template(ats_template: ATSTemplate) -> None:
+    """Add a template; it is tried before the built-in ones."""
+    TEMPLATES.insert(0, ats_template)
+
+
+def _clean(value: str | None) -> str | None:
+    if not value:
+        return None
+    value = " ".join(value.split()).strip(" \"'“”‘’.,;:-")
+    if not value or len(value) > _MAX_FIELD_CHARS:
+        return None
+    return value
+
+
+_SENDER_NOISE_RE = re.compile(
+    r"\b(?:careers?|recruiting|recruitment|talent(?: acquisition)?|hiring(?: team)?|jobs|"
+    r"team|hr|people|via \w+|no-?reply|notifications?|workday|greenhouse|lever)\b",
+    re.IGNORECASE,
+)
+
+
+def _sender_company(sender: str) -> str | None:
+    """Company from a display name such as "Acme Careers" or "Acme via Workday"."""
+    name = parseaddr(sender or "")[0]
+    return _clean(_SENDER_NOISE_RE.sub(" ", name))
+
+
+def _domain_matches(domains: tuple[str, ...], sender_domain: str | None) -> bool:
+    if not domains:
+        return is_job_board_domain(sender_domain)
+    if not sender_domain:
+        return False
+    return any(sender_domain == d or sender_domain.endswith("." + d) for d in domains)
+
+
+def match_template(
+    sender: str, subject: str, body: str, templates: list[ATSTemplate] | None = None
+) -> tuple[ATSTemplate, EmailClassification] | None:
+    """The first template that matches and yields a company, with its classification."""
+    sender_domain = extract_domain(sender or "")
+    subject = " ".join((subject or "").split())
+    body = body or ""
+    lowered = None
+    for candidate in TEMPLATES if templates is None else templates:
+        match = candidate.subject.search(subject)
+        if match is None or not _domain_matches(candidate.domains, sender_domain):
+            continue
+        if lowered is None:
+            lowered = body.lower()
+        if candidate.requires is not None and not candidate.requires.search(lowered):
+            continue
+        if candidate.excludes is not None and candidate.excludes.search(lowered):
+            continue
+        fields = {key: _clean(value) for key, value in match.groupdict().items()}
+        if candidate.body is not None and not all(fields.get(k) for k in ("company", "position")):
+            body_match = candidate.body.search(body)
+            if body_match is not None:
+                for key, value in body_match.groupdict().items():
+                    fields[key] = fields.get(key) or _clean(value)
+        company = fields.get("company") or _sender_company(sender)
+        if not company:
+            continue
+        position = fields.get("position")
+        return candidate, EmailClassification(
+            is_application=True,
+            company=company,
+            position=position,
+            stage=candidate.stage,
+            # Without a position the application cannot be linked, so it goes to review.
+            confidence="high" if position else "medium",
+            source=SOURCE_ATS_TEMPLATE,
+        )
+    return None
+
+
+@dataclass
+class ATSTemplateStats:
+    emails: int = 0
+    hits: Counter = field(default_factory=Counter)
+
+    @property
+    def matched(self) -> int:
+        return sum(self.hits.values())
+
+    def to_dict(self) -> dict:
+        return {"emails": self.emails, "matched": self.matched, "templates": dict(self.hits)}
+
+    def summary(self) -> str:
+        per_template = ", ".join(f"{name}={count}" for name, count in self.hits.most_common())
+        line = f"{self.matched} of {self.emails} answered without the LLM"
+        return f"{line} ({per_template})" if per_template else line
+
+
+class ATSTemplateClassifier:
+    """
+    LLMClassifier that answers emails matching a registered ATS template and
+    forwards the rest to `classifier`. Hits come back with
+    `source="ats_template"` and are counted per template in `stats`.
+    """
+
+    def __init__(
+        self, classifier: LLMClassifier, templates: list[ATSTemplate] | None = None
+    ) -> None:
+        self.classifier = classifier
+        self.templates = templates
+        self.provider_name = getattr(classifier, "provider_name", "unknown")
+        self.stats = ATSTemplateStats()
+
+    def classify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        result = self._match(sender, subject, body)
+        if result is not None:
+            return result
+        return self.classifier.classify_email(sender, subject, body)
+
+    async def aclassify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        result = self._match(sender, subject, body)
+        if result is not None:
+            return result
+        return await classify_email_async(self.classifier, sender, subject, body)
+
+    def classify_emails(self, emails: list[EmailInput]) -> list[EmailClassification | None]:
+        results = [self._match(*email) for email in emails]
+        forward = [index for index, result in enumerate(results) if result is None]
+        if forward:
+            fresh = classify_emails(self.classifier, [emails[i] for i in forward])
+            for index, result in zip(forward, fresh):
+                results[index] = result
+        return results
+
+    async def aclassify_emails(
+        self, emails: list[EmailInput]
+    ) -> list[EmailClassification | None]:
+        results = [self._match(*email) for email in emails]
+        forward = [index for index, result in enumerate(results) if result is None]
+        if forward:
+            fresh = await classify_emails_async(self.classifier, [emails[i] for i in forward])
+            for index, result in zip(forward, fresh):
+                results[index] = result
+        return results
+
+    def _match(self, sender: str, subject: str, body: str) -> EmailClassification | None:
+        self.stats.emails += 1
+        matched = match_template(sender, subject, body, self.templates)
+        if matched is None:
+            return None
+        ats_template, result = matched
+        self.stats.hits[ats_template.name] += 1
+        return result
+
+
+def _same(a: str | None, b: str | None) -> bool:
+    return (a or "").casefold().strip() == (b or "").casefold().strip()
+
+
+def report(session: Session, include_low_confidence: bool = False) -> None:
+    """
+    Per-template hit rate over stored emails and agreement with their analyses.
+    Analyses the templates produced themselves are skipped: they would always agree.
+    """
+    from app.db.repositories.analysis_repo import AnalysisRepository
+
+    rows = [
+        (email, analysis)
+        for email, analysis in AnalysisRepository(session).get_labeled_emails()
+        if (include_low_confidence or not analysis.needs_review)
+        and analysis.model_used != SOURCE_ATS_TEMPLATE
+    ]
+    hits: Counter = Counter()
+    agree: dict[str, Counter] = {}
+    for email, analysis in rows:
+        matched = match_template(email.sender, email.subject, email.body)
+        if matched is None:
+            continue
+        ats_template, result = matched
+        hits[ats_template.name] += 1
+        counts = agree.setdefault(ats_template.name, Counter())
+        counts["decision"] += bool(analysis.is_application)
+        counts["company"] += _same(result.company, analysis.detected_company)
+        counts["position"] += _same(result.position, analysis.detected_position)
+        counts["stage"] += _same(result.stage, analysis.detected_stage)
+
+    total = len(rows)
+    print(f"Stored emails: {total}, matched by a template: {sum(hits.values())}")
+    print(
+        f"{'template':>36} {'hits':>6} {'hit rate':>9} "
+        f"{'decision':>9} {'company':>8} {'position':>9} {'stage':>6}"
+    )
+    for ats_template in TEMPLATES:
+        count = hits[ats_template.name]
+        counts = agree.get(ats_template.name, Counter())
+        shares = [counts[key] / count if count else 0.0 for key in (
+            "decision", "company", "position", "stage"
+        )]
+        print(
+            f"{ats_template.name:>36} {count:6d} {count / max(total, 1):9.1%} "
+            f"{shares[0]:9.1%} {shares[1]:8.1%} {shares[2]:9.1%} {shares[3]:6.1%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=("report",))
+    parser.add_argument("--include-low-confidence", action="store_true")
+    args = parser.parse_args()
+
+    from app.db.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        report(session, args.include_low_confidence)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,41 @@
+import asyncio
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Any, Protocol
+
+from app.llm.condense import DEFAULT_BODY_TOKENS, prompt_body
+from app.llm.errors import provider_error
+
+_PROMPT = """\
+Analyze this email to determine if it's about a job application
+that the recipient has ALREADY SUBMITTED.
+
+IMPORTANT: Classify as an application ONLY if the email:
+- Confirms receipt of an application the user submitted
+- Provides status updates on an existing application (interview, assessment, offer, rejection)
+- Requests action on an existing application (complete assessment, schedule interview)
+- Is a direct response to an application the user sent
+
+DO NOT classify as an application if the email:
+- Is a job posting or job alert about new openings
+- Promotes new opportunities the user hasn't applied to
+- Is a newsletter about available positions
+- Invites the user to apply to a new position they haven't applied to yet
+- Is marketing or promotional content
+
+Email:
+From: {sender}
+Subject: {subject}
+Body: {body}
+
+Return ONLY valid JSON with no explanation:
+{{
+    "is_application": boolean,
+    "stage": "applied|rejected|interview|offer|assessment|other or null",
+    "company": "string or null",
+    "position": "string or null",
+    "confidence": "high|medium|low"
+}}
+"""
 
 
 @dataclass
@@ -9,6 +45,12 @@ class EmailClassification:
     position: str | None = None
     stage: str | None = None
     confidence: str = "low"  # high / medium / low
+    # Set when something other than the LLM produced the answer (e.g. "model_reject")
+    source: str | None = None
+
+
+# (sender, subject, body)
+EmailInput = tuple[str, str, str]
 
 
 class LLMClassifier(Protocol):
@@ -18,3 +60,176 @@ class LLMClassifier(Protocol):
         self, sender: str, subject: str, body: str
     ) -> EmailClassification | None:
         ...
+
+    def classify_emails(self, emails: list[EmailInput]) -> list[EmailClassification | None]:
+        """Classify several emails in one provider request; results follow input order."""
+        ...
+
+
+async def classify_email_async(
+    classifier: LLMClassifier, sender: str, subject: str, body: str
+) -> EmailClassification | None:
+    """Use the classifier's `aclassify_email` if it has one, else run it in a thread."""
+    aclassify = getattr(classifier, "aclassify_email", None)
+    if aclassify is not None:
+        return await aclassify(sender, subject, body)
+    return await asyncio.to_thread(classifier.classify_email, sender, subject, body)
+
+
+def classify_emails(
+    classifier: LLMClassifier, emails: list[EmailInput]
+) -> list[EmailClassification | None]:
+    """Batch through `classify_emails` when the classifier has it, else one at a time."""
+    classify_many = getattr(classifier, "classify_emails", None)
+    if classify_many is not None:
+        return classify_many(emails)
+    return [classifier.classify_email(*email) for email in emails]
+
+
+async def classify_emails_async(
+    classifier: LLMClassifier, emails: list[EmailInput]
+) -> list[EmailClassification | None]:
+    aclassify_many = getattr(classifier, "aclassify_emails", None)
+    if aclassify_many is not None:
+        return await aclassify_many(emails)
+    return await asyncio.to_thread(classify_emails, classifier, emails)
+
+
+def provider_of(classifier: LLMClassifier) -> LLMClassifier:
+    """The provider adapter under any wrapper layers (cache, pre-classifier gate)."""
+    while hasattr(classifier, "classifier"):
+        classifier = classifier.classifier
+    return classifier
+
+
+def request_count(classifier: LLMClassifier) -> int | None:
+    """
+    Requests the providers under `classifier` have made, fallback providers
+    (ResilientClassifier.providers) included; None if none of them counts.
+    """
+    while not hasattr(classifier, "providers") and hasattr(classifier, "classifier"):
+        classifier = classifier.classifier
+    counts = [
+        provider.request_count
+        for provider in getattr(classifier, "providers", [classifier])
+        if hasattr(provider, "request_count")
+    ]
+    return sum(counts) if counts else None
+
+
+class ChatAdapter:
+    """
+    Prompting, batching and request counting shared by the provider adapters.
+    Subclasses implement the transport: `_send`, `_asend` and `_new_async_client`.
+    """
+
+    provider_name: str
+    # Bump whenever _PROMPT changes; it is part of the classification cache key.
+    prompt_version = 2
+
+    def __init__(
+        self, model: str, timeout: float | None, body_token_budget: int = DEFAULT_BODY_TOKENS
+    ) -> None:
+        self.model = model
+        # Seconds before a request is abandoned; None keeps the SDK default.
+        self.timeout = timeout
+        # Estimated tokens of condensed body per email; 0 sends the first 2000 characters.
+        self.body_token_budget = body_token_budget
+        # Shared by the sync and async paths; None disables client-side limiting.
+        self.rate_limiter = None
+        self._async_client = None
+        self._async_loop = None
+        # Provider requests made, including batch retries; settles the daily quota.
+        self.request_count = 0
+
+    def classify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        from app.llm.normalization import extract_json_object, normalize_classification
+
+        content = self._complete(self._prompt(sender, subject, body))
+        return normalize_classification(extract_json_object(content))
+
+    async def aclassify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        from app.llm.normalization import extract_json_object, normalize_classification
+
+        content = await self._acomplete(self._prompt(sender, subject, body))
+        return normalize_classification(extract_json_object(content))
+
+    def classify_emails(
+        self, emails: list[EmailInput]
+    ) -> list[EmailClassification | None]:
+        """One request for the whole batch; unusable items are retried one at a time."""
+        from app.llm.batch_prompt import build_batch_prompt, parse_batch_response
+
+        if len(emails) < 2:
+            return [self.classify_email(*email) for email in emails]
+        prompt = build_batch_prompt(emails, self.body_token_budget)
+        results = parse_batch_response(self._complete(prompt), len(emails))
+        return [
+            result if result is not None else self.classify_email(*email)
+            for email, result in zip(emails, results)
+        ]
+
+    async def aclassify_emails(
+        self, emails: list[EmailInput]
+    ) -> list[EmailClassification | None]:
+        from app.llm.batch_prompt import build_batch_prompt, parse_batch_response
+
+        if len(emails) < 2:
+            return [await self.aclassify_email(*email) for email in emails]
+        content = await self._acomplete(build_batch_prompt(emails, self.body_token_budget))
+        results = parse_batch_response(content, len(emails))
+        return [
+            result if result is not None else await self.aclassify_email(*email)
+            for email, result in zip(emails, results)
+        ]
+
+    def _complete(self, prompt: str) -> str:
+        self.request_count += 1
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        try:
+            return self._send(prompt)
+        except Exception as exc:  # noqa: BLE001
+            raise self._error(exc) from exc
+
+    async def _acomplete(self, prompt: str) -> str:
+        self.request_count += 1
+        if self.rate_limiter:
+            await self.rate_limiter.acquire_async()
+        try:
+            return await self._asend(prompt)
+        except Exception as exc:  # noqa: BLE001
+            raise self._error(exc) from exc
+
+    def _get_async_client(self) -> Any:
+        # The client's connection pool belongs to the loop that created it, and each
+        # fan-out runs in a fresh loop.
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_client = self._new_async_client()
+            self._async_loop = loop
+        return self._async_client
+
+    def _error(self, exc: Exception) -> Exception:
+        return provider_error(
+            f"{self.provider_name.capitalize()} classification failed with model {self.model}.",
+            exc,
+        )
+
+    def _prompt(self, sender: str, subject: str, body: str) -> str:
+        return _PROMPT.format(
+            sender=sender, subject=subject, body=prompt_body(body, self.body_token_budget)
+        )
+
+    def _send(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def _asend(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def _new_async_client(self) -> Any:
+        raise NotImplementedError
@@ -0,0 +1,72 @@
+"""
+Multi-email prompt shared by the adapters' `classify_emails`.
+
+The instruction block is sent once per batch instead of once per email, and
+the model answers with a JSON array keyed by each email's number.
+"""
+from app.llm.base import EmailClassification, EmailInput
+from app.llm.condense import DEFAULT_BODY_TOKENS, prompt_body
+from app.llm.errors import LLMResponseError
+from app.llm.normalization import extract_json_array, normalize_classifications
+
+_BATCH_PROMPT = """\
+Analyze each of the {count} numbered emails below to determine if it's about a job
+application that the recipient has ALREADY SUBMITTED.
+
+IMPORTANT: Classify as an application ONLY if the email:
+- Confirms receipt of an application the user submitted
+- Provides status updates on an existing application (interview, assessment, offer, rejection)
+- Requests action on an existing application (complete assessment, schedule interview)
+- Is a direct response to an application the user sent
+
+DO NOT classify as an application if the email:
+- Is a job posting or job alert about new openings
+- Promotes new opportunities the user hasn't applied to
+- Is a newsletter about available positions
+- Invites the user to apply to a new position they haven't applied to yet
+- Is marketing or promotional content
+
+{emails}
+Return ONLY a valid JSON array with exactly one object per email and no explanation:
+[
+    {{
+        "index": email number,
+        "is_application": boolean,
+        "stage": "applied|rejected|interview|offer|assessment|other or null",
+        "company": "string or null",
+        "position": "string or null",
+        "confidence": "high|medium|low"
+    }}
+]
+"""
+
+_EMAIL_BLOCK = """\
+=== Email {index} ===
+From: {sender}
+Subject: {subject}
+Body: {body}
+
+"""
+
+
+def build_batch_prompt(
+    emails: list[EmailInput], body_token_budget: int = DEFAULT_BODY_TOKENS
+) -> str:
+    blocks = "".join(
+        _EMAIL_BLOCK.format(
+            index=index,
+            sender=sender,
+            subject=subject,
+            body=prompt_body(body, body_token_budget),
+        )
+        for index, (sender, subject, body) in enumerate(emails, start=1)
+    )
+    return _BATCH_PROMPT.format(count=len(emails), emails=blocks)
+
+
+def parse_batch_response(content: str, count: int) -> list[EmailClassification | None]:
+    """Per-email results; None marks an email the caller should retry on its own."""
+    try:
+        return normalize_classifications(extract_json_array(content), count)
+    except LLMResponseError:
+        return [None] * count
@@ -0,0 +1,203 @@
+"""
+Classification cache in front of an LLMClassifier.
+
+Results are keyed by a hash of provider, model, prompt version and the
+normalized (sender, subject, condensed body) the prompt is built from, so
+re-runs, the same message in two folders and identical auto-confirmations
+reuse one LLM answer. An in-process LRU sits in front of an optional
+database layer whose rows expire after a TTL.
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from dataclasses import asdict, replace
+from datetime import datetime, timedelta
+
+from app.llm.base import (
+    EmailClassification,
+    EmailInput,
+    LLMClassifier,
+    classify_email_async,
+    classify_emails,
+    classify_emails_async,
+)
+from app.llm.condense import prompt_body
+
+SOURCE_CACHE_HIT = "cache_hit"
+
+
+def classification_cache_key(
+    classifier: LLMClassifier, sender: str, subject: str, body: str
+) -> str:
+    parts = [
+        getattr(classifier, "provider_name", "unknown"),
+        str(getattr(classifier, "model", "")),
+        str(getattr(classifier, "prompt_version", "")),
+        " ".join((sender or "").split()).lower(),
+        " ".join((subject or "").split()),
+        # Only the body text the prompt actually carries.
+        " ".join(prompt_body(body, getattr(classifier, "body_token_budget", 0)).split()),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class CachingClassifier:
+    """
+    LLMClassifier wrapper that answers repeated emails from the cache. Hits
+    come back with `source="cache_hit"`. `None` results are not cached, and
+    neither are answers something other than the LLM gave (`source` set, e.g.
+    a near-duplicate reuse): a later run would serve them as LLM answers.
+    `repository` (ClassificationCacheRepository) persists entries across runs.
+    """
+
+    def __init__(
+        self,
+        classifier: LLMClassifier,
+        repository=None,
+        max_entries: int = 1024,
+        ttl: timedelta = timedelta(days=30),
+    ) -> None:
+        self.classifier = classifier
+        self.repository = repository
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.provider_name = getattr(classifier, "provider_name", "unknown")
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, EmailClassification] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    def classify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        key = classification_cache_key(self.classifier, sender, subject, body)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        self.misses += 1
+        result = self.classifier.classify_email(sender, subject, body)
+        self._store(key, result)
+        return result
+
+    async def aclassify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        key = classification_cache_key(self.classifier, sender, subject, body)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        # Identical emails classified concurrently share one in-flight LLM call.
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.hits += 1
+            result = await in_flight
+            return None if result is None else replace(result, source=SOURCE_CACHE_HIT)
+
+        self.misses += 1
+        task = asyncio.ensure_future(
+            classify_email_async(self.classifier, sender, subject, body)
+        )
+        self._in_flight[key] = task
+        try:
+            result = await task
+        finally:
+            del self._in_flight[key]
+        self._store(key, result)
+        return result
+
+    def classify_emails(self, emails: list[EmailInput]) -> list[EmailClassification | None]:
+        keys, results, todo = self._lookup_batch(emails)
+        if todo:
+            fresh = classify_emails(self.classifier, [emails[i] for i in todo])
+            self._store_batch(keys, results, todo, fresh)
+        return results
+
+    async def aclassify_emails(
+        self, emails: list[EmailInput]
+    ) -> list[EmailClassification | None]:
+        keys, results, todo = self._lookup_batch(emails)
+        if todo:
+            fresh = await classify_emails_async(self.classifier, [emails[i] for i in todo])
+            self._store_batch(keys, results, todo, fresh)
+        return results
+
+    def _lookup_batch(
+        self, emails: list[EmailInput]
+    ) -> tuple[list[str], list[EmailClassification | None], list[int]]:
+        """Cached results, plus the first index of each distinct uncached email."""
+        keys = [classification_cache_key(self.classifier, *email) for email in emails]
+        results = [self._cached(key) for key in keys]
+        first_index: dict[str, int] = {}
+        for index, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                first_index.setdefault(key, index)
+        self.misses += len(first_index)
+        return keys, results, list(first_index.values())
+
+    def _store_batch(
+        self,
+        keys: list[str],
+        results: list[EmailClassification | None],
+        todo: list[int],
+        fresh: list[EmailClassification | None],
+    ) -> None:
+        by_key = {}
+        for index, result in zip(todo, fresh):
+            self._store(keys[index], result)
+            results[index] = result
+            by_key[keys[index]] = result
+        # Repeats of an email within the batch reuse its answer.
+        for index, key in enumerate(keys):
+            result = by_key.get(key)
+            if results[index] is None and result is not None:
+                self.hits += 1
+                results[index] = replace(result, source=SOURCE_CACHE_HIT)
+
+    def _cached(self, key: str) -> EmailClassification | None:
+        cached = self._lookup(key)
+        if cached is None:
+            return None
+        self.hits += 1
+        return replace(cached, source=SOURCE_CACHE_HIT)
+
+    def _store(self, key: str, result: EmailClassification | None) -> None:
+        if result is None or result.source is not None:
+            return
+        self._remember(key, result)
+        if self.repository is not None:
+            self.repository.put(
+                key,
+                _to_payload(result),
+                provider=self.provider_name,
+                model=str(getattr(self.classifier, "model", "")),
+                expires_at=datetime.utcnow() + self.ttl,
+            )
+
+    def _lookup(self, key: str) -> EmailClassification | None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self.repository is None:
+            return None
+        payload = self.repository.get(key, datetime.utcnow())
+        if payload is None:
+            return None
+        result = EmailClassification(**payload)
+        self._remember(key, result)
+        return result
+
+    def _remember(self, key: str, result: EmailClassification) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _to_payload(result: EmailClassification) -> dict:
+    payload = asdict(result)
+    payload.pop("source")
+    return payload
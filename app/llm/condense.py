@@ -0,0 +1,202 @@
+"""
+Token-budget body condensation for classification prompts.
+
+Instead of the first 2000 characters, the prompt gets the email's most
+informative sentences — confirmation/status patterns, stage words, company
+and role cues — plus the greeting and sign-off, in their original order with
+"…" marking cuts. Bodies that already fit the budget are sent unchanged.
+Tokens are estimated at ~4 characters each, the usual ratio for English text
+with Llama-family tokenizers; no tokenizer is needed at runtime.
+"""
+import re
+from bisect import bisect_right
+
+from app.email_client.quick_filter import (
+    _APPLICATION_CONFIRMATION_PATTERNS,
+    _APPLICATION_STATUS_PATTERNS,
+    JOB_KEYWORDS,
+    JOB_POSTING_PATTERNS,
+)
+
+DEFAULT_BODY_TOKENS = 350
+# What the adapters sent before condensation; still used when the budget is 0.
+LEGACY_BODY_CHARS = 2000
+CHARS_PER_TOKEN = 4
+GAP = " … "
+# Longer runs (rendered tables, text without punctuation) are cut into pieces
+# so one of them cannot take the whole budget.
+_MAX_SENTENCE_CHARS = 400
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+
+
+def _within_sentence(pattern: str) -> re.Pattern:
+    # Sentences are scored joined by newlines, so ".*" must not run into the next one.
+    return re.compile(pattern.replace(".*", "[^\n]*"))
+
+
+# Scoring patterns run on lowercased text: IGNORECASE alternations are several
+# times slower in `re`. Only _COMPANY_RE looks at case.
+_PATTERN_RES = tuple(
+    _within_sentence(pattern)
+    for pattern in dict.fromkeys(_APPLICATION_CONFIRMATION_PATTERNS + _APPLICATION_STATUS_PATTERNS)
+)
+# Job-alert wording is evidence too: it tells the model the email is not an application.
+_POSTING_RE = _within_sentence("|".join(f"(?:{p})" for p in JOB_POSTING_PATTERNS))
+_STAGE_RE = re.compile(
+    r"\b(interview|offer|assessment|coding challenge|take-home|schedule|unfortunately|"
+    r"not (?:be )?moving forward|other candidates|decided to|next steps|hiring manager)\b",
+)
+_ROLE_RE = re.compile(
+    r"\b(position|role|opening|requisition|engineer|developer|scientist|analyst|"
+    r"manager|designer|intern(?:ship)?|recruit(?:er|ing)|talent)\b",
+)
+# "at Acme", "with Globex", "join Initech": a capitalized name after a preposition.
+_COMPANY_RE = re.compile(r"\b(?:at|with|from|join|joining)\s+[A-Z][\w&.'-]+")
+_KEYWORD_RE = re.compile("|".join(re.escape(k) for k in JOB_KEYWORDS))
+_URL_RE = re.compile(r"http|www\.")
+_BOILERPLATE_RE = re.compile(
+    r"unsubscribe|privacy (?:policy|notice)|terms of (?:use|service)|all rights reserved|©|"
+    r"view (?:this email )?in (?:your )?browser|(?:email|notification) preferences|"
+    r"do not reply|no-?reply|this (?:e-?mail|message) (?:was sent|is intended|may contain)",
+)
+_GREETING_RE = re.compile(
+    r"^(?:hi|hello|hey|dear|greetings|good (?:morning|afternoon|evening))\b", re.IGNORECASE
+)
+_SIGN_OFF_RE = re.compile(
+    r"^(?:best|regards|kind regards|warm regards|sincerely|thanks|thank you|cheers|"
+    r"all the best|respectfully)\b[^.!?]{0,40}$",
+    re.IGNORECASE,
+)
+# Lines after the sign-off kept as the signature (recruiter, team, company).
+_SIGNATURE_LINES = 2
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def prompt_body(body: str | None, token_budget: int = DEFAULT_BODY_TOKENS) -> str:
+    """The body text a classification prompt should carry."""
+    body = body or ""
+    if token_budget <= 0:
+        return body[:LEGACY_BODY_CHARS]
+    return condense_body(body, token_budget)
+
+
+def split_sentences(body: str) -> list[str]:
+    sentences = []
+    for piece in _SENTENCE_END_RE.split(body):
+        piece = " ".join(piece.split())
+        while len(piece) > _MAX_SENTENCE_CHARS:
+            cut = piece.rfind(" ", 0, _MAX_SENTENCE_CHARS)
+            cut = cut if cut > 0 else _MAX_SENTENCE_CHARS
+            sentences.append(piece[:cut])
+            piece = piece[cut:].lstrip()
+        if piece:
+            sentences.append(piece)
+    return sentences
+
+
+def sentence_score(sentence: str) -> float:
+    """Higher for sentences that carry classification evidence; negative for boilerplate."""
+    return score_sentences([sentence])[0]
+
+
+def score_sentences(sentences: list[str]) -> list[float]:
+    """
+    `sentence_score` for every sentence, with one pass of each regex over the
+    newline-joined text instead of one per sentence.
+    """
+    text = "\n".join(sentences)
+    lowered = text.lower()
+    starts = []
+    offset = 0
+    for sentence in sentences:
+        starts.append(offset)
+        offset += len(sentence) + 1
+
+    def hits(regex: re.Pattern) -> list[list[str]]:
+        found: list[list[str]] = [[] for _ in sentences]
+        for match in regex.finditer(text if regex is _COMPANY_RE else lowered):
+            found[bisect_right(starts, match.start()) - 1].append(match.group(0))
+        return found
+
+    scores = [0.0] * len(sentences)
+    for regex in _PATTERN_RES:
+        for i, matched in enumerate(hits(regex)):
+            scores[i] += 4.0 if matched else 0.0
+    weighted = (
+        (_POSTING_RE, lambda m: 3.0 if m else 0.0),
+        (_STAGE_RE, lambda m: 2.0 * len(set(m))),
+        (_ROLE_RE, lambda m: min(len(m), 2)),
+        (_COMPANY_RE, lambda m: 1.5 if m else 0.0),
+        (_KEYWORD_RE, lambda m: min(len(m), 3) * 0.5),
+        (_URL_RE, lambda m: -2.0 if m else 0.0),
+    )
+    for regex, weight in weighted:
+        for i, matched in enumerate(hits(regex)):
+            scores[i] += weight(matched)
+    for i, matched in enumerate(hits(_BOILERPLATE_RE)):
+        if matched:
+            scores[i] = -5.0
+    return scores
+
+
+def condense_body(body: str, token_budget: int = DEFAULT_BODY_TOKENS) -> str:
+    """
+    Keep the greeting, the sign-off with its signature, then the highest-scoring
+    sentences that fit `token_budget`, in original order. Ties go to earlier
+    sentences, and zero-score sentences only fill budget that is left over.
+    """
+    if estimate_tokens(body) <= token_budget:
+        return body
+    sentences = split_sentences(body)
+    budget = token_budget * CHARS_PER_TOKEN
+    scores = score_sentences(sentences)
+
+    pinned = []
+    if sentences and _GREETING_RE.match(sentences[0]):
+        pinned.append(0)
+    pinned.extend(_signature(sentences, scores))
+    ranked = sorted(
+        (i for i in range(len(sentences)) if scores[i] > 0 and i not in pinned),
+        key=lambda i: (-scores[i], i),
+    )
+    filler = [i for i in range(len(sentences)) if scores[i] == 0 and i not in pinned]
+
+    chosen: set[int] = set()
+    used = 0
+    for i in [*pinned, *ranked, *filler]:
+        cost = len(sentences[i]) + len(GAP)
+        if used + cost <= budget:
+            chosen.add(i)
+            used += cost
+    if not chosen:
+        return body[:budget]
+
+    parts = []
+    previous = -1
+    for i in sorted(chosen):
+        if parts:
+            parts.append(" " if i == previous + 1 else GAP)
+        elif i > 0:
+            parts.append(GAP.lstrip())
+        parts.append(sentences[i])
+        previous = i
+    if previous < len(sentences) - 1:
+        parts.append(GAP.rstrip())
+    return "".join(parts)
+
+
+def _signature(sentences: list[str], scores: list[float]) -> list[int]:
+    """The last sign-off line and the signature lines after it, up to boilerplate."""
+    for i in range(len(sentences) - 1, -1, -1):
+        if _SIGN_OFF_RE.match(sentences[i]):
+            kept = [i]
+            for j in range(i + 1, min(i + 1 + _SIGNATURE_LINES, len(sentences))):
+                if scores[j] < 0:
+                    break
+                kept.append(j)
+            return kept
+    return []
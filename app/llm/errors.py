@@ -1,6 +1,64 @@
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+# Statuses worth retrying: timeouts, conflicts, rate limits and server errors.
+_RETRYABLE_STATUSES = {408, 409, 429}
+
+
 class LLMProviderError(RuntimeError):
     """Raised when the upstream LLM provider call fails."""
 
+    def __init__(
+        self,
+        message: str,
+        status_code: int | None = None,
+        retry_after: float | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        # Seconds the provider asked us to wait (Retry-After), when it said.
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        # No status means the request never got an answer (timeout, connection reset).
+        if self.status_code is None:
+            return True
+        return self.status_code in _RETRYABLE_STATUSES or self.status_code >= 500
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.status_code == 429
+
 
 class LLMResponseError(RuntimeError):
     """Raised when provider output cannot be normalized."""
+
+
+def provider_error(message: str, exc: Exception) -> LLMProviderError:
+    """Wrap an SDK exception, keeping its HTTP status and Retry-After hint."""
+    response = getattr(exc, "response", None)
+    status_code = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or {}
+    return LLMProviderError(
+        f"{message} ({type(exc).__name__}: {exc})",
+        status_code=status_code if isinstance(status_code, int) else None,
+        retry_after=_parse_retry_after(headers.get("retry-after")),
+    )
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Retry-After is either delay-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max((when - datetime.now(UTC)).total_seconds(), 0.0)
@@ -1,18 +1,88 @@
+from datetime import timedelta
+
 from app.config import Settings
+from app.llm.ats_templates import ATSTemplateClassifier
 from app.llm.base import LLMClassifier
+from app.llm.cache import CachingClassifier
+from app.llm.errors import LLMProviderError
+from app.llm.near_duplicate import NearDuplicateClassifier
+from app.llm.resilience import ResilientClassifier
+
+
+def build_classifier(
+    settings: Settings,
+    cache_repository=None,
+    email_repository=None,
+) -> LLMClassifier:
+    """
+    Provider adapter behind retries and failover, wrapped in near-duplicate
+    reuse, the classification cache, the pre-classifier gate and then the
+    ATS template extractor when those are configured. `cache_repository`
+    adds the persistent cache layer on top of the in-process one;
+    `email_repository` seeds near-duplicate reuse with stored emails.
+    """
+    classifier = _build_provider(settings, settings.llm_provider, "LLM_PROVIDER")
+    fallback = settings.llm_fallback_provider.strip()
+    if fallback or settings.llm_max_retries > 0 or settings.llm_circuit_failure_threshold > 0:
+        classifier = ResilientClassifier(
+            classifier,
+            fallbacks=(
+                [_build_provider(settings, fallback, "LLM_FALLBACK_PROVIDER")] if fallback else []
+            ),
+            max_retries=settings.llm_max_retries,
+            base_delay=settings.llm_retry_base_delay_seconds,
+            max_delay=settings.llm_retry_max_delay_seconds,
+            failure_threshold=settings.llm_circuit_failure_threshold,
+            reset_timeout=settings.llm_circuit_reset_seconds,
+        )
+    if settings.llm_near_duplicate_max_distance > 0:
+        classifier = NearDuplicateClassifier(
+            classifier,
+            repository=email_repository if settings.llm_near_duplicate_history > 0 else None,
+            max_distance=settings.llm_near_duplicate_max_distance,
+            history=settings.llm_near_duplicate_history,
+        )
+    if settings.llm_cache_max_entries > 0:
+        classifier = CachingClassifier(
+            classifier,
+            repository=cache_repository if settings.llm_cache_ttl_hours > 0 else None,
+            max_entries=settings.llm_cache_max_entries,
+            ttl=timedelta(hours=settings.llm_cache_ttl_hours),
+        )
+    if settings.preclassifier_model_path:
+        try:
+            from app.llm.preclassifier import PreClassifierGate, PreClassifierModel
+        except ModuleNotFoundError as exc:
+            raise LLMProviderError(
+                "NumPy is not installed. Install dependencies from requirements.txt."
+            ) from exc
+        classifier = PreClassifierGate(
+            PreClassifierModel.load(settings.preclassifier_model_path),
+            classifier,
+            auto_accept=settings.preclassifier_auto_accept,
+        )
+    if settings.ats_templates_enabled:
+        # Outermost: a template match is more precise than the pre-classifier.
+        classifier = ATSTemplateClassifier(classifier)
+    return classifier
 
 
-def build_classifier(settings: Settings) -> LLMClassifier:
-    provider = settings.llm_provider.strip().lower()
+def _build_provider(settings: Settings, name: str, setting: str) -> LLMClassifier:
+    provider = name.strip().lower()
+    timeout = settings.llm_request_timeout_seconds or None
     if provider == "groq":
         from app.llm.groq_adapter import GroqAdapter
 
-        return GroqAdapter(api_key=settings.groq_api_key)
+        return GroqAdapter(
+            api_key=settings.groq_api_key,
+            requests_per_minute=settings.groq_requests_per_minute,
+            timeout=timeout,
+            body_token_budget=settings.llm_body_token_budget,
+        )
     if provider == "ollama":
         from app.llm.ollama_adapter import OllamaAdapter
 
-        return OllamaAdapter()
+        return OllamaAdapter(timeout=timeout, body_token_budget=settings.llm_body_token_budget)
     raise ValueError(
-        "Invalid LLM_PROVIDER value: "
-        f"{settings.llm_provider!r}. Expected one of: 'groq', 'ollama'."
+        f"Invalid {setting} value: {name!r}. Expected one of: 'groq', 'ollama'."
     )
@@ -3,50 +3,24 @@ Groq LLM adapter — implemented in Phase 4.
 Requires: GROQ_API_KEY set in environment / .env
 Model: llama-3.1-8b-instant (free tier, 14,400 req/day, 30 req/min)
 """
-from app.llm.base import EmailClassification
-from app.llm.errors import LLMProviderError, LLMResponseError
-from app.llm.normalization import extract_json_object, normalize_classification
+from typing import Any
 
-_PROMPT = """\
-Analyze this email to determine if it's about a job application
-that the recipient has ALREADY SUBMITTED.
+from app.llm.base import ChatAdapter
+from app.llm.condense import DEFAULT_BODY_TOKENS
+from app.llm.errors import LLMProviderError
+from app.llm.rate_limit import TokenBucket
 
-IMPORTANT: Classify as an application ONLY if the email:
-- Confirms receipt of an application the user submitted
-- Provides status updates on an existing application (interview, assessment, offer, rejection)
-- Requests action on an existing application (complete assessment, schedule interview)
-- Is a direct response to an application the user sent
 
-DO NOT classify as an application if the email:
-- Is a job posting or job alert about new openings
-- Promotes new opportunities the user hasn't applied to
-- Is a newsletter about available positions
-- Invites the user to apply to a new position they haven't applied to yet
-- Is marketing or promotional content
-
-Email:
-From: {sender}
-Subject: {subject}
-Body: {body}
-
-Return ONLY valid JSON with no explanation:
-{{
-    "is_application": boolean,
-    "stage": "applied|rejected|interview|offer|assessment|other or null",
-    "company": "string or null",
-    "position": "string or null",
-    "confidence": "high|medium|low"
-}}
-"""
-
-
-class GroqAdapter:
+class GroqAdapter(ChatAdapter):
     provider_name = "groq"
 
     def __init__(
         self,
         api_key: str | None,
         model: str = "llama-3.1-8b-instant",
+        requests_per_minute: float = 30,
+        timeout: float | None = None,
+        body_token_budget: int = DEFAULT_BODY_TOKENS,
     ) -> None:
         try:
             from groq import Groq
@@ -56,24 +30,33 @@ class GroqAdapter:
             ) from exc
         if not api_key:
             raise ValueError("GROQ_API_KEY is required when LLM_PROVIDER='groq'.")
+        super().__init__(model, timeout, body_token_budget)
+        self.api_key = api_key
         self.client = Groq(api_key=api_key)
-        self.model = model
-
-    def classify_email(
-        self, sender: str, subject: str, body: str
-    ) -> EmailClassification | None:
-        prompt = _PROMPT.format(sender=sender, subject=subject, body=body[:2000])
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                temperature=0,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            content = (response.choices[0].message.content or "").strip()
-            return normalize_classification(extract_json_object(content))
-        except LLMResponseError:
-            raise
-        except Exception as exc:  # noqa: BLE001
-            raise LLMProviderError(
-                f"Groq classification failed with model {self.model}."
-            ) from exc
+        if requests_per_minute > 0:
+            self.rate_limiter = TokenBucket(requests_per_minute)
+
+    def _send(self, prompt: str) -> str:
+        response = self.client.chat.completions.create(**self._request(prompt))
+        return (response.choices[0].message.content or "").strip()
+
+    async def _asend(self, prompt: str) -> str:
+        response = await self._get_async_client().chat.completions.create(
+            **self._request(prompt)
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    def _new_async_client(self) -> Any:
+        from groq import AsyncGroq
+
+        return AsyncGroq(api_key=self.api_key)
+
+    def _request(self, prompt: str) -> dict:
+        request = {
+            "model": self.model,
+            "temperature": 0,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if self.timeout:
+            request["timeout"] = self.timeout
+        return request
@@ -0,0 +1,262 @@
+"""
+Near-duplicate reuse of classifications for templated ATS mail.
+
+Greenhouse, Lever and Workday confirmations are one template with the
+company, role and candidate name filled in. Each body gets a 64-bit SimHash
+(app.utils.fingerprint) over word bigrams in which capitalized names and
+numbers are masked, so two fills of one template land a few bits apart. A new email within
+`max_distance` bits of an already-classified email from the same sender
+reuses its decision and stage; company and position are read from the new
+email at the slot where the earlier email had them. When they cannot be,
+the email goes to the LLM as usual.
+
+Lookups split the fingerprint into `max_distance + 1` bands: two
+fingerprints within `max_distance` bits agree on at least one band, so only
+emails sharing a band are compared.
+"""
+import re
+from dataclasses import dataclass, replace
+from email.utils import parseaddr
+
+from app.llm.base import (
+    EmailClassification,
+    EmailInput,
+    LLMClassifier,
+    classify_email_async,
+    classify_emails,
+    classify_emails_async,
+)
+from app.utils.fingerprint import SIMHASH_BITS, from_signed64, hamming_distance, simhash
+
+SOURCE_NEAR_DUPLICATE = "near_duplicate"
+# One sender's template can span stages (received / rejected), so only near-exact fills.
+DEFAULT_MAX_DISTANCE = 4
+# Longest company or position read from a template slot.
+_MAX_FIELD_CHARS = 120
+
+
+def sender_template(sender: str | None) -> str:
+    """Emails are only compared with mail from the same address."""
+    return parseaddr(sender or "")[1].lower() or (sender or "").strip().lower()
+
+
+def band_slices(max_distance: int) -> list[tuple[int, int]]:
+    """(shift, width) of `max_distance + 1` bands covering all 64 bits."""
+    count = max(1, min(max_distance + 1, SIMHASH_BITS))
+    slices = []
+    shift = 0
+    for index in range(count):
+        width = SIMHASH_BITS // count + (1 if index < SIMHASH_BITS % count else 0)
+        slices.append((shift, width))
+        shift += width
+    return slices
+
+
+@dataclass
+class _Entry:
+    fingerprint: int
+    subject: str
+    body: str
+    result: EmailClassification
+
+
+class NearDuplicateIndex:
+    """Classified emails by sender template and fingerprint band."""
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE) -> None:
+        self.max_distance = max_distance
+        self._bands = band_slices(max_distance)
+        self._buckets: dict[tuple[str, int, int], list[_Entry]] = {}
+        self.size = 0
+
+    def add(
+        self,
+        sender: str,
+        subject: str,
+        body: str,
+        result: EmailClassification,
+        fingerprint: int | None = None,
+    ) -> None:
+        fingerprint = simhash(body) if fingerprint is None else fingerprint
+        if fingerprint is None:
+            return
+        entry = _Entry(fingerprint, subject or "", body or "", result)
+        template = sender_template(sender)
+        for key in self._keys(template, fingerprint):
+            self._buckets.setdefault(key, []).append(entry)
+        self.size += 1
+
+    def nearest(self, sender: str, fingerprint: int) -> _Entry | None:
+        """The closest entry within max_distance bits; later entries win ties."""
+        best, best_distance = None, self.max_distance
+        for key in self._keys(sender_template(sender), fingerprint):
+            for entry in self._buckets.get(key, ()):
+                distance = hamming_distance(entry.fingerprint, fingerprint)
+                if distance <= best_distance:
+                    best, best_distance = entry, distance
+        return best
+
+    def _keys(self, template: str, fingerprint: int) -> list[tuple[str, int, int]]:
+        return [
+            (template, index, fingerprint >> shift & ((1 << width) - 1))
+            for index, (shift, width) in enumerate(self._bands)
+        ]
+
+
+def transplant_field(
+    value: str | None, old_subject: str, old_body: str, subject: str, body: str
+) -> str | None:
+    """
+    Read the text at the template slot where `value` sat in the old email:
+    between the (up to) two words before it and the word or punctuation
+    after it. The subject is tried before the body.
+    """
+    if not value:
+        return None
+    for old, new in ((old_subject, subject), (old_body, body)):
+        old = " ".join(old.split())
+        new = " ".join((new or "").split())
+        start = old.lower().find(value.lower())
+        if start < 0:
+            continue
+        before = old[:start].split()[-2:]
+        after = old[start + len(value):].lstrip()
+        if not before and not after:
+            continue
+        pattern = r"\s+".join(re.escape(word) for word in before)
+        pattern += r"\s*(.+?)" if before else r"(.+?)"
+        if after:
+            stop = re.match(r"\w+|\S", after).group(0)
+            pattern += r"\s*" + re.escape(stop)
+        else:
+            pattern += r"\s*$"
+        match = re.search(pattern, new)
+        if match and 0 < len(match.group(1).strip()) <= _MAX_FIELD_CHARS:
+            return match.group(1).strip()
+    return None
+
+
+class NearDuplicateClassifier:
+    """
+    LLMClassifier wrapper that answers near-duplicates of already-classified
+    emails from `index`. Hits come back with `source="near_duplicate"`.
+    `repository` (EmailRepository) seeds the index with up to `history`
+    recently classified emails the first time it is used.
+    """
+
+    def __init__(
+        self,
+        classifier: LLMClassifier,
+        repository=None,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        history: int = 2000,
+    ) -> None:
+        self.classifier = classifier
+        self.repository = repository
+        self.history = history
+        self.index = NearDuplicateIndex(max_distance)
+        self.provider_name = getattr(classifier, "provider_name", "unknown")
+        self.model = getattr(classifier, "model", "")
+        self.prompt_version = getattr(classifier, "prompt_version", "")
+        self.body_token_budget = getattr(classifier, "body_token_budget", 0)
+        self.hits = 0
+        self.misses = 0
+        self._loaded = repository is None
+
+    def classify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        reused = self._reuse(sender, subject, body)
+        if reused is not None:
+            return reused
+        result = self.classifier.classify_email(sender, subject, body)
+        self._remember(sender, subject, body, result)
+        return result
+
+    async def aclassify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        reused = self._reuse(sender, subject, body)
+        if reused is not None:
+            return reused
+        result = await classify_email_async(self.classifier, sender, subject, body)
+        self._remember(sender, subject, body, result)
+        return result
+
+    def classify_emails(self, emails: list[EmailInput]) -> list[EmailClassification | None]:
+        results, todo = self._lookup_batch(emails)
+        if todo:
+            fresh = classify_emails(self.classifier, [emails[i] for i in todo])
+            self._store_batch(emails, results, todo, fresh)
+        return results
+
+    async def aclassify_emails(
+        self, emails: list[EmailInput]
+    ) -> list[EmailClassification | None]:
+        results, todo = self._lookup_batch(emails)
+        if todo:
+            fresh = await classify_emails_async(self.classifier, [emails[i] for i in todo])
+            self._store_batch(emails, results, todo, fresh)
+        return results
+
+    def _lookup_batch(
+        self, emails: list[EmailInput]
+    ) -> tuple[list[EmailClassification | None], list[int]]:
+        results = [self._reuse(*email) for email in emails]
+        return results, [i for i, result in enumerate(results) if result is None]
+
+    def _store_batch(
+        self,
+        emails: list[EmailInput],
+        results: list[EmailClassification | None],
+        todo: list[int],
+        fresh: list[EmailClassification | None],
+    ) -> None:
+        for index, result in zip(todo, fresh):
+            results[index] = result
+            self._remember(*emails[index], result)
+
+    def _reuse(self, sender: str, subject: str, body: str) -> EmailClassification | None:
+        self._load_history()
+        fingerprint = simhash(body)
+        match = None if fingerprint is None else self.index.nearest(sender, fingerprint)
+        if match is None:
+            self.misses += 1
+            return None
+        result = match.result
+        if result.is_application:
+            company = transplant_field(
+                result.company, match.subject, match.body, subject, body
+            )
+            position = transplant_field(
+                result.position, match.subject, match.body, subject, body
+            )
+            # Same template but the names cannot be placed: let the LLM read it.
+            if company is None or (result.position and position is None):
+                self.misses += 1
+                return None
+            result = replace(result, company=company, position=position)
+        self.hits += 1
+        return replace(result, source=SOURCE_NEAR_DUPLICATE)
+
+    def _remember(
+        self, sender: str, subject: str, body: str, result: EmailClassification | None
+    ) -> None:
+        # Only first-hand answers become templates; reused ones would compound drift.
+        if result is not None and result.source is None:
+            self.index.add(sender, subject, body, result)
+
+    def _load_history(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        for sender, subject, body, fingerprint, payload in self.repository.get_fingerprints(
+            self.history
+        ):
+            self.index.add(
+                sender,
+                subject,
+                body,
+                EmailClassification(**payload),
+                fingerprint=from_signed64(fingerprint),
+            )
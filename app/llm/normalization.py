@@ -6,6 +6,7 @@ from app.llm.base import EmailClassification
 from app.llm.errors import LLMResponseError
 
 _JSON_BLOCK_RE = re.compile(r"\{.*\}", re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
 
 
 def extract_json_object(content: str) -> dict[str, Any]:
@@ -41,3 +42,51 @@ def normalize_classification(data: dict[str, Any]) -> EmailClassification:
         stage=stage if stage is None else str(stage),
         confidence=confidence,
     )
+
+
+def extract_json_array(content: str) -> list[Any]:
+    match = _JSON_ARRAY_RE.search(content)
+    if not match:
+        raise LLMResponseError("No JSON array found in provider response.")
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError as exc:
+        raise LLMResponseError(f"Invalid JSON in provider response: {exc}") from exc
+    if not isinstance(data, list):
+        raise LLMResponseError("Provider response JSON is not an array.")
+    return data
+
+
+def normalize_classifications(
+    data: list[Any], count: int
+) -> list[EmailClassification | None]:
+    """
+    One entry per email in a batch of `count`, matched on the 1-based "index"
+    field, or by position when no item carries one. Emails with no usable
+    item (missing, duplicated or not an object) come back as None so the
+    caller can retry them individually.
+    """
+    results: list[EmailClassification | None] = [None] * count
+    items = [item for item in data if isinstance(item, dict)]
+    if not any("index" in item for item in items):
+        if len(data) != count:
+            return results
+        return [
+            normalize_classification(item) if isinstance(item, dict) else None for item in data
+        ]
+
+    seen: set[int] = set()
+    for item in items:
+        try:
+            index = int(item.get("index")) - 1
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= index < count:
+            continue
+        if index in seen:
+            # Conflicting answers for one email: trust neither.
+            results[index] = None
+            continue
+        seen.add(index)
+        results[index] = normalize_classification(item)
+    return results
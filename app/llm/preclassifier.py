@@ -0,0 +1,438 @@
+"""
+Learned pre-classifier that answers the easy emails before the LLM sees them.
+
+A logistic regression over hashed sender-domain, subject and body tokens,
+trained from the stored `email_analyses` labels. Emails scoring at or below
+`reject_below` are auto-rejected; with auto-accept enabled, emails at or above
+`accept_above` are auto-accepted. Both thresholds are picked on a held-out
+calibration split so the auto-decisions reach a target precision, and the
+reported precision comes from a separate test split neither the weights nor
+the thresholds have seen. Everything in between goes to the LLM.
+
+    python -m app.llm.preclassifier train --model models/preclassifier.npz [--precision 0.98]
+    python -m app.llm.preclassifier evaluate --model models/preclassifier.npz [--precision 0.98]
+"""
+import argparse
+import re
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.llm.base import (
+    EmailClassification,
+    EmailInput,
+    LLMClassifier,
+    classify_email_async,
+    classify_emails,
+    classify_emails_async,
+)
+
+DEFAULT_FEATURES = 2**18
+# Leading characters of the body that are tokenized. Prompts condense the whole
+# body instead (app.llm.condense); a plain prefix keeps scoring cheap and stable.
+_BODY_CHARS = 2000
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'+#.-]*[a-z0-9+#]|[a-z0-9]")
+_SENDER_DOMAIN_RE = re.compile(r"@([a-z0-9.-]+)")
+
+SOURCE_REJECT = "model_reject"
+SOURCE_ACCEPT = "model_accept"
+
+
+def email_tokens(sender: str | None, subject: str | None, body: str | None) -> list[str]:
+    """Namespaced tokens: sender domain, subject words and bigrams, body words."""
+    tokens = []
+    match = _SENDER_DOMAIN_RE.search((sender or "").lower())
+    if match:
+        tokens.append("d:" + match.group(1).strip("."))
+    subject_words = _TOKEN_RE.findall((subject or "").lower())
+    tokens.extend("s:" + word for word in subject_words)
+    tokens.extend(f"s:{a} {b}" for a, b in zip(subject_words, subject_words[1:]))
+    tokens.extend("b:" + word for word in _TOKEN_RE.findall((body or "")[:_BODY_CHARS].lower()))
+    return tokens
+
+
+def email_features(
+    sender: str | None, subject: str | None, body: str | None, n_features: int
+) -> np.ndarray:
+    """Sorted, de-duplicated hash buckets for one email (binary bag of tokens)."""
+    buckets = [
+        zlib.crc32(token.encode()) % n_features for token in email_tokens(sender, subject, body)
+    ]
+    return np.unique(np.array(buckets, dtype=np.int64))
+
+
+@dataclass
+class _SparseRows:
+    """Rows of L2-normalized binary features in coordinate form."""
+
+    rows: np.ndarray
+    columns: np.ndarray
+    values: np.ndarray
+    count: int
+
+    @classmethod
+    def build(
+        cls, emails: list[tuple[str | None, str | None, str | None]], n_features: int
+    ) -> "_SparseRows":
+        rows, columns, values = [], [], []
+        for index, (sender, subject, body) in enumerate(emails):
+            buckets = email_features(sender, subject, body, n_features)
+            if not len(buckets):
+                continue
+            rows.append(np.full(len(buckets), index, dtype=np.int64))
+            columns.append(buckets)
+            values.append(np.full(len(buckets), 1.0 / np.sqrt(len(buckets))))
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(empty, empty, np.zeros(0), len(emails))
+        return cls(
+            np.concatenate(rows), np.concatenate(columns), np.concatenate(values), len(emails)
+        )
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        return np.bincount(
+            self.rows, weights=weights[self.columns] * self.values, minlength=self.count
+        )
+
+    def transpose_dot(self, per_row: np.ndarray, n_features: int) -> np.ndarray:
+        return np.bincount(
+            self.columns, weights=per_row[self.rows] * self.values, minlength=n_features
+        )
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35.0, 35.0)))
+
+
+@dataclass
+class PreClassifierModel:
+    weights: np.ndarray
+    bias: float
+    # Scores are probabilities; the infinite defaults never auto-decide.
+    reject_below: float = float("-inf")
+    accept_above: float = float("inf")
+    target_precision: float = 0.0
+
+    @property
+    def n_features(self) -> int:
+        return len(self.weights)
+
+    def score(self, sender: str | None, subject: str | None, body: str | None) -> float:
+        buckets = email_features(sender, subject, body, self.n_features)
+        z = self.bias
+        if len(buckets):
+            z += float(self.weights[buckets].sum() / np.sqrt(len(buckets)))
+        return float(_sigmoid(np.array(z)))
+
+    def score_many(self, emails: list[tuple[str | None, str | None, str | None]]) -> np.ndarray:
+        return _sigmoid(_SparseRows.build(emails, self.n_features).dot(self.weights) + self.bias)
+
+    def save(self, path: str | Path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as handle:
+            np.savez_compressed(
+                handle,
+                weights=self.weights.astype(np.float32),
+                meta=np.array(
+                    [self.bias, self.reject_below, self.accept_above, self.target_precision]
+                ),
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "PreClassifierModel":
+        with np.load(path) as data:
+            bias, reject_below, accept_above, target_precision = data["meta"].tolist()
+            return cls(
+                weights=data["weights"].astype(np.float64),
+                bias=bias,
+                reject_below=reject_below,
+                accept_above=accept_above,
+                target_precision=target_precision,
+            )
+
+
+def fit(
+    emails: list[tuple[str | None, str | None, str | None]],
+    labels: list[bool],
+    n_features: int = DEFAULT_FEATURES,
+    l2: float = 1e-4,
+    epochs: int = 300,
+    learning_rate: float = 0.5,
+) -> PreClassifierModel:
+    """Full-batch gradient descent (with momentum) on the L2-regularized log loss."""
+    y = np.asarray(labels, dtype=np.float64)
+    if len(np.unique(y)) < 2:
+        raise ValueError("Training data needs both application and non-application emails.")
+    features = _SparseRows.build(emails, n_features)
+    weights = np.zeros(n_features)
+    velocity = np.zeros(n_features)
+    bias = float(np.log(y.mean() / (1.0 - y.mean())))
+    bias_velocity = 0.0
+    for _ in range(epochs):
+        error = _sigmoid(features.dot(weights) + bias) - y
+        gradient = features.transpose_dot(error, n_features) / len(y) + l2 * weights
+        velocity = 0.9 * velocity - learning_rate * gradient
+        weights += velocity
+        bias_velocity = 0.9 * bias_velocity - learning_rate * float(error.mean())
+        bias += bias_velocity
+    return PreClassifierModel(weights=weights, bias=bias)
+
+
+def choose_thresholds(
+    scores: np.ndarray, labels: np.ndarray, precision: float
+) -> tuple[float, float]:
+    """
+    Widest (reject_below, accept_above) whose auto-decisions on these scores
+    are at least `precision` correct. A side that cannot reach the target is
+    disabled (-inf / inf).
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.float64)
+    if not len(scores):
+        return float("-inf"), float("inf")
+    order = np.argsort(scores, kind="stable")
+    ordered, y = scores[order], labels[order]
+    # A cut between equal scores is not a threshold anyone can apply.
+    distinct_after = np.append(ordered[:-1] < ordered[1:], True)
+    distinct_before = np.insert(ordered[1:] > ordered[:-1], 0, True)
+
+    # Rejecting the k lowest scores: precision is the share of negatives.
+    counts = np.arange(1, len(y) + 1)
+    reject_ok = distinct_after & (np.cumsum(1.0 - y) / counts >= precision)
+    reject_below = float(ordered[reject_ok.nonzero()[0][-1]]) if reject_ok.any() else float("-inf")
+
+    # Accepting everything from index i up: precision is the share of positives.
+    accept_precision = np.cumsum(y[::-1])[::-1] / counts[::-1]
+    accept_ok = distinct_before & (accept_precision >= precision) & (ordered > reject_below)
+    accept_above = float(ordered[accept_ok.nonzero()[0][0]]) if accept_ok.any() else float("inf")
+    return reject_below, accept_above
+
+
+@dataclass
+class PreClassifierReport:
+    total: int
+    rejected: int
+    rejected_correct: int
+    accepted: int
+    accepted_correct: int
+
+    @staticmethod
+    def _precision(correct: int, decided: int) -> float | None:
+        return correct / decided if decided else None
+
+    @property
+    def reject_precision(self) -> float | None:
+        return self._precision(self.rejected_correct, self.rejected)
+
+    @property
+    def accept_precision(self) -> float | None:
+        return self._precision(self.accepted_correct, self.accepted)
+
+    def llm_calls_saved(self, auto_accept: bool = False) -> int:
+        return self.rejected + (self.accepted if auto_accept else 0)
+
+    def format(self) -> str:
+        def pct(value: float | None) -> str:
+            return "n/a" if value is None else f"{value:.1%}"
+
+        total = self.total or 1
+        return "\n".join([
+            f"Emails evaluated: {self.total}",
+            f"Auto-reject:      {self.rejected} ({self.rejected / total:.1%}), "
+            f"precision {pct(self.reject_precision)}",
+            f"Auto-accept:      {self.accepted} ({self.accepted / total:.1%}), "
+            f"precision {pct(self.accept_precision)}",
+            f"LLM calls saved:  {self.llm_calls_saved()} reject-only, "
+            f"{self.llm_calls_saved(auto_accept=True)} with auto-accept",
+        ])
+
+
+def evaluate(
+    model: PreClassifierModel, scores: np.ndarray, labels: list[bool]
+) -> PreClassifierReport:
+    scores = np.asarray(scores)
+    y = np.asarray(labels, dtype=bool)
+    rejected = scores <= model.reject_below
+    accepted = scores >= model.accept_above
+    return PreClassifierReport(
+        total=len(y),
+        rejected=int(rejected.sum()),
+        rejected_correct=int((rejected & ~y).sum()),
+        accepted=int(accepted.sum()),
+        accepted_correct=int((accepted & y).sum()),
+    )
+
+
+class PreClassifierGate:
+    """
+    LLMClassifier that auto-decides the emails the model is confident about
+    and forwards the rest to the wrapped classifier.
+    """
+
+    def __init__(
+        self, model: PreClassifierModel, classifier: LLMClassifier, auto_accept: bool = False
+    ) -> None:
+        self.model = model
+        self.classifier = classifier
+        self.auto_accept = auto_accept
+        self.provider_name = getattr(classifier, "provider_name", "unknown")
+
+    def classify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        decision = self._decide(sender, subject, body)
+        if decision is not None:
+            return decision
+        return self.classifier.classify_email(sender, subject, body)
+
+    async def aclassify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        decision = self._decide(sender, subject, body)
+        if decision is not None:
+            return decision
+        return await classify_email_async(self.classifier, sender, subject, body)
+
+    def classify_emails(self, emails: list[EmailInput]) -> list[EmailClassification | None]:
+        results = [self._decide(*email) for email in emails]
+        forward = [index for index, result in enumerate(results) if result is None]
+        if forward:
+            fresh = classify_emails(self.classifier, [emails[i] for i in forward])
+            for index, result in zip(forward, fresh):
+                results[index] = result
+        return results
+
+    async def aclassify_emails(
+        self, emails: list[EmailInput]
+    ) -> list[EmailClassification | None]:
+        results = [self._decide(*email) for email in emails]
+        forward = [index for index, result in enumerate(results) if result is None]
+        if forward:
+            fresh = await classify_emails_async(self.classifier, [emails[i] for i in forward])
+            for index, result in zip(forward, fresh):
+                results[index] = result
+        return results
+
+    def _decide(self, sender: str, subject: str, body: str) -> EmailClassification | None:
+        score = self.model.score(sender, subject, body)
+        if score <= self.model.reject_below:
+            return EmailClassification(
+                is_application=False, confidence="high", source=SOURCE_REJECT
+            )
+        if self.auto_accept and score >= self.model.accept_above:
+            # No company/position is extracted, so accepted emails land in review.
+            return EmailClassification(
+                is_application=True, confidence="low", source=SOURCE_ACCEPT
+            )
+        return None
+
+
+SPLIT_TRAIN = "train"
+SPLIT_CALIBRATION = "calibration"
+SPLIT_TEST = "test"
+
+
+def data_split(email_id: int) -> str:
+    """
+    Stable split keyed on the email id: ~60% train (weights), ~20% calibration
+    (thresholds) and ~20% test (the reported numbers).
+    """
+    bucket = zlib.crc32(str(email_id).encode()) % 5
+    if bucket == 0:
+        return SPLIT_TEST
+    return SPLIT_CALIBRATION if bucket == 1 else SPLIT_TRAIN
+
+
+def load_labeled_emails(
+    session: Session, include_low_confidence: bool = False
+) -> tuple[list[int], list[EmailInput], list[bool]]:
+    """
+    (email ids, (sender, subject, body) tuples, labels) from stored analyses:
+    applications and the rejected emails the worker stores with them. The
+    model's own auto-decisions are left out so it never trains on itself, and
+    so are quick-filter rejects: the gate only sees emails that passed it.
+    """
+    from app.db.repositories.analysis_repo import AnalysisRepository
+    from app.email_client.quick_filter import SOURCE_QUICK_FILTER
+
+    ids, emails, labels = [], [], []
+    for email, analysis in AnalysisRepository(session).get_labeled_emails():
+        if analysis.model_used in (SOURCE_REJECT, SOURCE_ACCEPT, SOURCE_QUICK_FILTER):
+            continue
+        low_confidence = analysis.needs_review or analysis.confidence not in ("high", "medium")
+        if low_confidence and not include_low_confidence:
+            continue
+        ids.append(email.id)
+        emails.append((email.sender, email.subject, email.body))
+        labels.append(bool(analysis.is_application))
+    return ids, emails, labels
+
+
+def _split(
+    ids: list[int], emails: list[EmailInput], labels: list[bool], split: str
+) -> tuple[list[EmailInput], list[bool]]:
+    keep = [i for i, email_id in enumerate(ids) if data_split(email_id) == split]
+    return [emails[i] for i in keep], [labels[i] for i in keep]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=("train", "evaluate"))
+    parser.add_argument("--model", required=True, help="Path of the .npz model file")
+    parser.add_argument(
+        "--precision",
+        type=float,
+        default=None,
+        help="Target auto-decision precision (train default 0.98; evaluate re-tunes "
+        "the thresholds on the calibration split)",
+    )
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES)
+    parser.add_argument("--include-low-confidence", action="store_true")
+    parser.add_argument(
+        "--save", action="store_true", help="evaluate: store re-tuned thresholds in the model"
+    )
+    args = parser.parse_args()
+
+    from app.db.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        ids, emails, labels = load_labeled_emails(session, args.include_low_confidence)
+    finally:
+        session.close()
+    calibration_emails, calibration_labels = _split(ids, emails, labels, SPLIT_CALIBRATION)
+    test_emails, test_labels = _split(ids, emails, labels, SPLIT_TEST)
+    print(
+        f"Labeled emails: {len(emails)} ({sum(labels)} applications), "
+        f"calibration {len(calibration_emails)}, test {len(test_emails)}"
+    )
+
+    if args.command == "train":
+        train_emails, train_labels = _split(ids, emails, labels, SPLIT_TRAIN)
+        model = fit(train_emails, train_labels, n_features=args.features)
+        precision = 0.98 if args.precision is None else args.precision
+    else:
+        model = PreClassifierModel.load(args.model)
+        precision = args.precision
+
+    if precision is not None:
+        model.reject_below, model.accept_above = choose_thresholds(
+            model.score_many(calibration_emails), np.array(calibration_labels), precision
+        )
+        model.target_precision = precision
+    print(
+        f"Thresholds: reject <= {model.reject_below:.4f}, accept >= {model.accept_above:.4f} "
+        f"(target precision {model.target_precision:.1%}, tuned on the calibration split)"
+    )
+    print("Test split:")
+    print(evaluate(model, model.score_many(test_emails), test_labels).format())
+    if args.command == "train" or args.save:
+        model.save(args.model)
+        print(f"Model saved to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
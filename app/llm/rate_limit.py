@@ -0,0 +1,52 @@
+"""
+Token-bucket rate limiter shared by the sync and async adapter paths.
+
+Tokens refill continuously at `rate_per_minute`; a caller that finds the bucket
+empty reserves the next token anyway (the balance goes negative) and sleeps
+until it is due, so concurrent callers queue up in arrival order without a
+lock held across the wait.
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst: int = 1) -> None:
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive.")
+        # A burst of 1 spaces requests evenly, so no 60-second window can exceed
+        # the provider's per-minute limit.
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how many seconds until it is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for `seconds`, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # The next reservation then comes due `seconds` from now.
+            self._tokens = min(self._tokens, 1.0 - seconds * self.rate)
+
+    def acquire(self) -> None:
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
@@ -0,0 +1,242 @@
+"""
+Retries, circuit breaking and provider failover around LLMClassifiers.
+
+Each call tries the primary provider first, retrying retryable failures with
+jittered exponential backoff (or the provider's Retry-After), then each
+fallback in order. A provider whose breaker is open is skipped until its
+reset timeout passes; one trial call then decides whether it closes again.
+Rate limits (429) never open a breaker: they pause the provider's token
+bucket so concurrent callers slow down together instead of failing.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from typing import TypeVar
+
+from app.llm.base import (
+    EmailClassification,
+    EmailInput,
+    LLMClassifier,
+    classify_email_async,
+    classify_emails,
+    classify_emails_async,
+)
+from app.llm.errors import LLMProviderError
+
+T = TypeVar("T")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures (0 never opens) and
+    lets a single trial call through once `reset_timeout` seconds have passed.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return STATE_CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return STATE_HALF_OPEN
+        return STATE_OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == STATE_CLOSED:
+                return True
+            if state == STATE_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            # A failed trial re-opens the breaker for another full reset_timeout.
+            if self._opened_at is not None or (
+                self.failure_threshold > 0 and self.failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """End a trial call that neither succeeded nor failed (e.g. rate limited)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class ResilientClassifier:
+    """
+    LLMClassifier wrapper with retries, a circuit breaker per provider and
+    failover to `fallbacks`. `classifier` stays the provider the cache key
+    and the daily quota are based on.
+    """
+
+    def __init__(
+        self,
+        classifier: LLMClassifier,
+        fallbacks: list[LLMClassifier] | None = None,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+    ) -> None:
+        self.classifier = classifier
+        self.fallbacks = list(fallbacks or [])
+        self.provider_name = getattr(classifier, "provider_name", "unknown")
+        self.model = getattr(classifier, "model", "")
+        self.prompt_version = getattr(classifier, "prompt_version", "")
+        self.body_token_budget = getattr(classifier, "body_token_budget", 0)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        # Longest wait worth sitting out; a longer Retry-After fails over instead.
+        self.max_delay = max_delay
+        self.breakers = [
+            CircuitBreaker(failure_threshold, reset_timeout) for _ in self.providers
+        ]
+        self.retries = 0
+        self.failovers = 0
+
+    @property
+    def providers(self) -> list[LLMClassifier]:
+        return [self.classifier, *self.fallbacks]
+
+    def classify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        return self._call(lambda provider: provider.classify_email(sender, subject, body))
+
+    async def aclassify_email(
+        self, sender: str, subject: str, body: str
+    ) -> EmailClassification | None:
+        return await self._acall(
+            lambda provider: classify_email_async(provider, sender, subject, body)
+        )
+
+    def classify_emails(self, emails: list[EmailInput]) -> list[EmailClassification | None]:
+        return self._call(lambda provider: classify_emails(provider, emails))
+
+    async def aclassify_emails(
+        self, emails: list[EmailInput]
+    ) -> list[EmailClassification | None]:
+        return await self._acall(lambda provider: classify_emails_async(provider, emails))
+
+    def _call(self, request: Callable[[LLMClassifier], T]) -> T:
+        last_error = None
+        for provider, breaker in self._available():
+            attempt = 0
+            while True:
+                try:
+                    result = request(provider)
+                except LLMProviderError as exc:
+                    last_error = exc
+                    delay = self._retry_delay(provider, breaker, exc, attempt)
+                    if delay is None:
+                        break
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                except BaseException:
+                    # Unusable output is not the provider's health; don't hold a trial slot.
+                    breaker.release()
+                    raise
+                breaker.record_success()
+                return result
+        raise self._exhausted(last_error)
+
+    async def _acall(self, request: Callable[[LLMClassifier], Awaitable[T]]) -> T:
+        last_error = None
+        for provider, breaker in self._available():
+            attempt = 0
+            while True:
+                try:
+                    result = await request(provider)
+                except LLMProviderError as exc:
+                    last_error = exc
+                    delay = self._retry_delay(provider, breaker, exc, attempt)
+                    if delay is None:
+                        break
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                except BaseException:
+                    # Unusable output is not the provider's health; don't hold a trial slot.
+                    breaker.release()
+                    raise
+                breaker.record_success()
+                return result
+        raise self._exhausted(last_error)
+
+    def _available(self) -> Iterator[tuple[LLMClassifier, CircuitBreaker]]:
+        """Providers in failover order whose breaker lets a call through."""
+        previous = None
+        for provider, breaker in zip(self.providers, self.breakers):
+            if not breaker.allow():
+                continue
+            if previous is not None:
+                self.failovers += 1
+                print(
+                    f"LLM failover from={getattr(previous, 'provider_name', 'unknown')} "
+                    f"to={getattr(provider, 'provider_name', 'unknown')}"
+                )
+            previous = provider
+            yield provider, breaker
+
+    def _retry_delay(
+        self,
+        provider: LLMClassifier,
+        breaker: CircuitBreaker,
+        exc: LLMProviderError,
+        attempt: int,
+    ) -> float | None:
+        """Seconds to wait before retrying `provider`, or None to move on."""
+        if exc.rate_limited:
+            breaker.release()
+        else:
+            breaker.record_failure()
+        if not exc.retryable or attempt >= self.max_retries or breaker.state == STATE_OPEN:
+            return None
+        if exc.retry_after is not None:
+            delay = exc.retry_after
+        else:
+            # Full jitter, so concurrent callers that failed together retry apart.
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if delay > self.max_delay:
+            return None
+        limiter = getattr(provider, "rate_limiter", None)
+        if exc.rate_limited and limiter is not None:
+            limiter.pause(delay)
+        self.retries += 1
+        print(
+            f"LLM retry provider={getattr(provider, 'provider_name', 'unknown')} "
+            f"attempt={attempt + 1} status={exc.status_code} delay_s={delay:.2f}"
+        )
+        return delay
+
+    def _exhausted(self, last_error: LLMProviderError | None) -> LLMProviderError:
+        if last_error is not None:
+            return last_error
+        names = ", ".join(getattr(p, "provider_name", "unknown") for p in self.providers)
+        return LLMProviderError(f"No LLM provider available: circuit open for {names}.")
@@ -0,0 +1,126 @@
+"""
+Sender domain -> Company, learned from linked applications.
+
+Corporate senders (talent@acme.com) name their company in the address, so
+once one of their emails has been linked to an Application the domain is
+stored on Company.domain. The worker loads every known domain into a
+CompanyDomainIndex once per run; later mail from that domain takes its
+company from the index instead of the LLM's free-text answer and skips the
+per-email company lookup when persisted. ATS, job board and personal mail
+domains never map to one company and are not learned.
+"""
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from app.email_client.quick_filter import extract_domain, is_job_board_domain
+
+# Applicant tracking systems that send on behalf of many employers, beyond the
+# job board list in quick_filter (which already covers Greenhouse, Lever, Workday).
+ATS_SENDER_DOMAINS = frozenset({
+    "ashbyhq.com", "bamboohr.com", "breezy.hr", "icims.com", "jazzhr.com",
+    "recruitee.com", "smartrecruiters.com", "successfactors.com", "taleo.net",
+    "applytojob.com", "workable.com", "workablemail.com", "teamtailor.com",
+})
+PERSONAL_MAIL_DOMAINS = frozenset({
+    "gmail.com", "googlemail.com", "yahoo.com", "outlook.com", "hotmail.com", "live.com",
+    "icloud.com", "me.com", "aol.com", "proton.me", "protonmail.com", "gmx.com",
+})
+# Second-level labels under a country TLD that are not the company (acme.co.uk).
+_GENERIC_SECOND_LEVEL = frozenset({"co", "com", "org", "net", "ac", "gov"})
+_LEGAL_SUFFIXES = frozenset({
+    "inc", "llc", "ltd", "corp", "corporation", "co", "company", "gmbh", "plc", "the", "group",
+})
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def base_domain(domain: str) -> str:
+    """acme.com for talent.acme.com, acme.co.uk for jobs.acme.co.uk."""
+    labels = domain.lower().strip(".").split(".")
+    keep = 3 if len(labels) > 2 and labels[-2] in _GENERIC_SECOND_LEVEL else 2
+    return ".".join(labels[-keep:])
+
+
+def is_corporate_domain(domain: str | None) -> bool:
+    if not domain:
+        return False
+    base = base_domain(domain)
+    return (
+        base not in ATS_SENDER_DOMAINS
+        and base not in PERSONAL_MAIL_DOMAINS
+        and not is_job_board_domain(domain)
+    )
+
+
+def name_matches_domain(name: str, domain: str) -> bool:
+    """
+    True if the domain label spells the company name: the whole name (Blue
+    Origin -> blueorigin.com), optionally with a legal suffix (acmecorp.io),
+    its first word (acme.com for Acme Labs) or, for names of three or more
+    words, its acronym (ibm.com). Only whole words count, so an agency such
+    as globalrecruiters.com is never learned for Global Payments, the client
+    company it writes about; two-letter acronyms (gp.com) collide too often.
+    """
+    words = [w for w in _WORD_RE.findall(name.lower()) if w not in _LEGAL_SUFFIXES]
+    if not words:
+        return False
+    label = base_domain(domain).split(".")[0].replace("-", "")
+    joined = "".join(words)
+    spellings = {joined} | {joined + suffix for suffix in _LEGAL_SUFFIXES}
+    if len(words[0]) >= 3:
+        spellings.add(words[0])
+    if len(words) >= 3:
+        spellings.add("".join(word[0] for word in words))
+    return label in spellings
+
+
+@dataclass(frozen=True)
+class CompanyEntry:
+    company_id: int
+    name: str
+
+
+class CompanyDomainIndex:
+    """Base sender domain -> company, resolved with dict lookups only."""
+
+    def __init__(self, entries: dict[str, CompanyEntry] | None = None) -> None:
+        self._entries = dict(entries or {})
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[str, int, str]]) -> "CompanyDomainIndex":
+        """From CompanyRepository.get_domains() rows: (domain, company_id, name)."""
+        index = cls()
+        for domain, company_id, name in rows:
+            if domain and domain.strip():
+                index._entries[base_domain(domain.strip())] = CompanyEntry(company_id, name)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, sender: str | None) -> CompanyEntry | None:
+        domain = extract_domain(sender or "")
+        if not is_corporate_domain(domain):
+            return None
+        return self._entries.get(base_domain(domain))
+
+    def learnable_domain(self, sender: str | None, name: str) -> str | None:
+        """
+        The base domain of `sender` if it is corporate, not yet claimed and
+        fits the company name; None otherwise.
+        """
+        domain = extract_domain(sender or "")
+        if not is_corporate_domain(domain) or not name_matches_domain(name, domain):
+            return None
+        base = base_domain(domain)
+        return None if base in self._entries else base
+
+    def add(self, domain: str, company_id: int, name: str) -> None:
+        self._entries[base_domain(domain)] = CompanyEntry(company_id, name)
+
+    def learn(self, sender: str | None, company_id: int, name: str) -> str | None:
+        """`learnable_domain` and `add` in one step; returns the domain learned."""
+        domain = self.learnable_domain(sender, name)
+        if domain:
+            self.add(domain, company_id, name)
+        return domain
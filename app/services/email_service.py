@@ -1,9 +1,53 @@
-from datetime import datetime
+import asyncio
+import heapq
+from collections.abc import Callable, Iterable, Iterator
+from datetime import UTC, datetime, timedelta
 from time import perf_counter
+from typing import TYPE_CHECKING
 
-from app.email_client.client import fetch_recent_emails
-from app.email_client.quick_filter import quick_filter
-from app.llm.base import EmailClassification, LLMClassifier
+from app.email_client.client import FetchOptions, SyncCheckpoint, iter_emails
+from app.email_client.quick_filter import (
+    REASON_CONFIRMATION,
+    SOURCE_QUICK_FILTER,
+    QuickFilterStats,
+    match_rules,
+    quick_filter_reason,
+)
+from app.llm.base import (
+    EmailClassification,
+    EmailInput,
+    LLMClassifier,
+    classify_email_async,
+    classify_emails,
+    classify_emails_async,
+    request_count,
+)
+from app.services.company_domains import CompanyDomainIndex
+from app.services.threads import (
+    ThreadIndex,
+    ThreadLink,
+    header_value,
+    may_change_stage,
+    parse_message_ids,
+    thread_root,
+)
+
+if TYPE_CHECKING:
+    # Imported for annotations only: the quota pulls in the DB models, which need settings.
+    from app.services.quota import LLMQuota
+
+# (message_ids, uids) -> the (message_ids, uids) among them that are already stored
+KnownEmails = Callable[[list[str | None], list[str]], tuple[set[str], set[str]]]
+# Stores a block of emails the LLM classified as non-applications
+StoreRejected = Callable[[list["EmailData"]], None]
+
+# Priority weights: a sender tied to an open application outranks any mix of
+# pattern hits and recency; one pattern hit is worth as much as arriving just now.
+_PRIORITY_OPEN_APPLICATION = 5.0
+_PRIORITY_PER_PATTERN = 1.0
+_PRIORITY_MAX_PATTERNS = 3
+_PRIORITY_RECENCY = 1.0
+_RECENCY_HALF_LIFE = timedelta(days=3)
 
 
 class EmailData:
@@ -17,6 +61,9 @@ class EmailData:
         subject: str,
         date: datetime | None,
         body: str,
+        in_reply_to: list[str] | None = None,
+        references: list[str] | None = None,
+        thread_id: str | None = None,
     ) -> None:
         self.message_id = message_id
         self.uid = uid
@@ -24,6 +71,18 @@ class EmailData:
         self.subject = subject
         self.date = date
         self.body = body
+        # Parent Message-IDs from In-Reply-To / References, and the thread they resolve to
+        self.in_reply_to = list(in_reply_to or [])
+        self.references = list(references or [])
+        self.thread_id = thread_id or thread_root(message_id, self.in_reply_to, self.references)
+        # Set when the thread is already linked to a stored Application
+        self.application_id: int | None = None
+        # Set when the sender's domain is already mapped to a stored Company
+        self.company_id: int | None = None
+        # In a thread linked to an application, so it skips the quick filter
+        self.thread_linked = False
+        # Answered from its thread's application without the LLM
+        self.thread_followup = False
 
         # Populated after classify()
         self.is_application: bool | None = None
@@ -31,20 +90,85 @@ class EmailData:
         self.position: str | None = None
         self.stage: str | None = None
         self.confidence: str | None = None
+        # What answered when it was not the LLM ("quick_filter", "cache_hit", "model_reject", ...)
+        self.source: str | None = None
+        # quick_filter reason code, set once the filter has run
+        self.filter_reason: str | None = None
 
-    def classify(self, classifier: LLMClassifier) -> bool:
+    def classify(
+        self, classifier: LLMClassifier, filter_stats: QuickFilterStats | None = None
+    ) -> bool:
         """Run LLM classification. Returns True if the email is a job application."""
-        provider = getattr(classifier, "provider_name", "unknown")
-        if not quick_filter(self.sender, self.subject, self.body):
-            print("Quick filter: not an application email, skipping LLM")
-            print(f"LLM classify provider={provider} latency_ms=0 outcome=filtered")
-            self.is_application = False
+        if not self._passes_quick_filter(classifier, filter_stats):
             return False
+        return self.classify_candidate(classifier)
+
+    async def aclassify(
+        self, classifier: LLMClassifier, filter_stats: QuickFilterStats | None = None
+    ) -> bool:
+        """`classify` for concurrent fan-out; awaits the classifier's async path."""
+        if not self._passes_quick_filter(classifier, filter_stats):
+            return False
+        return await self.aclassify_candidate(classifier)
+
+    def classify_candidate(self, classifier: LLMClassifier) -> bool:
+        """The LLM half of `classify`, for emails that already passed the quick filter."""
+        start = perf_counter()
+        result = classifier.classify_email(self.sender, self.subject, self.body)
+        return self._apply_classification(classifier, result, start)
+
+    async def aclassify_candidate(self, classifier: LLMClassifier) -> bool:
+        start = perf_counter()
+        result = await classify_email_async(classifier, self.sender, self.subject, self.body)
+        return self._apply_classification(classifier, result, start)
 
+    @staticmethod
+    def classify_batch(emails: list["EmailData"], classifier: LLMClassifier) -> None:
+        """
+        Classify emails that already passed the quick filter with one
+        `classify_emails` request. Each email logs the shared batch latency.
+        """
         start = perf_counter()
-        result: EmailClassification | None = classifier.classify_email(
-            self.sender, self.subject, self.body
+        results = classify_emails(classifier, [email.llm_input() for email in emails])
+        for email, result in zip(emails, results):
+            email._apply_classification(classifier, result, start)
+
+    @staticmethod
+    async def aclassify_batch(emails: list["EmailData"], classifier: LLMClassifier) -> None:
+        start = perf_counter()
+        results = await classify_emails_async(
+            classifier, [email.llm_input() for email in emails]
+        )
+        for email, result in zip(emails, results):
+            email._apply_classification(classifier, result, start)
+
+    def llm_input(self) -> EmailInput:
+        return self.sender, self.subject, self.body
+
+    def _passes_quick_filter(
+        self, classifier: LLMClassifier, filter_stats: QuickFilterStats | None
+    ) -> bool:
+        if self.thread_linked:
+            return True
+        passed, reason = quick_filter_reason(self.sender, self.subject, self.body, filter_stats)
+        self.filter_reason = reason
+        if passed:
+            return True
+        provider = getattr(classifier, "provider_name", "unknown")
+        print(f"Quick filter: not an application email ({reason}), skipping LLM")
+        print(
+            f"LLM classify provider={provider} latency_ms=0 "
+            f"outcome=filtered reason={reason}"
         )
+        self.is_application = False
+        self.confidence = "high"
+        self.source = SOURCE_QUICK_FILTER
+        return False
+
+    def _apply_classification(
+        self, classifier: LLMClassifier, result: EmailClassification | None, start: float
+    ) -> bool:
+        provider = getattr(classifier, "provider_name", "unknown")
         latency_ms = (perf_counter() - start) * 1000
         if result is None:
             print(
@@ -59,9 +183,12 @@ class EmailData:
         self.position = result.position
         self.stage = result.stage
         self.confidence = result.confidence
+        self.source = result.source
+        # Answers that skipped the LLM log where they came from instead of True/False.
+        outcome = result.source or bool(result.is_application)
         print(
             f"LLM classify provider={provider} "
-            f"latency_ms={latency_ms:.2f} outcome={bool(result.is_application)} "
+            f"latency_ms={latency_ms:.2f} outcome={outcome} "
             f"confidence={result.confidence}"
         )
         return bool(result.is_application)
@@ -74,38 +201,529 @@ class EmailData:
         )
 
 
+class ClassificationScheduler:
+    """
+    Ranks quick-filter candidates so the most valuable reach the LLM first
+    when capacity runs out: mail from a domain tied to an open application,
+    strong confirmation/status pattern matches, then recency.
+    """
+
+    def __init__(
+        self,
+        open_domains: Iterable[str] = (),
+        now: Callable[[], datetime] = lambda: datetime.now(UTC),
+    ) -> None:
+        self.open_domains = frozenset(open_domains)
+        self._now = now
+
+    def priority(self, email_data: EmailData, now: datetime | None = None) -> float:
+        hits = match_rules(email_data.sender, email_data.subject, email_data.body)
+        patterns = min(len(hits.confirmation) + len(hits.status), _PRIORITY_MAX_PATTERNS)
+        score = _PRIORITY_PER_PATTERN * patterns
+        if self._is_open_domain(hits.sender_domain):
+            score += _PRIORITY_OPEN_APPLICATION
+        if email_data.date is not None:
+            received = email_data.date
+            if received.tzinfo is None:
+                received = received.replace(tzinfo=UTC)
+            age = max((now or self._now()) - received, timedelta(0))
+            score += _PRIORITY_RECENCY * 0.5 ** (age / _RECENCY_HALF_LIFE)
+        return score
+
+    def order(self, candidates: list[EmailData]) -> list[EmailData]:
+        """`candidates` highest priority first; ties keep their input order."""
+        now = self._now()
+        queue = [
+            (-self.priority(email_data, now), index, email_data)
+            for index, email_data in enumerate(candidates)
+        ]
+        heapq.heapify(queue)
+        return [heapq.heappop(queue)[2] for _ in range(len(queue))]
+
+    def _is_open_domain(self, domain: str | None) -> bool:
+        # mail.acme.example counts for an application tied to acme.example.
+        while domain:
+            if domain in self.open_domains:
+                return True
+            domain = domain.partition(".")[2]
+        return False
+
+
 class EmailProcessor:
     """Fetches emails from IMAP and runs LLM classification on each."""
 
-    def __init__(self, classifier: LLMClassifier) -> None:
+    def __init__(
+        self,
+        classifier: LLMClassifier,
+        fetch_options: FetchOptions | None = None,
+        max_concurrency: int = 1,
+        llm_batch_size: int = 1,
+        quota: "LLMQuota | None" = None,
+        carry_over: list[EmailData] | None = None,
+        scheduler: ClassificationScheduler | None = None,
+        max_llm_requests: int = 0,
+        threads: ThreadIndex | None = None,
+        companies: CompanyDomainIndex | None = None,
+        known_emails: KnownEmails | None = None,
+        store_rejected: StoreRejected | None = None,
+    ) -> None:
         self.classifier = classifier
+        self.fetch_options = fetch_options
+        # LLM calls in flight at once; 1 classifies emails one after another.
+        self.max_concurrency = max_concurrency
+        # Emails packed into one classify_emails prompt; 1 sends one prompt per email.
+        self.llm_batch_size = llm_batch_size
+        # Daily request budget; candidates it cannot cover are deferred, not failed.
+        self.quota = quota
+        self._requests_at_start = request_count(classifier) or 0
+        # Emails deferred by an earlier run, ranked together with new mail.
+        self.carry_over = list(carry_over or [])
+        # Orders candidates for the LLM; without one they go in fetch order.
+        self.scheduler = scheduler
+        # LLM requests this run may make; 0 leaves only the daily quota as a limit.
+        self.max_llm_requests = max_llm_requests
+        self.llm_requests_admitted = 0
+        # Threads already tied to an application; their follow-ups inherit the link.
+        self.threads = threads
+        self.thread_followups = 0
+        # Sender domains already tied to a company; they override the LLM's company.
+        self.companies = companies
+        self.company_domain_hits = 0
+        # Bulk lookup of stored Message-IDs / UIDs; known emails never reach the filter.
+        self.known_emails = known_emails
+        self.duplicates_skipped = 0
+        # Stores LLM non-applications as negative labels, in blocks of up to a batch;
+        # without it they are dropped as soon as they are classified.
+        self.store_rejected = store_rejected
+        self.rejected_emails: list[EmailData] = []
+        # Candidates this run left for the next one.
+        self.deferred: list[EmailData] = []
         self.email_list: list[EmailData] = []
         self.application_emails: list[EmailData] = []
 
-    def fetch_emails(self, limit: int) -> list[EmailData]:
-        raw_emails = fetch_recent_emails(limit)
-        self.email_list = [
-            EmailData(
+        # Running totals, kept so the streaming path does not retain every email.
+        self.fetched_count = 0
+        self.application_count = 0
+        self.high_confidence_count = 0
+        self.needs_review_count = 0
+        # Per-rule quick_filter hits/timings for this run, saved on the WorkerRun.
+        self.filter_stats = QuickFilterStats()
+
+    def iter_emails(
+        self, limit: int, checkpoint: SyncCheckpoint | None = None
+    ) -> Iterator[EmailData]:
+        while self.carry_over:
+            yield self.carry_over.pop(0)
+        fetched = iter_emails(limit, checkpoint=checkpoint, options=self.fetch_options)
+        for raw in self._drop_known(fetched):
+            headers = raw.get("raw_headers")
+            in_reply_to = parse_message_ids(header_value(headers, "In-Reply-To"))
+            references = parse_message_ids(header_value(headers, "References"))
+            yield EmailData(
                 message_id=raw.get("message_id"),
                 uid=raw["uid"],
                 sender=raw["sender"],
                 subject=raw["subject"],
-                body=raw["body"],
-                date=raw["date"],
+                body=raw["body_text"] or "",
+                date=raw["received_date"],
+                in_reply_to=in_reply_to,
+                references=references,
+                thread_id=(
+                    self.threads.resolve(raw.get("message_id"), in_reply_to, references)
+                    if self.threads is not None
+                    else None
+                ),
+            )
+
+    def _drop_known(self, fetched: Iterable[dict]) -> Iterator[dict]:
+        """
+        Count fetched emails and drop those already stored, resolving each IMAP
+        fetch batch with one `known_emails` call. A stored UID only counts for
+        emails without a Message-ID: UIDs are reused after a UIDVALIDITY reset.
+        """
+        block_size = (self.fetch_options or FetchOptions()).batch_size
+        block: list[dict] = []
+        for raw in fetched:
+            self.fetched_count += 1
+            if self.known_emails is None:
+                yield raw
+                continue
+            block.append(raw)
+            if len(block) >= block_size:
+                yield from self._unseen(block)
+                block = []
+        if block:
+            yield from self._unseen(block)
+
+    def _unseen(self, block: list[dict]) -> list[dict]:
+        known_ids, known_uids = self.known_emails(
+            [raw.get("message_id") for raw in block], [raw["uid"] for raw in block]
+        )
+        unseen = [
+            raw
+            for raw in block
+            if not (
+                raw.get("message_id") in known_ids
+                if raw.get("message_id")
+                else raw["uid"] in known_uids
             )
-            for raw in raw_emails
         ]
+        skipped = len(block) - len(unseen)
+        if skipped:
+            self.duplicates_skipped += skipped
+            print(f"Skipped {skipped} already-stored emails before classification")
+        return unseen
+
+    def iter_application_batches(
+        self,
+        limit: int,
+        checkpoint: SyncCheckpoint | None = None,
+        batch_size: int = 50,
+    ) -> Iterator[list[EmailData]]:
+        """
+        Stream fetch -> filter -> classify and yield application emails in batches
+        of up to `batch_size`. Non-application emails are dropped as soon as they
+        are classified (or handed to `store_rejected` every `batch_size`), so
+        memory stays flat regardless of `limit`.
+
+        When LLM capacity is limited and a scheduler is set, every fetched
+        email is quick-filtered first so the run's candidates can be ranked;
+        only the ones the budget can cover are held, and their batches come
+        out in priority order.
+        """
+        if self.scheduler is not None and self._capacity_limited():
+            yield from self._iter_scheduled_batches(limit, checkpoint, batch_size)
+            return
+
+        # With concurrency, LLM batching or a request limit, up to `batch_size` fetched emails
+        # are classified together; results come back in fetch order either way.
+        grouped = (
+            self.max_concurrency > 1 or self.llm_batch_size > 1 or self._capacity_limited()
+        )
+        chunk_size = batch_size if grouped else 1
+        chunk: list[EmailData] = []
+        batch: list[EmailData] = []
+        for email_data in self.iter_emails(limit, checkpoint):
+            chunk.append(email_data)
+            if len(chunk) < chunk_size:
+                continue
+            batch.extend(self._analyze_many(chunk))
+            chunk = []
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+            self._flush_rejected(batch_size)
+        batch.extend(self._analyze_many(chunk))
+        self._flush_rejected()
+        while batch:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+
+    def _iter_scheduled_batches(
+        self, limit: int, checkpoint: SyncCheckpoint | None, batch_size: int
+    ) -> Iterator[list[EmailData]]:
+        """
+        Quick-filter every fetched email but hold only as many candidates as
+        the LLM budget can cover, in a min-heap on priority: a better candidate
+        pushes the worst one out, and that one is deferred right away. The kept
+        candidates are classified best first once the fetch is done. Follow-ups
+        and rejected emails are handed on as they arrive, so memory is bounded
+        by the budget, not the mailbox.
+        """
+        capacity = self._candidate_capacity()
+        kept: list[tuple[float, int, EmailData]] = []
+        followups: list[EmailData] = []
+        for index, email_data in enumerate(self.iter_emails(limit, checkpoint)):
+            if self._follow_thread(email_data):
+                if self._record(email_data, True):
+                    followups.append(email_data)
+                if len(followups) >= batch_size:
+                    yield followups
+                    followups = []
+            elif email_data._passes_quick_filter(self.classifier, self.filter_stats):
+                # Lowest priority on top; among equals the later email goes first.
+                entry = (self.scheduler.priority(email_data), -index, email_data)
+                if len(kept) < capacity:
+                    heapq.heappush(kept, entry)
+                else:
+                    self._defer(heapq.heappushpop(kept, entry)[2])
+            else:
+                self._record(email_data, False)
+            self._flush_rejected(batch_size)
+        if followups:
+            yield followups
+
+        ranked = [entry[2] for entry in sorted(kept, key=lambda entry: (-entry[0], -entry[1]))]
+        for start in range(0, len(ranked), batch_size):
+            admitted = self._classify_candidates(ranked[start : start + batch_size])
+            applications = [
+                email_data
+                for email_data in admitted
+                if self._record(email_data, bool(email_data.is_application))
+            ]
+            if applications:
+                yield applications
+            self._flush_rejected(batch_size)
+        self._flush_rejected()
+
+    def _candidate_capacity(self) -> int:
+        """Emails the run's LLM budget can still cover: the per-run limit and today's quota."""
+        requests = []
+        if self.max_llm_requests > 0:
+            requests.append(self.max_llm_requests - self.llm_requests_admitted)
+        if self.quota is not None:
+            requests.append(self.quota.status().remaining)
+        return max(min(requests), 0) * self.llm_batch_size
+
+    def fetch_emails(
+        self, limit: int, checkpoint: SyncCheckpoint | None = None
+    ) -> list[EmailData]:
+        self.email_list = list(self.iter_emails(limit, checkpoint))
         print(f"Fetched {len(self.email_list)} emails")
         return self.email_list
 
     def analyze_emails(self) -> list[EmailData]:
-        for email_data in self.email_list:
-            if email_data.classify(self.classifier):
-                self.application_emails.append(email_data)
-            else:
-                print("Not an application email — skipped")
+        self.application_emails.extend(self._analyze_many(self.email_list))
+        self._flush_rejected()
         return self.application_emails
 
+    def _analyze_many(self, emails: list[EmailData]) -> list[EmailData]:
+        """Classify `emails` and return the applications among them, in input order."""
+        followups = {id(email_data) for email_data in emails if self._follow_thread(email_data)}
+        if not followups:
+            return self._classify_many(emails)
+        applications = {
+            id(email_data)
+            for email_data in self._classify_many(
+                [email_data for email_data in emails if id(email_data) not in followups]
+            )
+        }
+        return [
+            email_data
+            for email_data in emails
+            if id(email_data) in applications
+            or (id(email_data) in followups and self._record(email_data, True))
+        ]
+
+    def _classify_many(self, emails: list[EmailData]) -> list[EmailData]:
+        if not self._capacity_limited() and self.llm_batch_size <= 1 and (
+            self.max_concurrency <= 1 or len(emails) < 2
+        ):
+            return [email_data for email_data in emails if self._analyze(email_data)]
+
+        candidates = [
+            email_data
+            for email_data in emails
+            if email_data._passes_quick_filter(self.classifier, self.filter_stats)
+        ]
+        if self.scheduler is not None and len(candidates) > 1:
+            candidates = self.scheduler.order(candidates)
+        admitted = self._classify_candidates(candidates)
+
+        deferred = {id(email_data) for email_data in candidates} - {id(e) for e in admitted}
+        return [
+            email_data
+            for email_data in emails
+            if id(email_data) not in deferred
+            and self._record(email_data, bool(email_data.is_application))
+        ]
+
+    def _classify_candidates(self, candidates: list[EmailData]) -> list[EmailData]:
+        """Classify the `candidates` the LLM budget admits, in order, and return them."""
+        admitted = self._admit(candidates)
+        if self.llm_batch_size > 1:
+            self._classify_in_batches(admitted)
+        elif self.max_concurrency > 1 and len(admitted) > 1:
+            asyncio.run(self._classify_concurrently(admitted))
+        else:
+            for email_data in admitted:
+                email_data.classify_candidate(self.classifier)
+        return admitted
+
+    def _capacity_limited(self) -> bool:
+        return self.quota is not None or self.max_llm_requests > 0
+
+    def _admit(self, candidates: list[EmailData]) -> list[EmailData]:
+        """Reserve LLM budget for `candidates`; the ones it cannot cover are deferred."""
+        if not self._capacity_limited() or not candidates:
+            return candidates
+        groups = [(candidates, False)]
+        if self.quota is not None:
+            # Confirmation matches may dip into the budget held back for high-priority mail.
+            groups = [
+                ([e for e in candidates if e.filter_reason == REASON_CONFIRMATION], True),
+                ([e for e in candidates if e.filter_reason != REASON_CONFIRMATION], False),
+            ]
+        admitted = {
+            id(email_data)
+            for group, high_priority in groups
+            for email_data in group[: self._reserve_emails(len(group), high_priority)]
+        }
+        for email_data in candidates:
+            if id(email_data) not in admitted:
+                self._defer(email_data)
+        return [email_data for email_data in candidates if id(email_data) in admitted]
+
+    def _defer(self, email_data: EmailData) -> None:
+        print(f"LLM budget low — deferring uid={email_data.uid} to the next run")
+        self.deferred.append(email_data)
+
+    def _reserve_emails(self, count: int, high_priority: bool) -> int:
+        if not count:
+            return 0
+        requests = -(-count // self.llm_batch_size)
+        if self.max_llm_requests > 0:
+            requests = min(requests, self.max_llm_requests - self.llm_requests_admitted)
+        if requests <= 0:
+            return 0
+        if self.quota is not None:
+            requests = self.quota.reserve(requests, high_priority=high_priority)
+        self.llm_requests_admitted += requests
+        return min(count, requests * self.llm_batch_size)
+
+    def settle_quota(self) -> None:
+        """Record the requests this run made and release the rest of its reservation."""
+        if self.quota is None:
+            return
+        made = request_count(self.classifier)
+        # Without a request counter, assume every reserved request was used.
+        used = self.quota.reserved if made is None else made - self._requests_at_start
+        self.quota.settle(used)
+
+    async def _classify_concurrently(self, emails: list[EmailData]) -> list[bool]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def classify(email_data: EmailData) -> bool:
+            async with semaphore:
+                return await email_data.aclassify_candidate(self.classifier)
+
+        # gather() returns results in argument order, whatever order calls finish in.
+        return await asyncio.gather(*(classify(email_data) for email_data in emails))
+
+    def _classify_in_batches(self, candidates: list[EmailData]) -> None:
+        # Batches are packed after the quick filter so every slot is an LLM candidate.
+        size = self.llm_batch_size
+        batches = [candidates[i : i + size] for i in range(0, len(candidates), size)]
+        if self.max_concurrency > 1 and len(batches) > 1:
+            asyncio.run(self._classify_batches_concurrently(batches))
+        else:
+            for batch in batches:
+                EmailData.classify_batch(batch, self.classifier)
+
+    async def _classify_batches_concurrently(self, batches: list[list[EmailData]]) -> None:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def classify(batch: list[EmailData]) -> None:
+            async with semaphore:
+                await EmailData.aclassify_batch(batch, self.classifier)
+
+        await asyncio.gather(*(classify(batch) for batch in batches))
+
+    def _analyze(self, email_data: EmailData) -> bool:
+        return self._record(email_data, email_data.classify(self.classifier, self.filter_stats))
+
+    def _record(self, email_data: EmailData, is_application: bool) -> bool:
+        is_application = self._carry_thread_link(email_data) or is_application
+        if not is_application:
+            print("Not an application email — skipped")
+            # Quick-filter rejects never reach the pre-classifier, and a failed LLM call
+            # (no confidence) is not a decision worth keeping.
+            if (
+                self.store_rejected is not None
+                and email_data.source != SOURCE_QUICK_FILTER
+                and email_data.confidence is not None
+            ):
+                self.rejected_emails.append(email_data)
+            return False
+        self._resolve_company(email_data)
+        self.application_count += 1
+        if email_data.confidence == "high":
+            self.high_confidence_count += 1
+        elif email_data.confidence == "low":
+            self.needs_review_count += 1
+        self._remember_thread(email_data)
+        return True
+
+    def _flush_rejected(self, at_least: int = 1) -> None:
+        """Hand the rejected emails to `store_rejected` once `at_least` are waiting."""
+        if self.store_rejected is None or len(self.rejected_emails) < max(at_least, 1):
+            return
+        rejected, self.rejected_emails = self.rejected_emails, []
+        self.store_rejected(rejected)
+
+    def _follow_thread(self, email_data: EmailData) -> bool:
+        """
+        Answer a follow-up in a thread already linked to an application without
+        the LLM, unless its new text may move the stage. Those still skip the
+        quick filter: the thread already shows it is application mail.
+        """
+        link = self.threads.link(email_data.thread_id) if self.threads is not None else None
+        if link is None or email_data.thread_id == email_data.message_id:
+            return False
+        email_data.thread_linked = True
+        if may_change_stage(email_data.body):
+            return False
+        email_data.is_application = True
+        email_data.company = link.company
+        email_data.position = link.position
+        email_data.stage = link.stage
+        email_data.confidence = "high"
+        email_data.application_id = link.application_id
+        email_data.thread_followup = True
+        self.thread_followups += 1
+        print(f"Thread follow-up uid={email_data.uid} — keeping its application, skipping LLM")
+        return True
+
+    def _carry_thread_link(self, email_data: EmailData) -> bool:
+        """
+        Keep a classified message of a linked thread on that thread's application;
+        the LLM's answer only decides whether the stage moved.
+        """
+        link = self.threads.link(email_data.thread_id) if self.threads is not None else None
+        if link is None or email_data.thread_followup:
+            return False
+        moved = (
+            email_data.is_application
+            and email_data.stage
+            and email_data.confidence in ("high", "medium")
+        )
+        email_data.stage = email_data.stage if moved else link.stage
+        email_data.confidence = email_data.confidence if moved else "medium"
+        email_data.is_application = True
+        email_data.company = link.company
+        email_data.position = link.position
+        email_data.application_id = link.application_id
+        return True
+
+    def _resolve_company(self, email_data: EmailData) -> None:
+        """Take the company of a known corporate sender domain over the LLM's answer."""
+        if self.companies is None or email_data.application_id is not None:
+            return
+        entry = self.companies.lookup(email_data.sender)
+        if entry is None:
+            return
+        email_data.company = entry.name
+        email_data.company_id = entry.company_id
+        self.company_domain_hits += 1
+
+    def _remember_thread(self, email_data: EmailData) -> None:
+        if (
+            self.threads is None
+            or not email_data.thread_id
+            or not (email_data.company and email_data.position)
+            or email_data.confidence not in ("high", "medium")
+        ):
+            return
+        self.threads.remember(
+            email_data.thread_id,
+            ThreadLink(
+                email_data.company,
+                email_data.position,
+                email_data.stage,
+                email_data.application_id,
+            ),
+        )
+
     def get_high_confidence(self) -> list[EmailData]:
         return [e for e in self.application_emails if e.confidence == "high"]
 
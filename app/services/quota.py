@@ -0,0 +1,139 @@
+"""
+Daily LLM request budget shared by every process that calls the provider.
+
+A run reserves requests before sending emails to the LLM and settles the
+reservation with the number it actually made when it finishes, so cron runs,
+`/jobs/email-check` triggers and backfills draw on one counter. Each
+operation runs in its own short transaction: holding the counter row inside
+the worker's long-lived session would block every other process.
+"""
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.db.repositories.llm_quota_repo import LLMQuotaRepository
+
+
+@dataclass
+class QuotaStatus:
+    provider: str
+    day: date
+    daily_limit: int
+    used: int
+    reserved: int
+
+    @property
+    def remaining(self) -> int:
+        return max(self.daily_limit - self.used - self.reserved, 0)
+
+    @classmethod
+    def load(cls, session: Session, provider: str, daily_limit: int, day: date) -> "QuotaStatus":
+        usage = LLMQuotaRepository(session).find(provider, day)
+        return cls(
+            provider=provider,
+            day=day,
+            daily_limit=daily_limit,
+            used=usage.used if usage else 0,
+            reserved=usage.reserved if usage else 0,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "provider": self.provider,
+            "day": self.day.isoformat(),
+            "daily_limit": self.daily_limit,
+            "used": self.used,
+            "reserved": self.reserved,
+            "remaining": self.remaining,
+        }
+
+
+def utc_today() -> date:
+    return datetime.utcnow().date()
+
+
+def build_quota(
+    settings: Settings, session_factory: Callable[[], Session]
+) -> "LLMQuota | None":
+    """The configured daily budget, or None when LLM_DAILY_REQUEST_LIMIT is 0."""
+    if settings.llm_daily_request_limit <= 0:
+        return None
+    return LLMQuota(
+        session_factory,
+        provider=settings.llm_provider.strip().lower(),
+        daily_limit=settings.llm_daily_request_limit,
+        priority_reserve=settings.llm_quota_priority_reserve,
+    )
+
+
+class LLMQuota:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        provider: str,
+        daily_limit: int,
+        priority_reserve: int = 0,
+        today: Callable[[], date] = utc_today,
+    ) -> None:
+        self.session_factory = session_factory
+        self.provider = provider
+        self.daily_limit = daily_limit
+        # Requests only high-priority emails may use once the budget runs low.
+        self.priority_reserve = priority_reserve
+        self._today = today
+        # Outstanding reservation of this run, settled against the day it was made.
+        self.reserved = 0
+        self._day: date | None = None
+
+    def status(self) -> QuotaStatus:
+        session = self.session_factory()
+        try:
+            return QuotaStatus.load(session, self.provider, self.daily_limit, self._today())
+        finally:
+            session.close()
+
+    def reserve(self, requests: int, high_priority: bool = False) -> int:
+        """
+        Claim up to `requests` and return how many were granted. Normal
+        requests leave `priority_reserve` untouched.
+        """
+        if requests <= 0:
+            return 0
+        day = self._day or self._today()
+        ceiling = self.daily_limit if high_priority else self.daily_limit - self.priority_reserve
+        session = self.session_factory()
+        try:
+            repo = LLMQuotaRepository(session)
+            usage = repo.get_or_create(self.provider, day)
+            session.commit()
+            while True:
+                amount = min(requests, ceiling - usage.used - usage.reserved)
+                if amount <= 0:
+                    return 0
+                if repo.try_reserve(self.provider, day, amount, ceiling):
+                    session.commit()
+                    self.reserved += amount
+                    self._day = day
+                    return amount
+                # Another process claimed requests in between; re-read and retry.
+                session.rollback()
+                usage = repo.find(self.provider, day)
+        finally:
+            session.close()
+
+    def settle(self, used: int) -> None:
+        """Record `used` requests and release the rest of this run's reservation."""
+        if not self.reserved and not used:
+            return
+        day = self._day or self._today()
+        session = self.session_factory()
+        try:
+            LLMQuotaRepository(session).settle(self.provider, day, self.reserved, used)
+            session.commit()
+        finally:
+            session.close()
+        self.reserved = 0
+        self._day = None
@@ -0,0 +1,127 @@
+"""
+Conversation threads from Message-ID, In-Reply-To and References.
+
+A thread is named after its root Message-ID: the first References entry,
+else In-Reply-To, else the message's own id. ThreadIndex remembers which
+threads are already linked to an open Application, so a follow-up in one of
+them can inherit the link instead of being classified from scratch. Only
+follow-ups whose new text (the quoted history removed) carries a stage cue
+such as an interview, offer, assessment or rejection still go to the LLM.
+"""
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+_MESSAGE_ID_RE = re.compile(r"<[^<>\s]+>")
+# Where a reply's quoted history starts: "On Mon, ... wrote:", Outlook's "From: ... Sent:"
+# header or an "-----Original Message-----" line, or the first "> " quote marker. Not
+# anchored to lines: fetched bodies arrive with their whitespace collapsed to one line.
+_QUOTE_START_RE = re.compile(
+    # A capitalized "On" with no other "On" before "wrote:", so "move on to the next
+    # round. On Mon ... wrote:" keeps the new sentence.
+    r"(?-i:\bOn\b)(?:(?!(?-i:\bOn\b)).){0,200}?\bwrote:"
+    r"|-{2,}\s*original message|\bfrom:\s.{0,200}?\bsent:|(?:^|\s)>\s",
+    re.IGNORECASE | re.DOTALL,
+)
+_STAGE_CUE_RE = re.compile(
+    r"\b(?:interview|phone screen|onsite|on-site|offer|assessment|coding challenge|take-home|"
+    r"unfortunately|not (?:be )?moving forward|other candidates|no longer (?:being )?considered|"
+    r"regret|withdraw|next (?:round|stage|steps))",
+    re.IGNORECASE,
+)
+
+
+def header_value(headers: dict | None, name: str) -> str | None:
+    """Case-insensitive header lookup; raw_headers keep the sender's capitalization."""
+    if not headers:
+        return None
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name and value:
+            return str(value)
+    return None
+
+
+def parse_message_ids(value: str | None) -> list[str]:
+    """The <...> ids in a References / In-Reply-To header, in header order."""
+    return _MESSAGE_ID_RE.findall(value or "")
+
+
+def thread_root(
+    message_id: str | None, in_reply_to: list[str], references: list[str]
+) -> str | None:
+    if references:
+        return references[0]
+    if in_reply_to:
+        return in_reply_to[0]
+    return message_id.strip() if message_id else None
+
+
+def strip_quoted(body: str) -> str:
+    """The text a reply adds: everything before its quoted history."""
+    body = body or ""
+    match = _QUOTE_START_RE.search(body)
+    return body[: match.start()] if match else body
+
+
+def may_change_stage(body: str) -> bool:
+    return _STAGE_CUE_RE.search(strip_quoted(body)) is not None
+
+
+@dataclass
+class ThreadLink:
+    """The application a thread belongs to. `application_id` is None until it is stored."""
+
+    company: str
+    position: str
+    stage: str | None = None
+    application_id: int | None = None
+
+
+class ThreadIndex:
+    """Message-ID -> thread id, and thread id -> linked application."""
+
+    def __init__(
+        self,
+        messages: Iterable[tuple[str, str]] = (),
+        links: dict[str, ThreadLink] | None = None,
+    ) -> None:
+        self._threads = {message_id: thread_id for message_id, thread_id in messages}
+        self._links = dict(links or {})
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "ThreadIndex":
+        """
+        From ApplicationRepository.get_open_threads() rows: (message_id,
+        thread_id, application_id, company, position, stage).
+        """
+        index = cls()
+        for message_id, thread_id, application_id, company, position, stage in rows:
+            if message_id:
+                index._threads[message_id] = thread_id
+            index._links[thread_id] = ThreadLink(company, position, stage, application_id)
+        return index
+
+    def resolve(
+        self, message_id: str | None, in_reply_to: list[str], references: list[str]
+    ) -> str | None:
+        """
+        The thread `message_id` belongs to. A known parent's thread wins over
+        the header root, so truncated References lists still join up.
+        """
+        thread_id = None
+        for parent in [*references, *in_reply_to]:
+            thread_id = self._threads.get(parent)
+            if thread_id is not None:
+                break
+        if thread_id is None:
+            thread_id = thread_root(message_id, in_reply_to, references)
+        if message_id and thread_id:
+            self._threads[message_id.strip()] = thread_id
+        return thread_id
+
+    def link(self, thread_id: str | None) -> ThreadLink | None:
+        return self._links.get(thread_id) if thread_id else None
+
+    def remember(self, thread_id: str, link: ThreadLink) -> None:
+        self._links[thread_id] = link
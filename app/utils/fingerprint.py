@@ -0,0 +1,68 @@
+"""
+64-bit SimHash fingerprints of email bodies.
+
+Word bigrams in which capitalized names and numbers are masked, so two fills
+of one ATS template land a few bits apart. Computed when an email is stored
+and compared by the near-duplicate classifier (app.llm.near_duplicate).
+"""
+import hashlib
+import re
+
+SIMHASH_BITS = 64
+# Shorter bodies leave too few shingles for a stable fingerprint; the exact cache covers them.
+MIN_TOKENS = 20
+
+# Newlines are not sentence ends: wrapped lines often start with a name or role.
+_WORD_RE = re.compile(r"[A-Za-z0-9][\w'&-]*(?:\.[\w'&-]+)*|[.!?:]")
+_MASK = "#"
+
+
+def fingerprint_tokens(text: str) -> list[str]:
+    """
+    Lowercased words with each run of capitalized (not sentence-initial) words
+    or numbers collapsed to one mask token: "Backend Engineer at Acme Robotics"
+    and "SRE at Globex" both become "# at #".
+    """
+    tokens: list[str] = []
+    sentence_start = True
+    for match in _WORD_RE.finditer(text):
+        word = match.group(0)
+        if word in ".!?:":
+            sentence_start = True
+            continue
+        masked = word[0].isdigit() or (word[0].isupper() and not sentence_start)
+        sentence_start = False
+        if masked:
+            if tokens and tokens[-1] == _MASK:
+                continue
+            tokens.append(_MASK)
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def simhash(text: str | None) -> int | None:
+    """64-bit SimHash of the body's word bigrams; None for bodies under MIN_TOKENS."""
+    tokens = fingerprint_tokens(text or "")
+    if len(tokens) < MIN_TOKENS:
+        return None
+    weights = [0] * SIMHASH_BITS
+    for shingle in zip(tokens, tokens[1:]):
+        digest = hashlib.blake2b(" ".join(shingle).encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def to_signed64(fingerprint: int) -> int:
+    """Stored form: BIGINT columns are signed."""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def from_signed64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
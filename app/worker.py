@@ -6,18 +6,59 @@ Docker:     docker run --rm <IMAGE> python -m app.worker
 Cron:       0 7,12,17,20 * * 1-5
             docker run --rm --env-file /etc/tracker.env <IMAGE> python -m app.worker
 """
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
 from app.config import get_settings
 from app.db import models
 from app.db.database import SessionLocal, engine
 from app.db.repositories.application_repo import ApplicationRepository
+from app.db.repositories.bulk_persist_repo import BulkPersistRepository, BulkSaveResult
+from app.db.repositories.classification_cache_repo import ClassificationCacheRepository
 from app.db.repositories.company_repo import CompanyRepository
+from app.db.repositories.deferred_email_repo import DeferredEmailRepository
 from app.db.repositories.email_repo import EmailRepository
+from app.db.repositories.sync_state_repo import SyncStateRepository
+from app.db.repositories.worker_run_repo import WorkerRunRepository
+from app.email_client.client import FetchOptions
+from app.email_client.quick_filter import register_job_board_domains
+from app.llm.ats_templates import ATSTemplateStats
+from app.llm.base import LLMClassifier, provider_of
 from app.llm.factory import build_classifier
-from app.services.email_service import EmailProcessor
+from app.services.company_domains import CompanyDomainIndex
+from app.services.email_service import (
+    ClassificationScheduler,
+    EmailData,
+    EmailProcessor,
+    KnownEmails,
+)
+from app.services.quota import build_quota
+from app.services.threads import ThreadIndex
+
+
+def _build_classifier(session: Session) -> LLMClassifier:
+    cache_repo = ClassificationCacheRepository(session)
+    purged = cache_repo.purge_expired(datetime.utcnow())
+    if purged:
+        print(f"Purged {purged} expired classification cache entries")
+    return build_classifier(get_settings(), cache_repo, EmailRepository(session))
+
+
+def _build_scheduler(session: Session) -> ClassificationScheduler:
+    return ClassificationScheduler(ApplicationRepository(session).get_open_sender_domains())
+
+
+def _build_threads(session: Session) -> ThreadIndex:
+    return ThreadIndex.from_rows(ApplicationRepository(session).get_open_threads())
 
 
-def _build_classifier():
-    return build_classifier(get_settings())
+def _build_companies(session: Session) -> CompanyDomainIndex:
+    return CompanyDomainIndex.from_rows(CompanyRepository(session).get_domains())
+
+
+def _build_known_emails(session: Session) -> KnownEmails:
+    return EmailRepository(session).find_known
 
 
 def run() -> None:
@@ -25,55 +66,150 @@ def run() -> None:
     settings = get_settings()
 
     models.Base.metadata.create_all(bind=engine)
-
-    classifier = _build_classifier()
-    processor = EmailProcessor(classifier)
-    processor.fetch_emails(settings.email_limit)
-    processor.analyze_emails()
-
-    application_emails = processor.application_emails
-    if not application_emails:
-        print("No application emails found in this run")
-        return
+    register_job_board_domains(settings.job_board_extra_domains.split(","))
 
     saved = 0
+    # (message_id or uid, error) of emails that could not be stored this run
+    failed: list[tuple[str, str]] = []
     session = SessionLocal()
+    run_repo = WorkerRunRepository(session)
+    worker_run = run_repo.create()
+    session.commit()
+    processor = None
     try:
-        email_repo = EmailRepository(session)
-        company_repo = CompanyRepository(session)
-        app_repo = ApplicationRepository(session)
-
-        for email_data in application_emails:
-            if email_repo.find_by_message_id(email_data.message_id):
-                print(
-                    "Duplicate Message-ID — skipping email: "
-                    f"{email_data.message_id}"
-                )
-                continue
-
-            email_record = email_repo.create_from_email_data(email_data)
-
-            if (
-                email_data.confidence in ("high", "medium")
-                and email_data.company
-                and email_data.position
-            ):
-                company = company_repo.find_or_create(email_data.company)
-                application = app_repo.find_or_create(company.id, email_data.position)
-                email_repo.link_to_application(email_record, application.id)
-                app_repo.update_stage(application, email_data.stage, email_data.date)
-
-            session.commit()
-            saved += 1
+        classifier = _build_classifier(session)
+        # Rows are deleted only once the run succeeds, so a crash keeps the backlog.
+        deferred_repo = DeferredEmailRepository(session)
+        carried_over = deferred_repo.get_all()
+        companies = _build_companies(session)
+        model_used = getattr(provider_of(classifier), "model", None)
+
+        def store_rejected(rejected: list[EmailData]) -> None:
+            result = _persist_application_emails(session, rejected, None, worker_run.id, model_used)
+            failed.extend(result.failed)
+
+        processor = EmailProcessor(
+            classifier,
+            FetchOptions.from_settings(settings),
+            max_concurrency=settings.llm_max_concurrency,
+            llm_batch_size=settings.llm_batch_size,
+            quota=build_quota(settings, SessionLocal),
+            carry_over=[_email_data_from_deferred(row) for row in carried_over],
+            scheduler=_build_scheduler(session),
+            max_llm_requests=settings.llm_max_requests_per_run,
+            threads=_build_threads(session),
+            companies=companies,
+            known_emails=_build_known_emails(session),
+            store_rejected=store_rejected if settings.persist_rejected_emails else None,
+        )
+        sync_repo = SyncStateRepository(session)
+        checkpoint = (
+            sync_repo.get_checkpoint(settings.email_user, settings.imap_mailbox)
+            if settings.imap_incremental_sync
+            else None
+        )
+
+        # Emails stream through fetch -> classify -> persist one batch at a time.
+        for batch in processor.iter_application_batches(
+            settings.email_limit,
+            checkpoint=checkpoint,
+            batch_size=settings.db_persist_batch_size,
+        ):
+            result = _persist_application_emails(
+                session, batch, companies, worker_run.id, model_used
+            )
+            saved += result.saved
+            failed.extend(result.failed)
+
+        if not processor.application_count:
+            print("No application emails found in this run")
+
+        # Advance only after every email is committed so a crash re-fetches the batch, and
+        # not at all if one failed: the next run fetches it again (stored ones are skipped).
+        if checkpoint is not None and not failed:
+            sync_repo.save_checkpoint(settings.email_user, settings.imap_mailbox, checkpoint)
+        elif checkpoint is not None:
+            print(f"{len(failed)} emails failed to save — keeping the sync checkpoint")
+        failed_keys = {key for key, _ in failed}
+        deferred_repo.delete(
+            [row for row in carried_over if (row.message_id or row.uid) not in failed_keys]
+        )
+        for email_data in processor.deferred:
+            deferred_repo.add(email_data, reason="llm_budget")
+        run_repo.complete(
+            worker_run,
+            emails_fetched=processor.fetched_count,
+            applications_found=processor.application_count,
+            emails_saved=saved,
+            filter_stats=processor.filter_stats.to_dict(),
+        )
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        run_repo.fail(worker_run, str(e))
+        session.commit()
+        raise
     finally:
+        if processor is not None:
+            processor.settle_quota()
         session.close()
 
+    if processor.duplicates_skipped:
+        print(f"Duplicates:    {processor.duplicates_skipped} already-stored emails skipped")
+    if processor.deferred:
+        print(f"Deferred:      {len(processor.deferred)} emails to the next run (LLM budget)")
+    if not processor.application_count:
+        return
+
     print("\n=== Summary ===")
-    print(f"Fetched:       {len(processor.email_list)}")
-    print(f"Applications:  {len(application_emails)}")
+    print(f"Fetched:       {processor.fetched_count}")
+    print(f"Applications:  {processor.application_count}")
     print(f"Saved:         {saved}")
-    print(f"High conf:     {len(processor.get_high_confidence())}")
-    print(f"Needs review:  {len(processor.get_needs_review())}")
+    print(f"High conf:     {processor.high_confidence_count}")
+    print(f"Needs review:  {processor.needs_review_count}")
+    if processor.thread_followups:
+        print(f"Threads:       {processor.thread_followups} follow-ups kept their application")
+    if processor.company_domain_hits:
+        print(f"Companies:     {processor.company_domain_hits} resolved from the sender domain")
+    stats = processor.filter_stats
+    print(f"Quick filter:  {stats.emails - stats.passed} of {stats.emails} skipped the LLM")
+    template_stats = getattr(processor.classifier, "stats", None)
+    if isinstance(template_stats, ATSTemplateStats):
+        print(f"ATS templates: {template_stats.summary()}")
+
+
+def _email_data_from_deferred(row: models.DeferredEmail) -> EmailData:
+    return EmailData(
+        message_id=row.message_id,
+        uid=row.uid,
+        sender=row.sender,
+        subject=row.subject,
+        date=row.received_date,
+        body=row.body or "",
+        thread_id=row.thread_id,
+    )
+
+
+def _persist_application_emails(
+    session,
+    application_emails,
+    companies=None,
+    worker_run_id: int | None = None,
+    model_used: str | None = None,
+) -> BulkSaveResult:
+    """Store one batch with bulk upserts and commit it as a single transaction."""
+    result = BulkPersistRepository(session).save(
+        application_emails,
+        companies=companies,
+        worker_run_id=worker_run_id,
+        model_used=model_used,
+    )
+    session.commit()
+    for message_id in result.duplicates:
+        print(f"Duplicate Message-ID — skipping email: {message_id}")
+    for email_key, error in result.failed:
+        print(f"Failed to save email {email_key}: {error}")
+    return result
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+Prompt body tokens and retained evidence: the old first-2000-characters window
+against condense_body at several token budgets, on a labeled synthetic corpus
+whose deciding sentence sits after a variable amount of boilerplate.
+
+    python -m benchmarks.bench_condense_body [--emails 400] [--budgets 200,350,500]
+    python -m benchmarks.bench_condense_body --llm 40   # also classify with LLM_PROVIDER
+
+Evidence kept is the share of emails whose deciding sentence reaches the
+prompt. --llm sends a sample of the corpus to the configured provider with
+each body variant and reports accuracy against the labels.
+"""
+import argparse
+import random
+from time import perf_counter
+
+from app.llm.condense import LEGACY_BODY_CHARS, estimate_tokens, prompt_body
+
+_COMPANIES = ["Acme Robotics", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries"]
+_ROLES = ["Backend Engineer", "Data Scientist", "SRE", "Platform Engineer"]
+_FILLER = [
+    "We are a fast growing team building products that customers love.",
+    "Our offices span four continents and we value curiosity and ownership.",
+    "Learn more about our benefits, including parental leave and learning budgets.",
+    "We believe diverse teams build better products for everyone.",
+    "Check out our engineering blog for stories from the people behind the code.",
+    "Follow us on social media to stay up to date with company news.",
+]
+_FOOTER = [
+    "Unsubscribe from these emails at https://mail.example/unsub.",
+    "View this email in your browser.",
+    "© 2024 All rights reserved. Privacy policy.",
+]
+# (label, stage, deciding sentence)
+_EVIDENCE = [
+    (True, "applied", "Thank you for applying to the {role} position at {company}."),
+    (True, "applied", "We received your application for {role} and will review it shortly."),
+    (True, "interview", "We'd like to schedule an interview for the {role} role next week."),
+    (True, "assessment", "Please complete the coding assessment for your {role} application."),
+    (True, "rejected", "Unfortunately we decided to move forward with other candidates."),
+    (False, None, "Apply now to new {role} openings at {company} and similar companies."),
+    (False, None, "Here are this week's job recommendations matching {role}."),
+    (False, None, "Join us for a webinar on careers in {role} work."),
+]
+
+
+def build_corpus(count: int, seed: int = 3) -> list[tuple[tuple[str, str, str], bool, str]]:
+    """((sender, subject, body), label, deciding sentence) tuples."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        company = rng.choice(_COMPANIES)
+        role = rng.choice(_ROLES)
+        label, stage, template = rng.choice(_EVIDENCE)
+        evidence = template.format(company=company, role=role)
+        # Up to ~4KB of filler ahead of the deciding sentence: often past 2000 chars.
+        lead = [rng.choice(_FILLER) for _ in range(rng.randint(0, 55))]
+        tail = [rng.choice(_FILLER) for _ in range(rng.randint(0, 10))]
+        body = "\n".join(
+            [
+                "Hi Jacob,",
+                *lead,
+                evidence,
+                *tail,
+                "Best regards,",
+                f"{company} Talent Team",
+                *_FOOTER,
+            ]
+        )
+        subject = f"{company}: {stage or 'news'}"
+        sender = f"talent@{company.split()[0].lower()}.example"
+        corpus.append(((sender, subject, body), label, evidence))
+    return corpus
+
+
+def _variants(budgets: list[int]) -> list[tuple[str, int]]:
+    return [(f"first {LEGACY_BODY_CHARS} chars", 0)] + [
+        (f"condensed {budget} tok", budget) for budget in budgets
+    ]
+
+
+def _classify(
+    corpus: list[tuple[tuple[str, str, str], bool, str]], budget: int, sample: int
+) -> tuple[float, int]:
+    from app.config import get_settings
+    from app.llm.factory import build_classifier
+
+    settings = get_settings().model_copy(
+        update={
+            "llm_body_token_budget": budget,
+            "llm_cache_max_entries": 0,
+            "preclassifier_model_path": None,
+        }
+    )
+    classifier = build_classifier(settings)
+    correct = 0
+    for (sender, subject, body), label, _ in corpus[:sample]:
+        result = classifier.classify_email(sender, subject, body)
+        correct += bool(result and result.is_application) == label
+    return correct / sample, sample
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--emails", type=int, default=400)
+    parser.add_argument("--budgets", default="200,350,500")
+    parser.add_argument("--llm", type=int, default=0, help="Emails to classify per variant")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.emails)
+    budgets = [int(b) for b in args.budgets.split(",") if b]
+    full_tokens = sum(estimate_tokens(body) for (_, _, body), _, _ in corpus) / len(corpus)
+    print(f"{len(corpus)} labeled emails, {full_tokens:.0f} body tokens on average")
+    print(f"{'prompt body':>22} {'tokens':>7} {'evidence kept':>14} {'us/email':>9}")
+
+    for name, budget in _variants(budgets):
+        start = perf_counter()
+        bodies = [prompt_body(body, budget) for (_, _, body), _, _ in corpus]
+        elapsed_us = (perf_counter() - start) * 1e6 / len(corpus)
+        tokens = sum(estimate_tokens(body) for body in bodies) / len(corpus)
+        kept = sum(evidence in body for body, (_, _, evidence) in zip(bodies, corpus))
+        print(f"{name:>22} {tokens:7.0f} {kept / len(corpus):14.1%} {elapsed_us:9.0f}")
+
+    if args.llm:
+        print(f"\nLLM accuracy on {args.llm} emails")
+        for name, budget in _variants(budgets):
+            accuracy, sample = _classify(corpus, budget, min(args.llm, len(corpus)))
+            print(f"{name:>22} {accuracy:7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+HTML -> text throughput per renderer on synthetic newsletter/ATS bodies, with
+output parity against the original BeautifulSoup renderer.
+
+    python -m benchmarks.bench_html_to_text [--messages 500] [--paragraphs 40]
+
+Parity is reported raw (exact string match) and after _normalize_body_text,
+which is what actually reaches the classifier.
+"""
+import argparse
+import random
+from time import perf_counter
+
+from app.email_client.client import _normalize_body_text
+from app.email_client.html_text import HTML_RENDERERS, get_renderer
+from benchmarks.corpus import build_html_body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bodies = [
+        build_html_body(rng, "Acme", "Backend Engineer", rng.randint(1, args.paragraphs))
+        for _ in range(args.messages)
+    ]
+    total_kb = sum(len(body) for body in bodies) / 1024
+    print(f"{args.messages} HTML bodies, {total_kb:.0f} KB total")
+
+    start = perf_counter()
+    reference = [get_renderer("bs4")(body) for body in bodies]
+    baseline = perf_counter() - start
+
+    print(
+        f"{'renderer':>9} {'ms/msg':>8} {'MB/s':>7} {'speedup':>8} "
+        f"{'raw parity':>11} {'normalized':>11}"
+    )
+    for name in HTML_RENDERERS:
+        render = get_renderer(name)
+        if name == "lxml" and render is get_renderer("stdlib"):
+            print(f"{name:>9}  (not installed)")
+            continue
+        start = perf_counter()
+        outputs = [render(body) for body in bodies]
+        elapsed = perf_counter() - start
+        raw = sum(out == ref for out, ref in zip(outputs, reference))
+        normalized = sum(
+            _normalize_body_text(out) == _normalize_body_text(ref)
+            for out, ref in zip(outputs, reference)
+        )
+        print(
+            f"{name:>9} {elapsed * 1000 / len(bodies):>8.3f} "
+            f"{total_kb / 1024 / elapsed:>7.1f} {baseline / elapsed:>7.1f}x "
+            f"{raw:>5}/{len(bodies):<5} {normalized:>5}/{len(bodies):<5}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Round trips, wall time and bytes for fetching 1k messages at various FETCH
+batch sizes, with the header-first screen, with BODYSTRUCTURE partial fetches
+and with a parse process pool.
+
+    python -m benchmarks.bench_imap_fetch [--messages 1000] [--latency-ms 20]
+        [--attachment-kb 200]
+
+Runs against the local stub server in `benchmarks.imap_stub`, which adds a fixed
+per-command delay to stand in for a remote IMAP link.
+"""
+import argparse
+import contextlib
+import io
+from time import perf_counter
+
+from app.email_client import client
+from app.email_client.client import FetchOptions
+from benchmarks.corpus import build_mailbox
+from benchmarks.imap_stub import ImapStub
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--batch-sizes", default="1,10,50,100")
+    parser.add_argument(
+        "--attachment-kb", type=int, default=200, help="PDF size on every third message"
+    )
+    parser.add_argument("--parse-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    mailbox = build_mailbox(args.messages, attachment_bytes=args.attachment_kb * 1024)
+    per_k = 1000 / args.messages
+    print(f"{args.messages} messages, {args.latency_ms:.0f} ms simulated latency per command")
+    configs = [FetchOptions(batch_size=int(v)) for v in args.batch_sizes.split(",")]
+    configs.append(FetchOptions(batch_size=50, header_first=True))
+    configs.append(FetchOptions(batch_size=50, partial_bodies=True))
+    configs.append(FetchOptions(batch_size=50, header_first=True, partial_bodies=True))
+    configs.append(FetchOptions(batch_size=50, parse_workers=args.parse_workers))
+
+    print(
+        f"{'batch':>6} {'header-first':>12} {'partial':>8} {'workers':>7} {'round trips/1k':>15} "
+        f"{'wall s/1k':>10} {'MB sent':>8} {'parsed':>7}"
+    )
+    with ImapStub(mailbox, latency=args.latency_ms / 1000) as stub:
+        client._connect_to_inbox = stub.connect
+        for options in configs:
+            stub.stats.reset()
+            start = perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = client.fetch_recent_emails(args.messages, options=options)
+            elapsed = perf_counter() - start
+            print(
+                f"{options.batch_size:>6} {str(options.header_first):>12} "
+                f"{str(options.partial_bodies):>8} {options.parse_workers:>7} "
+                f"{stub.stats.commands * per_k:>15.0f} {elapsed * per_k:>10.2f} "
+                f"{stub.stats.bytes_sent / 1e6:>8.1f} {len(results):>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
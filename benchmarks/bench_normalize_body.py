@@ -0,0 +1,78 @@
+"""
+Body normalizer cost on ~100KB rendered bodies: the old five-pass re.sub chain
+against _normalize_body_text, unbudgeted and with the 2000-character budget the
+LLM adapters read.
+
+    python -m benchmarks.bench_normalize_body [--bodies 50] [--kb 100]
+"""
+import argparse
+import random
+import re
+from collections.abc import Callable
+from time import perf_counter
+
+from app.email_client.client import _normalize_body_text
+
+_WORDS = [
+    "Hi", "thanks", "for", "applying", "to", "Acme", "Backend", "Engineer", "we",
+    "will", "review", "your", "background", "https://x.example/jobs/123?ref=mail",
+    "www.acme.example/careers", "\n\n", "\n", "Open", "role",
+]
+
+
+def _legacy_normalize(body: str) -> str:
+    body = re.sub(r"http\S+", "", body)
+    body = re.sub(r"www\.\S+", "", body)
+    body = re.sub(r"\s+", " ", body)
+    body = re.sub(r"(--|__|==).*", "", body)
+    body = re.sub(r"(?i)unsubscribe.*", "", body)
+    return body.strip()
+
+
+def _body(rng: random.Random, size: int) -> str:
+    words: list[str] = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    # Footer at the very end: the worst case for the signature/unsubscribe cut.
+    return " ".join(words) + "\n-- \nUnsubscribe at https://x.example/unsub"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bodies", type=int, default=50)
+    parser.add_argument("--kb", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    bodies = [_body(rng, args.kb * 1024) for _ in range(args.bodies)]
+    print(f"{args.bodies} bodies of ~{args.kb} KB")
+    print(f"{'normalizer':>20} {'ms/body':>8} {'speedup':>8} {'identical':>10}")
+
+    def timed(fn: Callable[[str], str]) -> tuple[float, list[str]]:
+        start = perf_counter()
+        outputs = [fn(body) for body in bodies]
+        return (perf_counter() - start) * 1000 / len(bodies), outputs
+
+    baseline, expected = timed(_legacy_normalize)
+    runs = [
+        ("legacy 5-pass", lambda body: _legacy_normalize(body), None),
+        ("precompiled", lambda body: _normalize_body_text(body), None),
+        ("budget 2000 chars", lambda body: _normalize_body_text(body, 2000), 2000),
+    ]
+    for label, fn, budget in runs:
+        elapsed, outputs = timed(fn)
+        identical = sum(
+            out == (ref if budget is None else ref[:budget])
+            for out, ref in zip(outputs, expected)
+        )
+        print(
+            f"{label:>20} {elapsed:>8.2f} {baseline / elapsed:>7.1f}x "
+            f"{identical:>4}/{len(bodies)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Per-email quick_filter cost: the old per-pattern re.search loop against the
+compiled rule table (plain and traced batch), on parsed synthetic mail, with
+decision parity and the per-rule trace.
+
+    python -m benchmarks.bench_quick_filter [--messages 2000] [--paragraphs 6]
+"""
+import argparse
+import contextlib
+import io
+import re
+from time import perf_counter
+
+from app.email_client import client
+from app.email_client.quick_filter import (
+    _APPLICATION_CONFIRMATION_PATTERNS,
+    _APPLICATION_STATUS_PATTERNS,
+    JOB_BOARD_DOMAINS,
+    JOB_KEYWORDS,
+    JOB_POSTING_PATTERNS,
+    QuickFilterStats,
+    quick_filter,
+    quick_filter_batch,
+)
+from benchmarks.corpus import build_mailbox
+
+
+def _legacy_quick_filter(sender: str, subject: str, email_content: str) -> bool:
+    text = f"{subject} {email_content}".lower()
+    match = re.search(r"@([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})", sender)
+    sender_domain = match.group(1).lower() if match else None
+    if sender_domain:
+        for domain in JOB_BOARD_DOMAINS:
+            if domain in sender_domain:
+                if not any(re.search(p, text) for p in _APPLICATION_CONFIRMATION_PATTERNS):
+                    return False
+                break
+    for pattern in JOB_POSTING_PATTERNS:
+        if re.search(pattern, text):
+            if any(re.search(p, text) for p in _APPLICATION_STATUS_PATTERNS):
+                break
+            return False
+    if sum(1 for kw in JOB_KEYWORDS if kw in text) >= 2:
+        return True
+    return any(re.search(p, text) for p in _APPLICATION_CONFIRMATION_PATTERNS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--paragraphs", type=int, default=6)
+    args = parser.parse_args()
+
+    mailbox = build_mailbox(args.messages, paragraphs=args.paragraphs)
+    emails = [client._parse_message(str(uid), raw) for uid, raw in mailbox.items()]
+    inputs = [(e["sender"], e["subject"], e["body_text"]) for e in emails]
+    average = sum(len(body) for _, _, body in inputs) / len(inputs)
+    print(f"{len(inputs)} emails, {average:.0f} body chars on average")
+
+    results = {}
+    print(f"{'implementation':>16} {'us/email':>9} {'speedup':>8} {'passed':>7}")
+    for label, fn in [("legacy re.search", _legacy_quick_filter), ("compiled", quick_filter)]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn(*inputs[0])  # warm the re cache for the legacy path
+            start = perf_counter()
+            decisions = [fn(*email) for email in inputs]
+            elapsed = (perf_counter() - start) * 1e6 / len(inputs)
+        results[label] = (elapsed, decisions)
+        baseline = results["legacy re.search"][0]
+        print(f"{label:>16} {elapsed:>9.1f} {baseline / elapsed:>7.1f}x {sum(decisions):>7}")
+
+    stats = QuickFilterStats()
+    start = perf_counter()
+    decisions, _ = quick_filter_batch(inputs, stats)
+    elapsed = (perf_counter() - start) * 1e6 / len(inputs)
+    baseline = results["legacy re.search"][0]
+    print(
+        f"{'batch + tracing':>16} {elapsed:>9.1f} {baseline / elapsed:>7.1f}x "
+        f"{sum(decisions):>7}"
+    )
+
+    identical = results["legacy re.search"][1] == results["compiled"][1] == decisions
+    print(f"decisions identical: {identical}")
+    exported = stats.to_dict()
+    print(f"reasons: {exported['reasons']}")
+    print("most expensive rules:")
+    slowest = sorted(exported["rules"].items(), key=lambda item: -item[1]["seconds"])[:5]
+    for key, rule in slowest:
+        print(
+            f"  {key:<40} evaluated={rule['evaluated']:<6} hits={rule['hits']:<6} "
+            f"ms={rule['seconds'] * 1000:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
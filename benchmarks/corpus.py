@@ -0,0 +1,87 @@
+"""Synthetic mailbox generator shared by the benchmarks."""
+import random
+from email.message import EmailMessage
+
+_SENDERS = [
+    "no-reply@greenhouse.io",
+    "jobs-noreply@linkedin.com",
+    "alerts@indeed.com",
+    "talent@acme-robotics.com",
+    "newsletter@techweekly.example",
+    "recruiting@globex.example",
+]
+
+_SUBJECTS = [
+    "Thank you for applying to {company}",
+    "Your application for {role} at {company}",
+    "New jobs for you: {role}",
+    "Job alert: {role} roles near you",
+    "This week in tech: {company} raises Series B",
+    "Interview invitation - {role}",
+]
+
+_COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries"]
+_ROLES = ["Backend Engineer", "Data Scientist", "SRE", "Platform Engineer"]
+
+
+def build_html_body(rng: random.Random, company: str, role: str, paragraphs: int) -> str:
+    rows = "".join(
+        f"<tr><td style='padding:4px'>Item {i}</td><td><a href='https://x.example/{i}'>"
+        f"Open role {i} at {company}</a></td></tr>"
+        for i in range(rng.randint(5, 20))
+    )
+    text = "".join(
+        f"<p>Hi Jacob, thanks for your interest in the {role} position at {company}. "
+        f"We will review your background and reach out about next steps.</p>"
+        for _ in range(paragraphs)
+    )
+    return (
+        "<html><head><style>p{margin:0}</style><script>var t=1;</script></head>"
+        f"<body><div>{text}</div><table>{rows}</table>"
+        "<p>-- <br>Unsubscribe at https://x.example/unsub</p></body></html>"
+    )
+
+
+def build_message(
+    uid: int,
+    rng: random.Random,
+    paragraphs: int = 6,
+    attachment_bytes: int = 0,
+) -> bytes:
+    company = rng.choice(_COMPANIES)
+    role = rng.choice(_ROLES)
+    msg = EmailMessage()
+    msg["Message-ID"] = f"<bench-{uid}@example.test>"
+    msg["From"] = rng.choice(_SENDERS)
+    msg["Subject"] = rng.choice(_SUBJECTS).format(company=company, role=role)
+    msg["Date"] = "Mon, 01 Jan 2024 10:30:00 +0000"
+    msg.set_content(f"Thanks for applying to {company} for the {role} role.")
+    msg.add_alternative(build_html_body(rng, company, role, paragraphs), subtype="html")
+    if attachment_bytes:
+        msg.add_attachment(
+            rng.randbytes(attachment_bytes),
+            maintype="application",
+            subtype="pdf",
+            filename="offer-letter.pdf",
+        )
+    return msg.as_bytes().replace(b"\n", b"\r\n").replace(b"\r\r\n", b"\r\n")
+
+
+def build_mailbox(
+    count: int,
+    seed: int = 7,
+    attachment_bytes: int = 0,
+    attachment_every: int = 3,
+    **kwargs,
+) -> dict[int, bytes]:
+    """Every `attachment_every`-th message carries an `attachment_bytes` PDF."""
+    rng = random.Random(seed)
+    return {
+        uid: build_message(
+            uid,
+            rng,
+            attachment_bytes=attachment_bytes if uid % attachment_every == 0 else 0,
+            **kwargs,
+        )
+        for uid in range(1, count + 1)
+    }
@@ -0,0 +1,239 @@
+"""
+Minimal in-process IMAP4rev1 server for benchmarks.
+
+Implements just enough of the protocol for `app.email_client.client`: LOGIN,
+SELECT, UID SEARCH, UID FETCH (RFC822, BODYSTRUCTURE and partial BODY[...]
+sections), CLOSE and LOGOUT. Every tagged completion is
+delayed by `latency` seconds to emulate a remote server, and the server counts
+commands and bytes sent so benchmarks can report round trips and transfer size.
+"""
+import email
+import email.message
+import imaplib
+import re
+import socket
+import socketserver
+import threading
+import time
+
+_FETCH_ITEM_RE = re.compile(
+    r"BODY(?:\.PEEK)?\[(?P<section>[^\]]*)\](?:<(?P<start>\d+)\.(?P<length>\d+)>)?"
+    r"|RFC822|BODYSTRUCTURE|UID"
+)
+
+
+class StubStats:
+    def __init__(self) -> None:
+        self.commands = 0
+        self.fetch_commands = 0
+        self.bytes_sent = 0
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_StubServer"
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self) -> None:
+        self._send(b"* OK IMAP4rev1 stub ready\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            tag, _, rest = line.decode().strip().partition(" ")
+            command, _, args = rest.partition(" ")
+            command = command.upper()
+            self.server.stats.commands += 1
+            if command == "UID":
+                sub, _, args = args.partition(" ")
+                command = f"UID {sub.upper()}"
+            handler = {
+                "CAPABILITY": self._capability,
+                "LOGIN": self._ok,
+                "SELECT": self._select,
+                "UID SEARCH": self._search,
+                "UID FETCH": self._fetch,
+                "NOOP": self._ok,
+                "CLOSE": self._ok,
+            }.get(command)
+            if command == "LOGOUT":
+                self._send(b"* BYE stub closing\r\n")
+                self._complete(tag, "OK LOGOUT completed")
+                return
+            if handler is None:
+                self._complete(tag, f"BAD unsupported command {command}")
+                continue
+            handler(tag, args)
+
+    def _send(self, data: bytes) -> None:
+        self.server.stats.bytes_sent += len(data)
+        self.wfile.write(data)
+
+    def _complete(self, tag: str, text: str) -> None:
+        time.sleep(self.server.latency)
+        self._send(f"{tag} {text}\r\n".encode())
+        self.wfile.flush()
+
+    def _ok(self, tag: str, args: str) -> None:
+        self._complete(tag, "OK completed")
+
+    def _capability(self, tag: str, args: str) -> None:
+        self._send(b"* CAPABILITY IMAP4rev1\r\n")
+        self._complete(tag, "OK CAPABILITY completed")
+
+    def _select(self, tag: str, args: str) -> None:
+        self._send(f"* {len(self.server.messages)} EXISTS\r\n".encode())
+        self._send(f"* OK [UIDVALIDITY {self.server.uidvalidity}] UIDs valid\r\n".encode())
+        self._complete(tag, "OK [READ-WRITE] SELECT completed")
+
+    def _search(self, tag: str, args: str) -> None:
+        uids = sorted(self.server.messages)
+        criteria = args.split()
+        if criteria[-2:-1] == ["UID"] or (criteria and criteria[0] == "UID"):
+            low = int(criteria[-1].split(":")[0])
+            uids = [uid for uid in uids if uid >= low] or uids[-1:]
+        self._send(("* SEARCH " + " ".join(str(uid) for uid in uids) + "\r\n").encode())
+        self._complete(tag, "OK SEARCH completed")
+
+    def _fetch(self, tag: str, args: str) -> None:
+        self.server.stats.fetch_commands += 1
+        uid_set, _, items = args.partition(" ")
+        for seq, uid in enumerate(_expand_uid_set(uid_set), start=1):
+            raw = self.server.messages.get(uid)
+            if raw is None:
+                continue
+            self._send(f"* {seq} FETCH (UID {uid}".encode())
+            for match in _FETCH_ITEM_RE.finditer(items.upper()):
+                item = match.group(0)
+                if item == "UID":
+                    continue
+                if item == "BODYSTRUCTURE":
+                    structure = self.server.bodystructure(uid)
+                    self._send(f" BODYSTRUCTURE {structure}".encode())
+                    continue
+                name, payload = self.server.render_item(uid, match)
+                self._send(f" {name} {{{len(payload)}}}\r\n".encode() + payload)
+            self._send(b")\r\n")
+        self._complete(tag, "OK FETCH completed")
+
+
+class _StubServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, messages: dict[int, bytes], latency: float) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.messages = messages
+        self.latency = latency
+        self.uidvalidity = 1
+        self.stats = StubStats()
+        # Parsing is server-side work; cache it so timings reflect the client.
+        self._parsed: dict[int, email.message.Message] = {}
+        self._structures: dict[int, str] = {}
+
+    def parsed(self, uid: int) -> email.message.Message:
+        if uid not in self._parsed:
+            self._parsed[uid] = email.message_from_bytes(self.messages[uid])
+        return self._parsed[uid]
+
+    def bodystructure(self, uid: int) -> str:
+        if uid not in self._structures:
+            self._structures[uid] = _bodystructure(self.parsed(uid))
+        return self._structures[uid]
+
+    def render_item(self, uid: int, match: re.Match) -> tuple[str, bytes]:
+        raw = self.messages[uid]
+        if match.group(0) == "RFC822":
+            return "RFC822", raw
+        section = match.group("section")
+        if section.startswith("HEADER.FIELDS"):
+            wanted = set(re.findall(r"[A-Z0-9-]+", section[len("HEADER.FIELDS"):]))
+            msg = self.parsed(uid)
+            lines = [
+                f"{key}: {value}\r\n"
+                for key, value in msg.items()
+                if key.upper() in wanted
+            ]
+            payload = ("".join(lines) + "\r\n").encode()
+        elif section == "HEADER":
+            payload = raw.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n"
+        elif section:
+            part = self.parsed(uid)
+            for index in section.split("."):
+                if part.is_multipart():
+                    part = part.get_payload()[int(index) - 1]
+            payload = part.get_payload().encode()
+        else:
+            payload = raw
+        name = f"BODY[{section}]"
+        if match.group("start") is not None:
+            start = int(match.group("start"))
+            payload = payload[start:start + int(match.group("length"))]
+            name += f"<{start}>"
+        return name, payload
+
+
+def _bodystructure(part) -> str:
+    if part.is_multipart():
+        children = "".join(_bodystructure(child) for child in part.get_payload())
+        return f'({children} "{part.get_content_subtype().upper()}" NIL NIL NIL NIL)'
+    params = " ".join(
+        f'"{key.upper()}" "{value}"'
+        for key, value in part.get_params()[1:]
+    )
+    params = f"({params})" if params else "NIL"
+    encoding = part.get("Content-Transfer-Encoding", "7BIT").upper()
+    payload = part.get_payload()
+    disposition = part.get_content_disposition()
+    disposition = f'("{disposition.upper()}" NIL)' if disposition else "NIL"
+    maintype = part.get_content_maintype().upper()
+    fields = (
+        f'"{maintype}" "{part.get_content_subtype().upper()}" {params} NIL NIL '
+        f'"{encoding}" {len(payload)}'
+    )
+    if maintype == "TEXT":
+        return f"({fields} {payload.count(chr(10))} NIL {disposition} NIL NIL)"
+    return f"({fields} NIL {disposition} NIL NIL)"
+
+
+def _expand_uid_set(uid_set: str) -> list[int]:
+    uids: list[int] = []
+    for part in uid_set.split(","):
+        if ":" in part:
+            low, high = part.split(":")
+            uids.extend(range(int(low), int(high) + 1))
+        else:
+            uids.append(int(part))
+    return uids
+
+
+class ImapStub:
+    """Context manager running the stub server on a background thread."""
+
+    def __init__(self, messages: dict[int, bytes], latency: float = 0.0) -> None:
+        self.server = _StubServer(messages, latency)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def stats(self) -> StubStats:
+        return self.server.stats
+
+    def connect(self) -> imaplib.IMAP4:
+        host, port = self.server.server_address
+        mail = imaplib.IMAP4(host, port)
+        mail.login("bench", "bench")
+        mail.select("inbox")
+        return mail
+
+    def __enter__(self) -> "ImapStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
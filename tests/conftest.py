@@ -0,0 +1,29 @@
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def db_session(monkeypatch):
+    """In-memory SQLite session with the full schema created."""
+    import app.config as app_config
+
+    # app.db.database builds its engine from settings at import time.
+    monkeypatch.setattr(
+        app_config,
+        "get_settings",
+        lambda: SimpleNamespace(database_url="sqlite:///:memory:"),
+    )
+    models = importlib.import_module("app.db.models")
+
+    engine = create_engine("sqlite:///:memory:")
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
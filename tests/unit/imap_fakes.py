@@ -0,0 +1,32 @@
+"""Helpers for fake IMAP connections used across the email client tests."""
+
+
+def expand_uid_set(uid_set: str | bytes) -> list[int]:
+    if isinstance(uid_set, bytes):
+        uid_set = uid_set.decode()
+    uids: list[int] = []
+    for part in uid_set.split(","):
+        if ":" in part:
+            low, high = part.split(":")
+            uids.extend(range(int(low), int(high) + 1))
+        else:
+            uids.append(int(part))
+    return uids
+
+
+def fetch_response(
+    raw_by_uid: dict[int, bytes], uid_set: str | bytes, items: str = "(UID RFC822)"
+):
+    """Build an imaplib-shaped UID FETCH response for every UID in `uid_set`."""
+    header_only = "HEADER.FIELDS" in items
+    item = "BODY[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)]" if header_only else "RFC822"
+    response: list = []
+    for uid in expand_uid_set(uid_set):
+        if uid not in raw_by_uid:
+            continue
+        raw = raw_by_uid[uid]
+        if header_only:
+            raw = raw.split(b"\n\n", 1)[0] + b"\n\n"
+        response.append((f"{uid} (UID {uid} {item} {{{len(raw)}}}".encode(), raw))
+        response.append(b")")
+    return response
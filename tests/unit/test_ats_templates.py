@@ -0,0 +1,164 @@
+from datetime import datetime
+
+import pytest
+
+from app.llm.ats_templates import (
+    SOURCE_ATS_TEMPLATE,
+    TEMPLATES,
+    ATSTemplateClassifier,
+    match_template,
+    register_template,
+    report,
+    template,
+)
+from app.llm.base import EmailClassification
+
+
+class _FallbackClassifier:
+    provider_name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def classify_email(self, sender, subject, body):
+        self.calls.append(subject)
+        return EmailClassification(is_application=False, confidence="high")
+
+
+@pytest.mark.parametrize(
+    ("sender", "subject", "body", "expected"),
+    [
+        (
+            "Acme Hiring <no-reply@us.greenhouse-mail.io>",
+            "Thank you for applying to Acme Robotics!",
+            "Hi Jo, thanks for applying for the Backend Engineer role.",
+            ("greenhouse_confirmation", "Acme Robotics", "Backend Engineer", "applied"),
+        ),
+        (
+            "no-reply@hire.lever.co",
+            "Thanks for applying to Globex",
+            "Thank you for your interest in the Senior Data Scientist position at Globex.",
+            ("lever_confirmation", "Globex", "Senior Data Scientist", "applied"),
+        ),
+        (
+            "Initech Careers <initech@myworkday.com>",
+            "Thank you for applying: Platform Engineer II",
+            "We appreciate your interest in a career with us.",
+            ("workday_confirmation", "Initech", "Platform Engineer II", "applied"),
+        ),
+        (
+            "jobs@greenhouse.io",
+            "Your application for Staff SRE at Hooli",
+            "",
+            ("application_for_position_at_company", "Hooli", "Staff SRE", "applied"),
+        ),
+        (
+            "no-reply@greenhouse.io",
+            "Update on your application to Umbrella",
+            "Unfortunately, we have decided to move forward with other candidates.",
+            ("application_update_rejection", "Umbrella", None, "rejected"),
+        ),
+        (
+            "no-reply@lever.co",
+            "Interview invitation for Backend Engineer at Acme Robotics",
+            "",
+            ("interview_invitation", "Acme Robotics", "Backend Engineer", "interview"),
+        ),
+    ],
+)
+def test_templates_extract_company_position_and_stage(sender, subject, body, expected):
+    ats_template, result = match_template(sender, subject, body)
+
+    assert (ats_template.name, result.company, result.position, result.stage) == expected
+    assert result.is_application and result.source == SOURCE_ATS_TEMPLATE
+    assert result.confidence == ("high" if result.position else "medium")
+
+
+@pytest.mark.parametrize(
+    ("sender", "subject", "body"),
+    [
+        # Not an ATS sender.
+        ("recruiting@acme.com", "Thank you for applying to Acme", ""),
+        # A confirmation subject over rejection wording is left to the LLM.
+        ("no-reply@greenhouse.io", "Thank you for applying to Acme", "Unfortunately, we will not"
+         " be moving forward."),
+        # An application update without rejection wording could be anything.
+        ("no-reply@greenhouse.io", "Update on your application to Umbrella", "Next round!"),
+        ("no-reply@lever.co", "New jobs for you: Backend Engineer at Globex", ""),
+    ],
+)
+def test_unmatched_emails_fall_through(sender, subject, body):
+    assert match_template(sender, subject, body) is None
+
+
+def test_registered_templates_take_precedence(monkeypatch):
+    monkeypatch.setattr("app.llm.ats_templates.TEMPLATES", list(TEMPLATES))
+    register_template(
+        template(
+            "ashby_confirmation",
+            r"^application received: (?P<position>.+) at (?P<company>.+)$",
+            domains=("ashbyhq.com",),
+        )
+    )
+
+    ats_template, result = match_template(
+        "no-reply@ashbyhq.com", "Application received: SRE at Hooli", ""
+    )
+
+    assert ats_template.name == "ashby_confirmation"
+    assert (result.company, result.position) == ("Hooli", "SRE")
+
+
+def test_classifier_counts_hits_per_template_and_forwards_the_rest():
+    inner = _FallbackClassifier()
+    classifier = ATSTemplateClassifier(inner)
+
+    results = classifier.classify_emails(
+        [
+            ("jobs@greenhouse.io", "Your application for SRE at Hooli", ""),
+            ("friend@example.com", "Lunch?", "Want to grab lunch?"),
+            ("jobs@greenhouse.io", "Your application for SRE at Globex", ""),
+        ]
+    )
+
+    assert inner.calls == ["Lunch?"]
+    assert [r.source for r in results] == [SOURCE_ATS_TEMPLATE, None, SOURCE_ATS_TEMPLATE]
+    assert classifier.stats.to_dict() == {
+        "emails": 3,
+        "matched": 2,
+        "templates": {"application_for_position_at_company": 2},
+    }
+    assert classifier.stats.summary() == (
+        "2 of 3 answered without the LLM (application_for_position_at_company=2)"
+    )
+
+
+def test_report_compares_templates_with_stored_analyses(db_session, capsys):
+    from app.db.models import Email, EmailAnalysis
+
+    for uid, position, model_used in [
+        ("1", "Site Reliability Engineer", "llama3"),
+        # The template's own answer would always agree with it, so it is not counted.
+        ("2", "SRE", "ats_template"),
+    ]:
+        email = Email(
+            uid=uid, sender="jobs@greenhouse.io", subject="Your application for SRE at Hooli",
+            body="", received_date=datetime(2024, 5, 1),
+        )
+        db_session.add(email)
+        db_session.flush()
+        db_session.add(
+            EmailAnalysis(
+                email_id=email.id, is_application=True, detected_company="Hooli",
+                detected_position=position, detected_stage="applied", confidence="high",
+                model_used=model_used,
+            )
+        )
+    db_session.flush()
+
+    report(db_session)
+
+    output = capsys.readouterr().out
+    assert "Stored emails: 1, matched by a template: 1" in output
+    row = next(line for line in output.splitlines() if "application_for_position_at" in line)
+    assert row.split()[1:] == ["1", "100.0%", "100.0%", "100.0%", "0.0%", "100.0%"]
@@ -0,0 +1,193 @@
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app.llm.base import EmailClassification, classify_emails
+from app.llm.batch_prompt import build_batch_prompt, parse_batch_response
+from app.llm.cache import SOURCE_CACHE_HIT, CachingClassifier
+from app.llm.errors import LLMResponseError
+from app.llm.groq_adapter import GroqAdapter
+from app.llm.normalization import extract_json_array, normalize_classifications
+from app.llm.ollama_adapter import OllamaAdapter
+from app.services.email_service import EmailData, EmailProcessor
+
+
+def _item(index, company, is_application=True):
+    return {
+        "index": index,
+        "is_application": is_application,
+        "company": company,
+        "position": None,
+        "stage": "applied",
+        "confidence": "high",
+    }
+
+
+def test_batch_results_are_matched_by_index():
+    data = [_item(2, "Beta"), _item(1, "Acme"), {"index": 9}, "noise"]
+
+    results = normalize_classifications(data, 3)
+
+    assert [r.company if r else None for r in results] == ["Acme", "Beta", None]
+
+
+def test_duplicate_or_missing_items_are_left_for_retry():
+    data = [_item(1, "Acme"), _item(2, "Beta"), _item(2, "Gamma")]
+
+    assert normalize_classifications(data, 3)[1:] == [None, None]
+    assert [r.company for r in normalize_classifications(data[:2], 2)] == ["Acme", "Beta"]
+
+
+def test_items_without_index_fall_back_to_position_only_on_exact_count():
+    data = [{"is_application": True, "company": "Acme"}, {"is_application": False}]
+
+    assert [r.company if r else None for r in normalize_classifications(data, 2)] == [
+        "Acme",
+        None,
+    ]
+    assert normalize_classifications(data, 3) == [None, None, None]
+
+
+def test_extract_json_array_rejects_non_arrays():
+    assert extract_json_array('Sure!\n[{"index": 1}]\nDone') == [{"index": 1}]
+    with pytest.raises(LLMResponseError):
+        extract_json_array('{"index": 1}')
+    assert parse_batch_response("no json here", 2) == [None, None]
+
+
+def test_batch_prompt_sends_instructions_once():
+    prompt = build_batch_prompt([("a@x.example", "One", "b" * 3000), ("c@y.example", "Two", "")])
+
+    assert prompt.count("ALREADY SUBMITTED") == 1
+    assert "=== Email 1 ===" in prompt and "=== Email 2 ===" in prompt
+    assert "b" * 2001 not in prompt
+
+
+def _groq_adapter(monkeypatch, replies):
+    monkeypatch.setitem(sys.modules, "groq", SimpleNamespace(Groq=lambda api_key: None))
+    adapter = GroqAdapter(api_key="test-key", requests_per_minute=0)
+    prompts = []
+
+    def create(**kwargs):
+        prompts.append(kwargs["messages"][0]["content"])
+        content = replies.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    adapter.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    return adapter, prompts
+
+
+_EMAILS = [
+    ("a@acme.example", "Applied", "Thanks"),
+    ("b@beta.example", "Interview", "Soon"),
+    ("c@gamma.example", "Sale", "50% off"),
+]
+
+
+def test_groq_classifies_a_batch_in_one_request(monkeypatch):
+    reply = json.dumps([_item(1, "Acme"), _item(2, "Beta"), _item(3, None, False)])
+    adapter, prompts = _groq_adapter(monkeypatch, [reply])
+
+    results = adapter.classify_emails(_EMAILS)
+
+    assert len(prompts) == 1
+    assert [r.company for r in results] == ["Acme", "Beta", None]
+    assert results[2].is_application is False
+
+
+def test_groq_retries_malformed_items_individually(monkeypatch):
+    single = json.dumps(_item(1, "Gamma", False))
+    adapter, prompts = _groq_adapter(
+        monkeypatch, [json.dumps([_item(1, "Acme"), _item(2, "Beta")]), single]
+    )
+
+    results = adapter.classify_emails(_EMAILS)
+
+    assert len(prompts) == 2
+    assert "=== Email" not in prompts[1]
+    assert "c@gamma.example" in prompts[1]
+    assert [r.company for r in results] == ["Acme", "Beta", "Gamma"]
+
+
+def test_ollama_retries_every_item_when_batch_output_is_not_json(monkeypatch):
+    replies = ["I could not decide", json.dumps(_item(1, "Acme")), json.dumps(_item(1, "Beta"))]
+    calls = []
+
+    def chat(**kwargs):
+        calls.append(kwargs)
+        return {"message": {"content": replies.pop(0)}}
+
+    monkeypatch.setattr("app.llm.ollama_adapter.ollama.chat", chat)
+
+    results = OllamaAdapter().classify_emails(_EMAILS[:2])
+
+    assert len(calls) == 3
+    assert [r.company for r in results] == ["Acme", "Beta"]
+
+
+class _BatchClassifier:
+    provider_name = "fake"
+
+    def __init__(self):
+        self.batches = []
+
+    def classify_email(self, sender, subject, body):
+        return self.classify_emails([(sender, subject, body)])[0]
+
+    def classify_emails(self, emails):
+        self.batches.append([subject for _, subject, _ in emails])
+        return [
+            EmailClassification(is_application="Sale" not in subject, confidence="high")
+            for _, subject, _ in emails
+        ]
+
+
+def test_cache_only_sends_uncached_distinct_emails_in_a_batch():
+    inner = _BatchClassifier()
+    cache = CachingClassifier(inner)
+    cache.classify_email(*_EMAILS[0])
+
+    results = cache.classify_emails([_EMAILS[0], _EMAILS[1], _EMAILS[1], _EMAILS[2]])
+
+    assert inner.batches == [["Applied"], ["Interview", "Sale"]]
+    assert [r.source for r in results] == [SOURCE_CACHE_HIT, None, SOURCE_CACHE_HIT, None]
+
+
+def test_classify_emails_falls_back_to_single_calls():
+    class _SingleOnly:
+        provider_name = "fake"
+
+        def classify_email(self, sender, subject, body):
+            return EmailClassification(is_application=True, company=subject)
+
+    results = classify_emails(_SingleOnly(), _EMAILS)
+
+    assert [r.company for r in results] == ["Applied", "Interview", "Sale"]
+
+
+def _emails(subjects):
+    return [
+        EmailData(None, str(i), "talent@acme.example", subject, None, "Thank you for applying")
+        for i, subject in enumerate(subjects)
+    ]
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 3])
+def test_processor_packs_filtered_candidates_into_llm_batches(monkeypatch, max_concurrency):
+    monkeypatch.setattr(
+        "app.services.email_service.quick_filter_reason",
+        lambda sender, subject, body, stats=None: (not subject.startswith("Skip"), "test"),
+    )
+    inner = _BatchClassifier()
+    processor = EmailProcessor(inner, max_concurrency=max_concurrency, llm_batch_size=2)
+    processor.email_list = _emails(["A1", "Skip", "A2", "Sale", "Skip", "A3", "A4"])
+
+    applications = processor.analyze_emails()
+
+    assert sorted(inner.batches) == [["A1", "A2"], ["A4"], ["Sale", "A3"]]
+    assert [e.subject for e in applications] == ["A1", "A2", "A3", "A4"]
+    assert processor.application_count == 4
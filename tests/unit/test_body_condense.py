@@ -0,0 +1,99 @@
+import sys
+from types import SimpleNamespace
+
+from app.llm.cache import classification_cache_key
+from app.llm.condense import (
+    GAP,
+    LEGACY_BODY_CHARS,
+    condense_body,
+    estimate_tokens,
+    prompt_body,
+    score_sentences,
+    sentence_score,
+    split_sentences,
+)
+from app.llm.groq_adapter import GroqAdapter
+
+_FILLER = "We are a fast growing team building products that customers love."
+_EVIDENCE = "Thank you for applying to the Backend Engineer position at Acme."
+
+
+def _long_body(lead: int = 40) -> str:
+    return "\n".join(
+        [
+            "Hi Jacob,",
+            *[_FILLER] * lead,
+            _EVIDENCE,
+            _FILLER,
+            "Best regards,",
+            "Acme Talent Team",
+            "Unsubscribe at https://mail.example/unsub.",
+        ]
+    )
+
+
+def test_condensed_body_keeps_evidence_past_the_legacy_window():
+    body = _long_body()
+    assert _EVIDENCE not in body[:LEGACY_BODY_CHARS]
+
+    condensed = condense_body(body, 100)
+
+    assert estimate_tokens(condensed) <= 100
+    assert _EVIDENCE in condensed
+    assert condensed.startswith("Hi Jacob,")
+    assert "Best regards, Acme Talent Team" in condensed
+    assert "Unsubscribe" not in condensed
+    assert GAP in condensed
+
+
+def test_short_bodies_are_sent_unchanged():
+    body = "Hi Jacob,\nThanks for applying.\n\nBest,\nAcme"
+    assert condense_body(body, 100) == body
+
+
+def test_zero_budget_keeps_the_legacy_window():
+    body = _long_body()
+    assert prompt_body(body, 0) == body[:LEGACY_BODY_CHARS]
+    assert prompt_body(None, 350) == ""
+
+
+def test_sentence_scores_rank_evidence_over_filler_and_boilerplate():
+    scores = score_sentences(
+        [_FILLER, _EVIDENCE, "Unfortunately we decided to move forward with other candidates.",
+         "View this email in your browser."]
+    )
+
+    assert scores[1] > scores[0] and scores[2] > scores[0]
+    assert scores[3] < 0
+    assert sentence_score(_EVIDENCE) == scores[1]
+
+
+def test_patterns_do_not_match_across_sentences():
+    # "interview.*invitation" must not join two sentences into one hit.
+    separate = score_sentences(["Interview tips for everyone.", "An invitation to our party."])
+    together = sentence_score("Interview invitation for Acme.")
+
+    assert together > separate[0] + separate[1]
+
+
+def test_long_runs_are_split_to_the_sentence_cap():
+    pieces = split_sentences("word " * 300)
+    assert len(pieces) > 1
+    assert all(len(piece) <= 400 for piece in pieces)
+
+
+def test_adapter_prompt_and_cache_key_use_the_condensed_body(monkeypatch):
+    monkeypatch.setitem(sys.modules, "groq", SimpleNamespace(Groq=lambda api_key: None))
+    adapter = GroqAdapter(api_key="test-key", requests_per_minute=0, body_token_budget=120)
+    body = _long_body()
+
+    prompt = adapter._prompt("talent@acme.example", "Update", body)
+
+    assert _EVIDENCE in prompt
+    assert body[:LEGACY_BODY_CHARS] not in prompt
+    # Filler the prompt never carries does not change the key.
+    assert classification_cache_key(adapter, "a@acme.example", "S", body) == (
+        classification_cache_key(
+            adapter, "a@acme.example", "S", body.replace("Hi Jacob,", "Hi Jacob,\n" + _FILLER)
+        )
+    )
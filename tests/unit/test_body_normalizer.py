@@ -0,0 +1,77 @@
+import random
+import re
+
+import pytest
+
+from app.email_client.client import _normalize_body_text
+
+
+def _legacy_normalize(body: str) -> str:
+    # The five-pass normalizer this one replaced; output must stay byte-identical.
+    body = re.sub(r"http\S+", "", body)
+    body = re.sub(r"www\.\S+", "", body)
+    body = re.sub(r"\s+", " ", body)
+    body = re.sub(r"(--|__|==).*", "", body)
+    body = re.sub(r"(?i)unsubscribe.*", "", body)
+    return body.strip()
+
+
+_CASES = [
+    "",
+    "   \n\t ",
+    "Thank you for applying to Acme.\n\nWe will review your application.",
+    "Apply at https://jobs.acme.example/123 or www.acme.example/careers today",
+    "Interview next week\n-- \nJane Recruiter\nAcme",
+    "Hi__there",
+    "Role: SRE == see below",
+    "Great news! To UNSUBSCRIBE click here",
+    "Long s: unſubſcribe still matches, as does the Kelvin sign: K",
+    "www.http://example.test keeps its www. prefix",
+    "markers inside URLs are removed first: https://x.example/a--b?c==d ok",
+    " non-breaking spaces and\x1cseparators",
+]
+
+_FRAGMENTS = [
+    "http://a.example/c", "https", "http", "www.", "www.x", "wwwhttp://", "www.http://q",
+    " ", "\n", "\t\t", " ", "--", "-", "_", "__", "=", "==", "unsubscribe",
+    "UNSUBSCRIBE", "Unsub", "scribe", "ſ", "İ", "text", "Acme", "a",
+]
+
+
+def _generated_bodies(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 60)))
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("body", _CASES)
+def test_normalizer_matches_legacy_output(body: str) -> None:
+    assert _normalize_body_text(body) == _legacy_normalize(body)
+
+
+def test_normalizer_matches_legacy_output_on_generated_bodies() -> None:
+    mismatches = [
+        body
+        for body in _generated_bodies(5000, seed=11)
+        if _normalize_body_text(body) != _legacy_normalize(body)
+    ]
+
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("max_chars", [0, 1, 5, 17, 40])
+def test_budgeted_normalizer_is_a_prefix_of_full_output(max_chars: int) -> None:
+    bodies = _generated_bodies(2000, seed=max_chars) + [
+        " ".join(_generated_bodies(200, seed=3)),
+    ]
+
+    for body in bodies:
+        assert _normalize_body_text(body, max_chars) == _legacy_normalize(body)[:max_chars]
+
+
+def test_budgeted_normalizer_stops_before_trailing_noise() -> None:
+    body = "Thanks for applying. " * 50 + "See https://x.example/" + "a" * 100_000
+
+    assert _normalize_body_text(body, 2000) == _legacy_normalize(body)[:2000]
@@ -0,0 +1,117 @@
+import base64
+
+import pytest
+
+from app.email_client import client
+from app.email_client.bodystructure import (
+    BodyStructureError,
+    TextSection,
+    decode_section,
+    extract_bodystructure,
+    text_sections,
+)
+from app.email_client.client import FetchOptions
+
+_ALTERNATIVE = (
+    b'(("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 30 1 NIL NIL NIL NIL)'
+    b'("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "QUOTED-PRINTABLE" 80 2 NIL NIL NIL NIL)'
+    b' "ALTERNATIVE" ("BOUNDARY" "b2") NIL NIL NIL)'
+)
+_PDF = (
+    b'("APPLICATION" "PDF" ("NAME" "offer.pdf") NIL NIL "BASE64" 500000 NIL'
+    b' ("ATTACHMENT" ("FILENAME" "offer.pdf")) NIL NIL)'
+)
+_MIXED = b"(" + _ALTERNATIVE + _PDF + b' "MIXED" ("BOUNDARY" "b1") NIL NIL NIL)'
+
+_HEADER = (
+    b"Message-ID: <offer@example.test>\r\n"
+    b"From: Talent <talent@acme.example>\r\n"
+    b"Subject: Your offer from Acme\r\n\r\n"
+)
+_HTML_QP = b"<html><body><p>We are pleased to offer you the SRE role=\r\n.</p></body></html>"
+
+
+def test_text_sections_prefers_html_and_skips_attachments():
+    structure = extract_bodystructure(b"1 (UID 7 BODYSTRUCTURE " + _MIXED + b")")
+
+    assert text_sections(structure) == [
+        TextSection(section="1.2", subtype="html", charset="utf-8", encoding="QUOTED-PRINTABLE")
+    ]
+
+
+def test_text_sections_single_part_message_is_section_one():
+    structure = extract_bodystructure(
+        b'BODYSTRUCTURE ("TEXT" "PLAIN" ("CHARSET" "iso-8859-1") NIL NIL "BASE64" 120 3'
+        b" NIL NIL NIL NIL)"
+    )
+
+    assert text_sections(structure) == [
+        TextSection(section="1", subtype="plain", charset="iso-8859-1", encoding="BASE64")
+    ]
+
+
+def test_text_sections_skips_text_attachment():
+    structure = extract_bodystructure(
+        b'BODYSTRUCTURE (("TEXT" "PLAIN" NIL NIL NIL "7BIT" 10 1 NIL NIL NIL NIL)'
+        b'("TEXT" "PLAIN" ("NAME" "cv.txt") NIL NIL "7BIT" 900 20 NIL'
+        b' ("ATTACHMENT" ("FILENAME" "cv.txt")) NIL NIL) "MIXED" NIL NIL NIL NIL)'
+    )
+
+    assert [s.section for s in text_sections(structure)] == ["1"]
+
+
+def test_extract_bodystructure_rejects_garbage():
+    with pytest.raises(BodyStructureError):
+        extract_bodystructure(b"1 (UID 7 FLAGS (\\Seen))")
+
+
+def test_decode_section_tolerates_truncated_base64():
+    encoded = base64.b64encode(b"Thank you for applying to Acme")
+    section = TextSection(section="1", subtype="plain", charset=None, encoding="base64")
+
+    assert decode_section(encoded[:21], section) == "Thank you for a"
+
+
+class _PartialFetchMail:
+    def __init__(self) -> None:
+        self.items: list[str] = []
+
+    def uid(self, command, *args):  # noqa: ANN001
+        if command == "search":
+            return "OK", [b"7"]
+        if command != "fetch":
+            raise AssertionError(f"Unexpected IMAP command: {command}")
+        self.items.append(args[1])
+        if "BODYSTRUCTURE" in args[1]:
+            prefix = b"1 (UID 7 BODYSTRUCTURE " + _MIXED + b" BODY[HEADER] {%d}" % len(_HEADER)
+            return "OK", [(prefix, _HEADER), b")"]
+        if "BODY.PEEK[1.2]<0.40>" in args[1]:
+            chunk = _HTML_QP[:40]
+            return "OK", [(b"1 (UID 7 BODY[1.2]<0> {%d}" % len(chunk), chunk), b")"]
+        raise AssertionError(f"Unexpected FETCH items: {args[1]}")
+
+    def close(self) -> None:
+        return None
+
+    def logout(self) -> None:
+        return None
+
+
+def test_partial_fetch_downloads_only_capped_text_section(monkeypatch):
+    fake_mail = _PartialFetchMail()
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+
+    results = client.fetch_recent_emails(
+        limit=1, options=FetchOptions(partial_bodies=True, body_max_bytes=40)
+    )
+
+    assert fake_mail.items == [
+        "(UID BODYSTRUCTURE BODY.PEEK[HEADER])",
+        "(UID BODY.PEEK[1.2]<0.40>)",
+    ]
+    assert len(results) == 1
+    parsed = results[0]
+    assert parsed["message_id"] == "<offer@example.test>"
+    assert parsed["subject"] == "Your offer from Acme"
+    assert parsed["body_text"] == "We are pleased to offer y"
+    assert parsed["raw_headers"]["From"] == "Talent <talent@acme.example>"
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.services.email_service import EmailData
+
+
+def _email(uid, company="Acme", position="SRE", stage="applied", day=1, **fields):
+    email_data = EmailData(
+        f"<{uid}@acme.example>", uid, fields.pop("sender", "talent@acme.com"),
+        f"Update on your {position} application", datetime(2024, 5, day),
+        "Thank you for your interest in the role. Our team is reviewing your application "
+        "carefully and we will be in touch about the next steps as soon as we can.",
+        **fields,
+    )
+    email_data.is_application = True
+    email_data.company, email_data.position, email_data.stage = company, position, stage
+    email_data.confidence = "high"
+    return email_data
+
+
+def test_a_batch_is_stored_with_set_based_upserts(db_session):
+    from app.db.models import Application, Company, Email, EmailAnalysis
+    from app.db.repositories.bulk_persist_repo import BulkPersistRepository
+    from app.db.repositories.email_repo import EmailRepository
+
+    db_session.add(Company(name="ACME"))
+    EmailRepository(db_session).create(
+        "<old@acme.example>", "0", "talent@acme.com", "s", "", datetime(2024, 4, 1)
+    )
+    db_session.flush()
+    batch = [
+        _email("1", stage="applied", day=1, references=["<root@acme.example>"]),
+        _email("2", company="acme", position="sre", stage="interview", day=3),
+        _email("3", company="Globex", position="PM", sender="jobs@globex.example"),
+        _email("old"),
+    ]
+    batch[-1].uid = "0"
+    statements = []
+    event.listen(
+        db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+
+    result = BulkPersistRepository(db_session).save(batch, worker_run_id=None, model_used="m")
+
+    assert (result.saved, result.duplicates, result.failed) == (3, ["<old@acme.example>"], [])
+    # Emails, companies (select/insert/select), applications (select/insert/select),
+    # stage updates and analyses, independent of the batch size.
+    assert len([sql for sql in statements if "SAVEPOINT" not in sql]) <= 10
+    assert sorted(c.name for c in db_session.query(Company)) == ["ACME", "Globex"]
+    applications = {a.position: a for a in db_session.query(Application)}
+    assert sorted(applications) == ["PM", "SRE"]
+    assert applications["SRE"].stage == "interview"
+    email = db_session.query(Email).filter(Email.uid == "1").one()
+    assert email.thread_id == "<root@acme.example>"
+    assert email.body_simhash is not None
+    analyses = db_session.query(EmailAnalysis).all()
+    assert len(analyses) == 3
+    assert {a.model_used for a in analyses} == {"m"}
+    assert all(not a.needs_review for a in analyses)
+
+    again = BulkPersistRepository(db_session).save([_email("1"), _email("2")])
+    assert (again.saved, len(again.duplicates)) == (0, 2)
+
+
+def test_thread_follow_ups_link_to_their_application(db_session):
+    from app.db.models import Application, Company, EmailAnalysis
+    from app.db.repositories.bulk_persist_repo import BulkPersistRepository
+
+    company = Company(name="Acme")
+    db_session.add(company)
+    db_session.flush()
+    application = Application(
+        company_id=company.id, position="SRE", stage="applied", last_updated=datetime(2024, 4, 1)
+    )
+    db_session.add(application)
+    db_session.flush()
+    followup = _email("4", company=None, position=None, stage="interview", day=2)
+    followup.application_id = application.id
+
+    result = BulkPersistRepository(db_session).save([followup])
+
+    assert result.saved == 1
+    assert db_session.query(EmailAnalysis).one().application_id == application.id
+    assert application.stage == "interview"
+
+
+def test_a_bad_row_does_not_cost_the_rest_of_the_batch(db_session):
+    from app.db.models import Company, Email
+    from app.db.repositories.bulk_persist_repo import BulkPersistRepository
+    from app.services.company_domains import CompanyDomainIndex
+
+    broken = _email("2")
+    broken.sender = None  # emails.sender is NOT NULL
+    index = CompanyDomainIndex()
+
+    result = BulkPersistRepository(db_session).save([_email("1"), broken, _email("3")], index)
+
+    assert result.saved == 2
+    assert [key for key, _ in result.failed] == ["<2@acme.example>"]
+    assert sorted(e.uid for e in db_session.query(Email)) == ["1", "3"]
+    company = db_session.query(Company).one()
+    assert (company.domain, index.lookup("talent@acme.com").company_id) == ("acme.com", company.id)
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+from app.llm.base import EmailClassification
+from app.llm.cache import SOURCE_CACHE_HIT, CachingClassifier, classification_cache_key
+from app.services.email_service import EmailData
+
+
+class _CountingClassifier:
+    provider_name = "fake"
+    model = "fake-model"
+    prompt_version = 1
+
+    def __init__(self, result=None):
+        self.calls = 0
+        self.result = result or EmailClassification(
+            is_application=True, company="Acme", position="SRE", stage="applied",
+            confidence="high",
+        )
+
+    def classify_email(self, sender, subject, body):
+        self.calls += 1
+        return self.result
+
+
+def test_cache_key_ignores_whitespace_and_text_past_the_prompt_window():
+    classifier = _CountingClassifier()
+    key = classification_cache_key(classifier, "Jobs@Acme.example", "Your  application", "Hi")
+
+    assert key == classification_cache_key(
+        classifier, " jobs@acme.example ", "Your application", " Hi\n"
+    )
+    assert classification_cache_key(classifier, "a@b.example", "S", "x" * 2000 + "tail") == (
+        classification_cache_key(classifier, "a@b.example", "S", "x" * 2000)
+    )
+    assert key != classification_cache_key(
+        classifier, "jobs@acme.example", "Your application", "Bye"
+    )
+
+    classifier.prompt_version = 2
+    assert key != classification_cache_key(
+        classifier, "jobs@acme.example", "Your application", "Hi"
+    )
+
+
+def test_repeated_emails_are_answered_from_memory():
+    inner = _CountingClassifier()
+    cache = CachingClassifier(inner)
+
+    first = cache.classify_email("a@acme.example", "Thanks for applying", "We got it")
+    second = cache.classify_email("a@acme.example", "Thanks for applying", "We got it")
+
+    assert inner.calls == 1
+    assert first.source is None
+    assert second.source == SOURCE_CACHE_HIT
+    assert second.company == "Acme"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_answers_that_skipped_the_llm_are_not_cached():
+    class _Repository:
+        def __init__(self):
+            self.rows = {}
+
+        def get(self, key, now):
+            return self.rows.get(key)
+
+        def put(self, key, payload, **fields):
+            self.rows[key] = payload
+
+    inner = _CountingClassifier(
+        EmailClassification(is_application=True, confidence="high", source="near_duplicate")
+    )
+    repository = _Repository()
+    cache = CachingClassifier(inner, repository=repository)
+
+    for _ in range(2):
+        result = cache.classify_email("a@acme.example", "Thanks for applying", "We got it")
+
+    assert inner.calls == 2
+    assert result.source == "near_duplicate"
+    assert repository.rows == {}
+
+
+def test_lru_evicts_least_recently_used_entries():
+    inner = _CountingClassifier()
+    cache = CachingClassifier(inner, max_entries=2)
+
+    for subject in ["a", "b", "a", "c", "a", "b"]:
+        cache.classify_email("x@example.test", subject, "")
+
+    # "b" was evicted when "c" arrived; "a" stayed hot.
+    assert inner.calls == 4
+
+
+def test_empty_results_are_not_cached():
+    inner = _CountingClassifier()
+    inner.result = None
+    cache = CachingClassifier(inner)
+
+    cache.classify_email("x@example.test", "Hi", "")
+    cache.classify_email("x@example.test", "Hi", "")
+
+    assert inner.calls == 2
+
+
+def test_database_layer_survives_a_new_process_and_expires(db_session):
+    from app.db.repositories.classification_cache_repo import ClassificationCacheRepository
+
+    repo = ClassificationCacheRepository(db_session)
+    CachingClassifier(_CountingClassifier(), repo).classify_email("a@acme.example", "Hi", "Body")
+    db_session.commit()
+
+    inner = _CountingClassifier()
+    result = CachingClassifier(inner, repo).classify_email("a@acme.example", "Hi", "Body")
+
+    assert inner.calls == 0
+    assert result == EmailClassification(
+        is_application=True, company="Acme", position="SRE", stage="applied",
+        confidence="high", source=SOURCE_CACHE_HIT,
+    )
+
+    expired = CachingClassifier(inner, repo, ttl=timedelta(hours=-1))
+    expired.classify_email("b@acme.example", "Hi", "Body")
+    assert repo.purge_expired(datetime.utcnow()) == 1
+    assert repo.purge_expired(datetime.utcnow()) == 0
+    assert inner.calls == 1
+
+
+def test_cache_hits_are_logged(capsys):
+    cache = CachingClassifier(_CountingClassifier())
+    body = "Thank you for applying. Your application is under review."
+    for _ in range(2):
+        EmailData(None, "1", "jobs@acme.example", "Application received", None, body).classify(
+            cache
+        )
+
+    lines = [line for line in capsys.readouterr().out.splitlines() if "LLM classify" in line]
+    assert "outcome=True" in lines[0]
+    assert "provider=fake" in lines[1]
+    assert "outcome=cache_hit" in lines[1]
@@ -0,0 +1,147 @@
+from datetime import UTC, datetime, timedelta
+
+from app.llm.base import EmailClassification
+from app.services.email_service import ClassificationScheduler, EmailData, EmailProcessor
+
+_NOW = datetime(2024, 3, 10, 12, 0, tzinfo=UTC)
+
+
+def _email(uid, sender, subject, days_old=None, body=""):
+    date = None if days_old is None else _NOW - timedelta(days=days_old)
+    return EmailData(f"<{uid}@example.test>", uid, sender, subject, date, body)
+
+
+def _scheduler(open_domains=()):
+    return ClassificationScheduler(open_domains, now=lambda: _NOW)
+
+
+def test_open_application_domain_outranks_patterns_and_recency():
+    scheduler = _scheduler({"acme.example"})
+    emails = [
+        _email("old-auto", "no-reply@shop.example", "Your application was received", 30),
+        _email("fresh", "talent@beta.example", "Your application status", 0),
+        _email("acme", "jobs@careers.acme.example", "Next steps", 20),
+    ]
+
+    assert [e.uid for e in scheduler.order(emails)] == ["acme", "fresh", "old-auto"]
+
+
+def test_stronger_confirmation_patterns_rank_first_and_ties_keep_order():
+    scheduler = _scheduler()
+    emails = [
+        _email("weak-1", "a@x.example", "Interview and offer details"),
+        _email("strong", "b@y.example", "Thank you for applying — we received your application"),
+        _email("weak-2", "c@z.example", "Interview and offer details"),
+    ]
+
+    assert [e.uid for e in scheduler.order(emails)] == ["strong", "weak-1", "weak-2"]
+    assert scheduler.priority(emails[0]) == 0
+
+
+def test_recent_mail_wins_between_otherwise_equal_candidates():
+    scheduler = _scheduler()
+    emails = [_email(str(age), "a@x.example", "Your application", age) for age in (9, 0, 3)]
+
+    assert [e.uid for e in scheduler.order(emails)] == ["0", "3", "9"]
+
+
+class _Classifier:
+    provider_name = "fake"
+
+    def __init__(self):
+        self.subjects = []
+
+    def classify_email(self, sender, subject, body):
+        self.subjects.append(subject)
+        return EmailClassification(is_application=True, confidence="high")
+
+
+def test_processor_spends_a_run_budget_on_the_highest_priority_mail(monkeypatch):
+    # Mailbox order is oldest first, so the interview invitation arrives last.
+    emails = [
+        _email("1", "no-reply@shop.example", "Thank you for applying", 6),
+        _email("2", "news@blog.example", "Weekly digest", 5),
+        _email("3", "no-reply@other.example", "Thank you for applying", 4),
+        _email("4", "talent@acme.example", "Interview invitation — your application", 0),
+    ]
+    classifier = _Classifier()
+    processor = EmailProcessor(
+        classifier, scheduler=_scheduler({"acme.example"}), max_llm_requests=2
+    )
+    monkeypatch.setattr(processor, "iter_emails", lambda limit, checkpoint: iter(emails))
+
+    batches = list(processor.iter_application_batches(10, batch_size=10))
+
+    assert [[e.uid for e in batch] for batch in batches] == [["4", "3"]]
+    assert [e.uid for e in processor.deferred] == ["1"]
+    assert len(classifier.subjects) == 2
+    assert processor.filter_stats.emails == 4
+
+
+def test_scheduled_runs_hold_only_the_candidates_the_budget_covers(monkeypatch):
+    emails = [
+        _email(str(age), "no-reply@shop.example", "Thank you for applying", age)
+        for age in range(40, 0, -1)
+    ]
+    deferred_during_fetch = []
+
+    def fetch(limit, checkpoint):
+        yield from emails
+        deferred_during_fetch.append(len(processor.deferred))
+
+    classifier = _Classifier()
+    processor = EmailProcessor(classifier, scheduler=_scheduler(), max_llm_requests=3)
+    monkeypatch.setattr(processor, "iter_emails", fetch)
+
+    batches = list(processor.iter_application_batches(100, batch_size=10))
+
+    # The overflow is deferred while fetching instead of after the whole mailbox is held.
+    assert deferred_during_fetch == [37]
+    assert [[e.uid for e in batch] for batch in batches] == [["1", "2", "3"]]
+    assert len(classifier.subjects) == 3
+
+
+def test_deferred_mail_competes_with_new_mail_on_the_next_run():
+    carried = _email("carried", "no-reply@shop.example", "Thank you for applying", 1)
+    new = _email("new", "talent@acme.example", "Your application", 0)
+    processor = EmailProcessor(
+        _Classifier(),
+        carry_over=[carried],
+        scheduler=_scheduler({"acme.example"}),
+        max_llm_requests=1,
+    )
+    processor.email_list = [*processor.carry_over, new]
+
+    applications = processor.analyze_emails()
+
+    assert [e.uid for e in applications] == ["new"]
+    assert processor.deferred == [carried]
+
+
+def test_open_sender_domains_skip_rejected_applications(db_session):
+    from app.db.models import Application, Company, Email, EmailAnalysis
+    from app.db.repositories.application_repo import ApplicationRepository
+
+    acme = Company(name="Acme", domain="Acme.example")
+    beta = Company(name="Beta")
+    db_session.add_all([acme, beta])
+    db_session.flush()
+    open_app = Application(company_id=acme.id, position="SWE", stage="interview")
+    closed_app = Application(company_id=beta.id, position="SRE", stage="rejected")
+    db_session.add_all([open_app, closed_app])
+    db_session.flush()
+    for uid, sender, application in (
+        ("1", "Recruiting <jobs@mail.acme.example>", open_app),
+        ("2", "talent@beta.example", closed_app),
+    ):
+        email = Email(uid=uid, sender=sender, received_date=datetime(2024, 3, 1))
+        db_session.add(email)
+        db_session.flush()
+        db_session.add(
+            EmailAnalysis(email_id=email.id, application_id=application.id, is_application=True)
+        )
+    db_session.flush()
+
+    domains = ApplicationRepository(db_session).get_open_sender_domains()
+
+    assert domains == {"mail.acme.example", "acme.example"}
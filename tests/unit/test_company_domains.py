@@ -0,0 +1,106 @@
+from datetime import datetime
+
+from app.llm.base import EmailClassification
+from app.services.company_domains import (
+    CompanyDomainIndex,
+    base_domain,
+    is_corporate_domain,
+    name_matches_domain,
+)
+from app.services.email_service import EmailData, EmailProcessor
+
+
+class _Classifier:
+    provider_name = "fake"
+
+    def __init__(self, result):
+        self.result = result
+
+    def classify_email(self, sender, subject, body):
+        return self.result
+
+
+def test_only_corporate_domains_owned_by_the_company_are_learned():
+    assert base_domain("talent.acme.com") == "acme.com"
+    assert base_domain("jobs.acme.co.uk") == "acme.co.uk"
+    assert is_corporate_domain("acme.com")
+    assert not is_corporate_domain("mail.greenhouse.io")
+    assert not is_corporate_domain("us.icims.com")
+    assert not is_corporate_domain("gmail.com")
+
+    assert name_matches_domain("Acme Corp", "acme.com")
+    assert name_matches_domain("Acme", "acmecorp.io")
+    assert name_matches_domain("Blue Origin, LLC", "blueorigin.com")
+    assert not name_matches_domain("Acme", "hays.com")
+    assert name_matches_domain("Acme Labs", "acme.com")
+    assert name_matches_domain("International Business Machines", "ibm.com")
+    # Prefix collisions with agencies and lookalikes are not the company.
+    assert not name_matches_domain("Global Payments", "globalrecruiters.com")
+    assert not name_matches_domain("Meta", "metacareers-agency.com")
+    assert not name_matches_domain("Acme", "acmestaffing.com")
+    assert not name_matches_domain("Acme Robotics", "acmerobot.io")
+    # Two-letter acronyms are mostly unrelated companies.
+    assert not name_matches_domain("Global Payments", "gp.com")
+
+    index = CompanyDomainIndex()
+    assert index.learn("Recruiter <jane@hays.com>", 1, "Acme") is None
+    assert index.learn("no-reply@us.greenhouse-mail.io", 1, "Acme") is None
+    assert index.learn("Talent <talent@careers.acme.com>", 1, "Acme") == "acme.com"
+    # A domain belongs to the first company that claimed it.
+    assert index.learn("hr@acme.com", 2, "Acme Labs") is None
+    assert index.lookup("people@acme.com").company_id == 1
+    assert index.lookup("jobs@greenhouse.io") is None
+
+
+def test_known_sender_domains_override_the_llm_company():
+    classifier = _Classifier(
+        EmailClassification(
+            is_application=True, company="ACME Corporation Inc.", position="SRE",
+            stage="interview", confidence="high",
+        )
+    )
+    index = CompanyDomainIndex.from_rows([("acme.com", 4, "Acme")])
+    processor = EmailProcessor(classifier, companies=index)
+    processor.email_list = [
+        EmailData(
+            "<1@acme.example>", "1", "Talent <talent@eu.acme.com>",
+            "Interview invitation: SRE", datetime(2024, 5, 2),
+            "We'd like to schedule an interview for the SRE role.",
+        )
+    ]
+
+    [email_data] = processor.analyze_emails()
+
+    assert (email_data.company, email_data.company_id) == ("Acme", 4)
+    assert processor.company_domain_hits == 1
+
+
+def test_persisting_learns_the_sender_domain_once(db_session):
+    from app import worker
+    from app.db.models import Application, Company, EmailAnalysis
+    from app.db.repositories.company_repo import CompanyRepository
+
+    def _email(day, company_id=None):
+        email_data = EmailData(
+            f"<{day}@acme.example>", str(day), "talent@acme.com", "Application received",
+            datetime(2024, 5, day), "Thanks for applying.",
+        )
+        email_data.is_application = True
+        email_data.company, email_data.position = "Acme", "SRE"
+        email_data.stage, email_data.confidence = "applied", "high"
+        email_data.company_id = company_id
+        return email_data
+
+    index = CompanyDomainIndex.from_rows(CompanyRepository(db_session).get_domains())
+    assert worker._persist_application_emails(db_session, [_email(1)], index).saved == 1
+
+    company = db_session.query(Company).one()
+    assert company.domain == "acme.com"
+    assert CompanyRepository(db_session).get_domains() == [("acme.com", company.id, "Acme")]
+    entry = index.lookup("talent@acme.com")
+    assert entry.company_id == company.id
+
+    result = worker._persist_application_emails(db_session, [_email(2, entry.company_id)], index)
+    assert result.saved == 1
+    application = db_session.query(Application).one()
+    assert [a.application_id for a in db_session.query(EmailAnalysis)] == [application.id] * 2
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from app.email_client import html_text
+from app.email_client.client import _normalize_body_text
+from app.email_client.html_text import html_to_text
+
+_EDGE_CASES = [
+    "",
+    "plain text, no markup",
+    "<html><head><style>p{color:red}</style><script>var a = 1 < 2;</script></head>"
+    "<body><p>Thank you for applying</p></body></html>",
+    "<ul><li>One</li><li>Two</li></ul><table><tr><td>A</td><td>B</td></tr></table>",
+    "<p>Fish &amp; Chips&nbsp;&mdash; &lt;tag&gt; &copy &unknown; &#8217; &#x2014; &#150;</p>",
+    "<p>bad refs &#0; &#xD800; &#99999999; &#x; &# done</p>",
+    "<pre>  keep\n  this  </pre><textarea>\n </textarea><p>\n </p>",
+    "<div>unclosed <b>bold <i>italic</div> tail</b>",
+    "text<br>more</br>after<br/>end</br>last",
+    "<!DOCTYPE html><!-- hidden --><![CDATA[cdata text]]><?xml version='1.0'?>x",
+    "<SCRIPT>upper()</SCRIPT><Style>x{}</Style>visible",
+    "<p>stray < and > and </ and & signs",
+    "<script>never closed <p>inside",
+]
+
+_FRAGMENTS = [
+    "<p>", "</p>", "<div class='x'>", "</div>", "<br>", "<br/>", "</br>", "<hr>",
+    "<script>var a=1<2;</script>", "<style>p{}</style>", "<script/>", "</script>",
+    "<!-- c -->", "<![CDATA[z]]>", "<!DOCTYPE html>", "<?xml?>", "<!x>",
+    "&amp;", "&amp", "&nbsp;", "&#8217;", "&#x2014;", "&#128;", "&#0;", "&foo;", "& ", "&#",
+    "<b>", "</b>", "<table><tr><td>", "</td></tr></table>", "<li>", "</ul>", "<p/>",
+    "<pre> x </pre>", "<pre>", "</pre>", "<textarea>", "</textarea>",
+    "<a href='https://acme.example'>", "</a>", "<img src=x>", "</img>", "<img/>",
+    "\n", "  ", " \n ", "text ", "Interview ", "<", ">", "</", "'", '"',
+]
+
+
+def _generated_corpus(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(1, 40)))
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("html", _EDGE_CASES)
+def test_stdlib_renderer_matches_bs4_on_edge_cases(html: str) -> None:
+    assert html_to_text(html, "stdlib") == html_to_text(html, "bs4")
+
+
+def test_stdlib_renderer_matches_bs4_on_generated_corpus() -> None:
+    mismatches = [
+        html
+        for html in _generated_corpus(3000, seed=7)
+        if html_to_text(html, "stdlib") != html_to_text(html, "bs4")
+    ]
+
+    assert mismatches == []
+
+
+def test_stdlib_renderer_drops_script_and_style_and_separates_blocks() -> None:
+    html = _EDGE_CASES[2] + _EDGE_CASES[3]
+
+    assert _normalize_body_text(html_to_text(html)) == "Thank you for applying One Two A B"
+
+
+def test_unknown_renderer_is_rejected() -> None:
+    with pytest.raises(ValueError, match="Invalid HTML_RENDERER value"):
+        html_to_text("<p>x</p>", "html5lib")
+
+
+def test_lxml_renderer_falls_back_to_stdlib_when_not_installed(monkeypatch) -> None:  # noqa: ANN001
+    monkeypatch.setattr(html_text, "_lxml_html", None)
+
+    assert html_text.get_renderer("lxml") is html_text._render_stdlib
+
+
+def test_lxml_renderer_matches_after_normalization() -> None:
+    pytest.importorskip("lxml.html")
+    # lxml tokenizes malformed markup differently, so only well-formed mail is compared
+    # and only after the whitespace normalization every body goes through.
+    for html in _EDGE_CASES[2:5]:
+        assert _normalize_body_text(html_to_text(html, "lxml")) == _normalize_body_text(
+            html_to_text(html, "bs4")
+        )
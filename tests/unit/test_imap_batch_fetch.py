@@ -0,0 +1,127 @@
+from app.email_client import client
+from app.email_client.client import FetchOptions
+from tests.unit.imap_fakes import fetch_response
+from tests.unit.test_phase3_email_parser import _build_email_bytes
+
+
+class _RecordingMail:
+    def __init__(self, raw_by_uid: dict[int, bytes]) -> None:
+        self._raw_by_uid = raw_by_uid
+        self.fetches: list[str] = []
+        self.items: list[str] = []
+
+    def uid(self, command, *args):  # noqa: ANN001
+        if command == "search":
+            return "OK", [b" ".join(str(uid).encode() for uid in sorted(self._raw_by_uid))]
+        if command == "fetch":
+            self.fetches.append(args[0])
+            self.items.append(args[1])
+            return "OK", fetch_response(self._raw_by_uid, args[0], args[1])
+        raise AssertionError(f"Unexpected IMAP command: {command}")
+
+    def close(self) -> None:
+        return None
+
+    def logout(self) -> None:
+        return None
+
+
+def test_format_uid_set_collapses_ranges():
+    uids = [b"1001", b"1002", b"1003", b"1005", b"1007", b"1008"]
+
+    assert client._format_uid_set(uids) == "1001:1003,1005,1007:1008"
+    assert client._format_uid_set([b"42"]) == "42"
+
+
+def test_fetch_recent_emails_batches_uid_sets(monkeypatch):
+    raw_by_uid = {
+        uid: _build_email_bytes(message_id=f"<batch-{uid}@example.test>", body=f"Body {uid}")
+        for uid in (1, 2, 3, 5, 8)
+    }
+    fake_mail = _RecordingMail(raw_by_uid)
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+
+    results = client.fetch_recent_emails(limit=10, options=FetchOptions(batch_size=2))
+
+    assert fake_mail.fetches == ["1:2", "3,5", "8"]
+    assert [r["uid"] for r in results] == ["1", "2", "3", "5", "8"]
+    assert results[3]["message_id"] == "<batch-5@example.test>"
+    assert results[3]["body_text"] == "Body 5"
+
+
+def test_fetch_recent_emails_isolates_failed_batch(monkeypatch, capsys):
+    raw_by_uid = {
+        uid: _build_email_bytes(message_id=f"<iso-{uid}@example.test>", body="x")
+        for uid in range(1, 5)
+    }
+    fake_mail = _RecordingMail(raw_by_uid)
+    original_uid = fake_mail.uid
+
+    def _flaky_uid(command, *args):  # noqa: ANN001
+        if command == "fetch" and args[0] == "1:2":
+            raise OSError("connection reset")
+        return original_uid(command, *args)
+
+    fake_mail.uid = _flaky_uid
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+
+    results = client.fetch_recent_emails(limit=10, options=FetchOptions(batch_size=2))
+
+    assert [r["uid"] for r in results] == ["3", "4"]
+    assert "Error fetching UIDs 1:2: connection reset" in capsys.readouterr().out
+
+
+def test_header_first_skips_body_download_for_job_alerts(monkeypatch, capsys):
+    raw_by_uid = {
+        1: _build_email_bytes(
+            message_id="<alert@example.test>",
+            sender="alerts@indeed.com",
+            subject="Job alert: 25 new Backend Engineer roles",
+            body="Apply now!",
+        ),
+        2: _build_email_bytes(
+            message_id="<confirm@example.test>",
+            sender="no-reply@greenhouse.io",
+            subject="Thank you for applying to Acme",
+            body="We received your application.",
+        ),
+        3: _build_email_bytes(
+            message_id="<digest@example.test>",
+            sender="news@example.test",
+            subject="New jobs matching your profile",
+            body="Plenty of new roles this week.",
+        ),
+    }
+    fake_mail = _RecordingMail(raw_by_uid)
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+
+    results = client.fetch_recent_emails(
+        limit=10, options=FetchOptions(batch_size=10, header_first=True)
+    )
+
+    # Only the job board alert is settled by its headers; the digest's body may still
+    # confirm an application, so it is downloaded for quick_filter.
+    assert [r["message_id"] for r in results] == [
+        "<confirm@example.test>", "<digest@example.test>",
+    ]
+    assert results[0]["body_text"] == "We received your application."
+    assert fake_mail.fetches == ["1:3", "2:3"]
+    assert "HEADER.FIELDS" in fake_mail.items[0]
+    assert fake_mail.items[1] == "(UID RFC822)"
+    assert "Header filter: skipping 1 before body download" in capsys.readouterr().out
+
+
+def test_header_first_skips_batch_without_survivors(monkeypatch):
+    raw_by_uid = {
+        1: _build_email_bytes(
+            message_id="<a@example.test>", sender="alerts@indeed.com", subject="Job alert: SRE"
+        ),
+        2: _build_email_bytes(message_id=None, subject="Application status"),
+    }
+    fake_mail = _RecordingMail(raw_by_uid)
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+
+    results = client.fetch_recent_emails(limit=10, options=FetchOptions(header_first=True))
+
+    assert results == []
+    assert len(fake_mail.fetches) == 1
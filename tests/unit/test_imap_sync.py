@@ -0,0 +1,207 @@
+import pytest
+
+from app.email_client import client
+from app.email_client.client import SyncCheckpoint
+from app.services.email_service import EmailData
+from tests.unit.imap_fakes import fetch_response
+from tests.unit.test_phase3_email_parser import (
+    _build_email_bytes,
+    _FakeDeferredEmailRepository,
+    _FakeProcessor,
+    _FakeWorkerRunRepository,
+)
+
+
+class _SyncFakeMail:
+    def __init__(self, raw_by_uid: dict[int, bytes], uidvalidity: int | None = 7) -> None:
+        self._raw_by_uid = raw_by_uid
+        self._uidvalidity = uidvalidity
+        self.searches: list[str] = []
+
+    def response(self, code):  # noqa: ANN001
+        assert code == "UIDVALIDITY"
+        value = None if self._uidvalidity is None else str(self._uidvalidity).encode()
+        return code, [value]
+
+    def uid(self, command, *args):  # noqa: ANN001
+        if command == "search":
+            criteria = args[1]
+            self.searches.append(criteria)
+            uids = sorted(self._raw_by_uid)
+            if criteria.startswith("UID "):
+                low = int(criteria.split()[1].split(":")[0])
+                # Real servers always include the highest UID in an `n:*` search.
+                uids = [uid for uid in uids if uid >= low] or uids[-1:]
+            return "OK", [b" ".join(str(uid).encode() for uid in uids)]
+        if command == "fetch":
+            return "OK", fetch_response(self._raw_by_uid, args[0], args[1])
+        raise AssertionError(f"Unexpected IMAP command: {command}")
+
+    def close(self) -> None:
+        return None
+
+    def logout(self) -> None:
+        return None
+
+
+def _mailbox(uids: range) -> dict[int, bytes]:
+    return {
+        uid: _build_email_bytes(message_id=f"<sync-{uid}@example.test>", body=f"Body {uid}")
+        for uid in uids
+    }
+
+
+def test_first_sync_takes_newest_and_sets_checkpoint(monkeypatch):
+    fake_mail = _SyncFakeMail(_mailbox(range(1, 6)))
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+    checkpoint = SyncCheckpoint()
+
+    results = client.fetch_recent_emails(limit=2, checkpoint=checkpoint)
+
+    assert [r["uid"] for r in results] == ["4", "5"]
+    assert fake_mail.searches == ["ALL"]
+    assert checkpoint == SyncCheckpoint(uidvalidity=7, last_uid=5)
+
+
+def test_incremental_sync_searches_only_new_uids(monkeypatch):
+    fake_mail = _SyncFakeMail(_mailbox(range(1, 10)))
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+    checkpoint = SyncCheckpoint(uidvalidity=7, last_uid=5)
+
+    results = client.fetch_recent_emails(limit=3, checkpoint=checkpoint)
+
+    assert fake_mail.searches == ["UID 6:*"]
+    # Oldest new mail first so the backlog drains without gaps.
+    assert [r["uid"] for r in results] == ["6", "7", "8"]
+    assert checkpoint.last_uid == 8
+
+
+def test_incremental_sync_with_no_new_mail(monkeypatch, capsys):
+    fake_mail = _SyncFakeMail(_mailbox(range(1, 4)))
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+    checkpoint = SyncCheckpoint(uidvalidity=7, last_uid=3)
+
+    results = client.fetch_recent_emails(limit=10, checkpoint=checkpoint)
+
+    assert results == []
+    assert checkpoint.last_uid == 3
+    assert "No new emails since UID 3" in capsys.readouterr().out
+
+
+def test_uidvalidity_change_triggers_full_resync(monkeypatch, capsys):
+    fake_mail = _SyncFakeMail(_mailbox(range(1, 4)), uidvalidity=99)
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+    checkpoint = SyncCheckpoint(uidvalidity=7, last_uid=500)
+
+    results = client.fetch_recent_emails(limit=10, checkpoint=checkpoint)
+
+    assert fake_mail.searches == ["ALL"]
+    assert len(results) == 3
+    assert checkpoint == SyncCheckpoint(uidvalidity=99, last_uid=3)
+    assert "UIDVALIDITY changed (7 -> 99)" in capsys.readouterr().out
+
+
+def test_sync_state_repository_round_trip(db_session):
+    from app.db.repositories.sync_state_repo import SyncStateRepository
+
+    repo = SyncStateRepository(db_session)
+    assert repo.get_checkpoint("me@example.test", "inbox") == SyncCheckpoint()
+
+    repo.save_checkpoint("me@example.test", "inbox", SyncCheckpoint(uidvalidity=7, last_uid=42))
+    repo.save_checkpoint("me@example.test", "inbox", SyncCheckpoint(uidvalidity=7, last_uid=50))
+    db_session.commit()
+
+    assert repo.get_checkpoint("me@example.test", "inbox") == SyncCheckpoint(7, 50)
+    assert repo.get_checkpoint("me@example.test", "archive") == SyncCheckpoint()
+
+
+@pytest.mark.parametrize("save_fails", [False, True])
+def test_worker_saves_checkpoint_after_run(monkeypatch, save_fails):
+    import importlib
+    from types import SimpleNamespace
+
+    import app.config as app_config
+
+    monkeypatch.setattr(
+        app_config,
+        "get_settings",
+        lambda: SimpleNamespace(database_url="sqlite:///:memory:"),
+    )
+    worker_module = importlib.reload(importlib.import_module("app.worker"))
+    from app.db.repositories.bulk_persist_repo import BulkSaveResult
+
+    saved: list[SyncCheckpoint] = []
+
+    class _FakeSession:
+        def commit(self) -> None:
+            return None
+
+        def close(self) -> None:
+            return None
+
+    class _FakeSyncStateRepository:
+        def __init__(self, session):  # noqa: ANN001
+            self.session = session
+
+        def get_checkpoint(self, account, mailbox):  # noqa: ANN001
+            return SyncCheckpoint(uidvalidity=7, last_uid=10)
+
+        def save_checkpoint(self, account, mailbox, checkpoint):  # noqa: ANN001
+            saved.append(checkpoint)
+
+    class _FakeBulkPersistRepository:
+        def __init__(self, session):  # noqa: ANN001
+            self.session = session
+
+        def save(self, emails, **options):  # noqa: ANN001
+            if save_fails:
+                return BulkSaveResult(failed=[(e.message_id, "boom") for e in emails])
+            return BulkSaveResult(saved=len(emails))
+
+    monkeypatch.setattr(
+        worker_module,
+        "get_settings",
+        lambda: SimpleNamespace(
+            email_limit=5,
+            email_user="me@example.test",
+            imap_mailbox="inbox",
+            imap_incremental_sync=True,
+            imap_fetch_batch_size=50,
+            imap_header_first=False,
+            imap_partial_bodies=False,
+            imap_body_max_bytes=16384,
+            email_parse_workers=0,
+            html_renderer="stdlib",
+            email_body_max_chars=0,
+            job_board_extra_domains="",
+            llm_max_concurrency=1,
+            llm_batch_size=1,
+            llm_daily_request_limit=0,
+            llm_max_requests_per_run=0,
+            db_persist_batch_size=100,
+            persist_rejected_emails=True,
+        ),
+    )
+    monkeypatch.setattr(worker_module.models.Base.metadata, "create_all", lambda bind: None)
+    monkeypatch.setattr(worker_module, "_build_classifier", lambda session: object())
+    monkeypatch.setattr(worker_module, "_build_scheduler", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_threads", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_companies", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_known_emails", lambda session: None)
+    monkeypatch.setattr(
+        _FakeProcessor,
+        "application_emails",
+        [EmailData("<a@example.test>", "11", "a@example.test", "s", None, "")],
+    )
+    monkeypatch.setattr(_FakeProcessor, "last_uid", 12)
+    monkeypatch.setattr(worker_module, "EmailProcessor", _FakeProcessor)
+    monkeypatch.setattr(worker_module, "SessionLocal", lambda: _FakeSession())
+    monkeypatch.setattr(worker_module, "WorkerRunRepository", _FakeWorkerRunRepository)
+    monkeypatch.setattr(worker_module, "DeferredEmailRepository", _FakeDeferredEmailRepository)
+    monkeypatch.setattr(worker_module, "SyncStateRepository", _FakeSyncStateRepository)
+    monkeypatch.setattr(worker_module, "BulkPersistRepository", _FakeBulkPersistRepository)
+
+    worker_module.run()
+
+    # An email that could not be stored must be fetched again next run.
+    assert saved == ([] if save_fails else [SyncCheckpoint(uidvalidity=7, last_uid=12)])
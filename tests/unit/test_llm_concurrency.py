@@ -0,0 +1,189 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app.llm import rate_limit
+from app.llm.base import EmailClassification
+from app.llm.cache import SOURCE_CACHE_HIT, CachingClassifier
+from app.llm.groq_adapter import GroqAdapter
+from app.llm.ollama_adapter import OllamaAdapter
+from app.llm.rate_limit import TokenBucket
+from app.services.email_service import EmailData, EmailProcessor
+
+_RESPONSE_JSON = (
+    '{"is_application": true, "company": "Acme", "position": "SWE", '
+    '"stage": "applied", "confidence": "high"}'
+)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_token_bucket_spaces_requests_at_the_configured_rate(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    bucket = TokenBucket(rate_per_minute=30)
+
+    # 30/min is one token every 2s; queued callers each wait one interval longer.
+    assert [bucket._reserve() for _ in range(3)] == [0.0, 2.0, 4.0]
+    clock.now += 10
+    assert bucket._reserve() == 0.0
+    assert bucket._reserve() == 2.0
+
+
+def test_token_bucket_burst_allows_an_initial_run(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    bucket = TokenBucket(rate_per_minute=60, burst=3)
+
+    assert [bucket._reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+    with pytest.raises(ValueError):
+        TokenBucket(rate_per_minute=0)
+
+
+class _SlowAsyncClassifier:
+    provider_name = "fake"
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def aclassify_email(self, sender, subject, body):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        # Later emails finish first, so any ordering bug would show.
+        await asyncio.sleep(0.01 / int(subject.split()[-1]))
+        self.in_flight -= 1
+        return EmailClassification(
+            is_application=int(subject.split()[-1]) % 3 != 0, confidence="high"
+        )
+
+    def classify_email(self, sender, subject, body):
+        raise AssertionError("the concurrent path should not call the sync method")
+
+
+def _emails(count: int) -> list[EmailData]:
+    return [
+        EmailData(
+            message_id=f"<{i}@example.test>",
+            uid=str(i),
+            sender="talent@acme.example",
+            subject=f"Thank you for applying {i}",
+            date=None,
+            body="Your application was received. Interview next steps.",
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def test_analyze_emails_fans_out_and_keeps_input_order():
+    classifier = _SlowAsyncClassifier()
+    processor = EmailProcessor(classifier, max_concurrency=4)
+    processor.email_list = _emails(12)
+
+    applications = processor.analyze_emails()
+
+    assert [e.uid for e in applications] == [str(i) for i in range(1, 13) if i % 3]
+    assert classifier.calls == 12
+    assert classifier.peak == 4
+    assert processor.application_count == 8
+
+
+def test_streaming_batches_use_threads_for_sync_classifiers(monkeypatch):
+    class _SyncClassifier:
+        provider_name = "fake"
+
+        def classify_email(self, sender, subject, body):
+            return EmailClassification(is_application=True, confidence="low")
+
+    processor = EmailProcessor(_SyncClassifier(), max_concurrency=3)
+    monkeypatch.setattr(processor, "iter_emails", lambda limit, checkpoint: iter(_emails(7)))
+
+    batches = list(processor.iter_application_batches(10, batch_size=3))
+
+    assert [[e.uid for e in batch] for batch in batches] == [
+        ["1", "2", "3"],
+        ["4", "5", "6"],
+        ["7"],
+    ]
+    assert processor.needs_review_count == 7
+
+
+def test_cache_shares_in_flight_calls_between_identical_emails():
+    classifier = _SlowAsyncClassifier()
+    processor = EmailProcessor(CachingClassifier(classifier), max_concurrency=4)
+    processor.email_list = _emails(1) * 3
+
+    processor.analyze_emails()
+
+    assert classifier.calls == 1
+    assert processor.application_count == 3
+
+
+def test_cache_hit_source_is_kept_for_in_flight_waiters():
+    async def run():
+        cache = CachingClassifier(_SlowAsyncClassifier())
+        return await asyncio.gather(
+            *(cache.aclassify_email("a@b.example", "Applied 1", "") for _ in range(2))
+        )
+
+    first, second = asyncio.run(run())
+
+    assert first.source is None
+    assert second.source == SOURCE_CACHE_HIT
+
+
+def test_groq_async_path_uses_async_client_and_rate_limiter(monkeypatch):
+    requests = []
+
+    class _Completions:
+        async def create(self, **kwargs):
+            requests.append(kwargs)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=_RESPONSE_JSON))]
+            )
+
+    fake_groq = SimpleNamespace(
+        Groq=lambda api_key: SimpleNamespace(),
+        AsyncGroq=lambda api_key: SimpleNamespace(
+            chat=SimpleNamespace(completions=_Completions())
+        ),
+    )
+    monkeypatch.setitem(sys.modules, "groq", fake_groq)
+    adapter = GroqAdapter(api_key="test-key", requests_per_minute=6000)
+    acquired = []
+    original = adapter.rate_limiter.acquire_async
+
+    async def acquire_async():
+        acquired.append(True)
+        await original()
+
+    adapter.rate_limiter.acquire_async = acquire_async
+
+    result = asyncio.run(adapter.aclassify_email("jobs@acme.example", "Applied", "Body"))
+
+    assert result.company == "Acme"
+    assert requests[0]["model"] == adapter.model
+    assert requests[0]["temperature"] == 0
+    assert acquired == [True]
+
+
+def test_ollama_async_path_uses_async_client(monkeypatch):
+    class _AsyncClient:
+        async def chat(self, **kwargs):
+            return {"message": {"content": _RESPONSE_JSON}}
+
+    monkeypatch.setattr("app.llm.ollama_adapter.ollama.AsyncClient", _AsyncClient)
+
+    result = asyncio.run(OllamaAdapter().aclassify_email("jobs@acme.example", "Applied", "Body"))
+
+    assert result.position == "SWE"
@@ -0,0 +1,184 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.email_client.quick_filter import REASON_CONFIRMATION
+from app.llm.base import EmailClassification
+from app.services.email_service import EmailData, EmailProcessor
+
+_DAY = date(2024, 3, 1)
+
+
+@pytest.fixture
+def session_factory(db_session):
+    return sessionmaker(bind=db_session.get_bind())
+
+
+def _quota(session_factory, daily_limit=10, priority_reserve=0):
+    from app.services.quota import LLMQuota
+
+    return LLMQuota(
+        session_factory, "groq", daily_limit, priority_reserve, today=lambda: _DAY
+    )
+
+
+def test_reservations_are_capped_by_the_shared_daily_limit(session_factory):
+    first, second = _quota(session_factory), _quota(session_factory)
+
+    assert first.reserve(6) == 6
+    assert second.reserve(6) == 4
+    assert second.reserve(1) == 0
+    assert first.status().remaining == 0
+
+
+def test_settle_records_usage_and_releases_the_rest(session_factory):
+    quota = _quota(session_factory)
+    quota.reserve(8)
+
+    quota.settle(used=3)
+
+    status = quota.status()
+    assert (status.used, status.reserved, status.remaining) == (3, 0, 7)
+    assert quota.reserved == 0
+
+
+def test_priority_reserve_is_kept_for_high_priority_requests(session_factory):
+    quota = _quota(session_factory, daily_limit=10, priority_reserve=4)
+
+    assert quota.reserve(10) == 6
+    assert quota.reserve(10, high_priority=True) == 4
+    assert quota.status().to_dict() == {
+        "provider": "groq",
+        "day": "2024-03-01",
+        "daily_limit": 10,
+        "used": 0,
+        "reserved": 10,
+        "remaining": 0,
+    }
+
+
+class _Provider:
+    provider_name = "fake"
+
+    def __init__(self):
+        self.request_count = 0
+
+    def classify_email(self, sender, subject, body):
+        self.request_count += 1
+        return EmailClassification(is_application=True, confidence="high")
+
+
+def _email(uid, subject):
+    return EmailData(f"<{uid}@example.test>", uid, "talent@acme.example", subject, None, "")
+
+
+def test_processor_defers_what_the_budget_cannot_cover(monkeypatch, session_factory):
+    reasons = {"confirm": REASON_CONFIRMATION, "maybe": "keyword_score"}
+    monkeypatch.setattr(
+        "app.services.email_service.quick_filter_reason",
+        lambda sender, subject, body, stats=None: (
+            subject.split()[0] in reasons,
+            reasons.get(subject.split()[0], "no_signal"),
+        ),
+    )
+    provider = _Provider()
+    quota = _quota(session_factory, daily_limit=4, priority_reserve=1)
+    processor = EmailProcessor(provider, quota=quota)
+    processor.email_list = [
+        _email("1", "maybe 1"),
+        _email("2", "maybe 2"),
+        _email("3", "skip"),
+        _email("4", "maybe 3"),
+        _email("5", "confirm 1"),
+    ]
+
+    applications = processor.analyze_emails()
+
+    # The confirmation is admitted first; normal emails stop at the reserve.
+    assert [e.uid for e in applications] == ["1", "2", "5"]
+    assert [e.uid for e in processor.deferred] == ["4"]
+    assert processor.deferred[0].is_application is None
+
+    processor.settle_quota()
+    status = quota.status()
+    assert (status.used, status.reserved) == (3, 0)
+
+
+def test_requests_served_by_the_fallback_provider_are_charged(session_factory):
+    from app.llm.errors import LLMProviderError
+    from app.llm.resilience import ResilientClassifier
+
+    class _DownProvider(_Provider):
+        def classify_email(self, sender, subject, body):
+            self.request_count += 1
+            raise LLMProviderError("unavailable", status_code=503)
+
+    primary, fallback = _DownProvider(), _Provider()
+    quota = _quota(session_factory)
+    processor = EmailProcessor(
+        ResilientClassifier(primary, fallbacks=[fallback], max_retries=0), quota=quota
+    )
+    processor.email_list = [_email(uid, "Thank you for applying") for uid in ("1", "2")]
+
+    processor.analyze_emails()
+    processor.settle_quota()
+
+    # The primary's failed attempts and the fallback's answers both count.
+    assert (primary.request_count, fallback.request_count) == (2, 2)
+    assert quota.status().used == 4
+
+
+def test_carried_over_emails_are_classified_before_new_mail(monkeypatch):
+    processor = EmailProcessor(_Provider(), carry_over=[_email("old", "Thank you for applying")])
+    monkeypatch.setattr(
+        "app.services.email_service.iter_emails",
+        lambda limit, checkpoint=None, options=None: iter(
+            [{"uid": "new", "sender": "a@b.example", "subject": "Hi", "body_text": "",
+              "received_date": None}]
+        ),
+    )
+
+    assert [e.uid for e in processor.iter_emails(10)] == ["old", "new"]
+    assert processor.fetched_count == 1
+
+
+def test_deferred_email_repository_round_trip(db_session):
+    from app.db.repositories.deferred_email_repo import DeferredEmailRepository
+
+    repo = DeferredEmailRepository(db_session)
+    email = _email("9", "Interview")
+    email.date = datetime(2024, 3, 1, 9, 30)
+
+    repo.add(email, reason="llm_quota")
+    assert repo.add(email, reason="llm_quota") is None
+    db_session.commit()
+
+    rows = repo.get_all()
+    assert [(r.uid, r.subject, r.received_date, r.reason) for r in rows] == [
+        ("9", "Interview", datetime(2024, 3, 1, 9, 30), "llm_quota")
+    ]
+    repo.delete(rows)
+    db_session.commit()
+    assert repo.count() == 0
+
+
+def test_jobs_api_reports_remaining_budget(monkeypatch, db_session, session_factory):
+    from app.api.v1 import jobs
+    from app.services import quota as quota_module
+
+    _quota(session_factory, daily_limit=100).reserve(30)
+    monkeypatch.setattr(quota_module, "utc_today", lambda: _DAY)
+    monkeypatch.setattr(jobs, "utc_today", lambda: _DAY)
+    monkeypatch.setattr(
+        jobs,
+        "get_settings",
+        lambda: SimpleNamespace(llm_provider="Groq", llm_daily_request_limit=100),
+    )
+
+    body = jobs.get_llm_quota(db_session)
+
+    assert body["remaining"] == 70
+    assert body["reserved"] == 30
+    assert body["deferred_emails"] == 0
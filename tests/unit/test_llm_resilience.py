@@ -0,0 +1,271 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app.llm import rate_limit, resilience
+from app.llm.base import EmailClassification
+from app.llm.errors import LLMProviderError, LLMResponseError, provider_error
+from app.llm.factory import build_classifier
+from app.llm.groq_adapter import GroqAdapter
+from app.llm.rate_limit import TokenBucket
+from app.llm.resilience import CircuitBreaker, ResilientClassifier
+
+_EMAIL = ("jobs@acme.example", "Applied", "Thanks for applying")
+
+
+class _Provider:
+    def __init__(self, name, failures=(), rate_limiter=None):
+        self.provider_name = name
+        self.failures = list(failures)
+        self.rate_limiter = rate_limiter
+        self.calls = 0
+
+    def classify_email(self, sender, subject, body):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return EmailClassification(is_application=True, company=self.provider_name)
+
+    async def aclassify_email(self, sender, subject, body):
+        return self.classify_email(sender, subject, body)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(resilience.time, "sleep", clock.sleep)
+    # Backoff draws its jitter from [0, cap]; taking the cap keeps delays predictable.
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    return clock
+
+
+def _error(status=None, retry_after=None):
+    return LLMProviderError("boom", status_code=status, retry_after=retry_after)
+
+
+def test_provider_error_keeps_status_and_retry_after():
+    response = SimpleNamespace(status_code=429, headers={"retry-after": "7"})
+    exc = provider_error("Groq failed.", ConnectionResetError("reset by peer"))
+    assert exc.status_code is None and exc.retryable
+
+    sdk_error = RuntimeError("rate limited")
+    sdk_error.response = response
+    exc = provider_error("Groq failed.", sdk_error)
+    assert (exc.status_code, exc.retry_after, exc.rate_limited) == (429, 7.0, True)
+
+    sdk_error.response = SimpleNamespace(
+        status_code=503, headers={"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    )
+    exc = provider_error("Groq failed.", sdk_error)
+    assert exc.retry_after == 0.0
+    assert not _error(401).retryable
+
+
+def test_retry_after_is_honored_and_pauses_the_rate_limiter(clock):
+    paused = []
+    limiter = SimpleNamespace(pause=paused.append)
+    provider = _Provider("groq", [_error(429, retry_after=2.5)], rate_limiter=limiter)
+    classifier = ResilientClassifier(provider)
+
+    result = classifier.classify_email(*_EMAIL)
+
+    assert result.company == "groq"
+    assert clock.sleeps == [2.5]
+    assert paused == [2.5]
+    assert classifier.breakers[0].failures == 0
+
+
+def test_server_errors_back_off_exponentially(clock):
+    provider = _Provider("ollama", [_error(503), _error(None), _error(500)])
+    classifier = ResilientClassifier(provider, base_delay=0.5, max_delay=60)
+
+    assert classifier.classify_email(*_EMAIL).company == "ollama"
+    assert clock.sleeps == [0.5, 1.0, 2.0]
+    assert classifier.retries == 3
+
+
+def test_non_retryable_errors_fail_over_without_waiting(clock):
+    primary = _Provider("groq", [_error(401)])
+    fallback = _Provider("ollama")
+    classifier = ResilientClassifier(primary, fallbacks=[fallback])
+
+    assert classifier.classify_email(*_EMAIL).company == "ollama"
+    assert clock.sleeps == []
+    assert classifier.failovers == 1
+
+
+def test_long_retry_after_fails_over_instead_of_sleeping(clock):
+    primary = _Provider("groq", [_error(429, retry_after=3600)])
+    classifier = ResilientClassifier(primary, fallbacks=[_Provider("ollama")], max_delay=30)
+
+    assert classifier.classify_email(*_EMAIL).company == "ollama"
+    assert clock.sleeps == []
+
+
+def test_exhausted_retries_raise_the_last_provider_error(clock):
+    classifier = ResilientClassifier(_Provider("groq", [_error(502)] * 3), max_retries=2)
+
+    with pytest.raises(LLMProviderError) as excinfo:
+        classifier.classify_email(*_EMAIL)
+
+    assert excinfo.value.status_code == 502
+    assert len(clock.sleeps) == 2
+
+
+def test_unusable_output_is_not_retried(clock):
+    provider = _Provider("groq", [LLMResponseError("not json")])
+    classifier = ResilientClassifier(provider, fallbacks=[_Provider("ollama")])
+
+    with pytest.raises(LLMResponseError):
+        classifier.classify_email(*_EMAIL)
+    assert provider.calls == 1
+
+
+def test_open_circuit_skips_the_provider_until_a_trial_succeeds(clock):
+    primary = _Provider("groq", [_error(503)] * 3)
+    fallback = _Provider("ollama")
+    classifier = ResilientClassifier(
+        primary, fallbacks=[fallback], max_retries=1, failure_threshold=3, reset_timeout=60
+    )
+
+    classifier.classify_email(*_EMAIL)
+    classifier.classify_email(*_EMAIL)
+    assert classifier.breakers[0].state == resilience.STATE_OPEN
+    calls = primary.calls
+
+    assert classifier.classify_email(*_EMAIL).company == "ollama"
+    assert primary.calls == calls
+
+    clock.now += 61
+    assert classifier.breakers[0].state == resilience.STATE_HALF_OPEN
+    assert classifier.classify_email(*_EMAIL).company == "groq"
+    assert classifier.breakers[0].state == resilience.STATE_CLOSED
+
+
+def test_failed_trial_reopens_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == resilience.STATE_OPEN
+
+
+def test_rate_limits_do_not_open_the_circuit(clock):
+    provider = _Provider("groq", [_error(429, retry_after=0.1)] * 5)
+    classifier = ResilientClassifier(provider, max_retries=5, failure_threshold=2)
+
+    assert classifier.classify_email(*_EMAIL).company == "groq"
+    assert classifier.breakers[0].state == resilience.STATE_CLOSED
+
+
+def test_all_circuits_open_raises_provider_error(clock):
+    classifier = ResilientClassifier(_Provider("groq"), failure_threshold=1)
+    classifier.breakers[0].record_failure()
+
+    with pytest.raises(LLMProviderError, match="circuit open for groq"):
+        classifier.classify_email(*_EMAIL)
+
+
+def test_async_path_retries_with_asyncio_sleep(monkeypatch, clock):
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr(resilience.asyncio, "sleep", fake_sleep)
+    classifier = ResilientClassifier(_Provider("groq", [_error(429, retry_after=1.5)]))
+
+    result = asyncio.run(classifier.aclassify_email(*_EMAIL))
+
+    assert result.company == "groq"
+    assert waits == [1.5]
+    assert clock.sleeps == []
+
+
+def test_token_bucket_pause_delays_the_next_caller(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    bucket = TokenBucket(rate_per_minute=60)
+
+    bucket.pause(5)
+
+    assert bucket._reserve() == pytest.approx(5.0)
+
+
+def test_groq_adapter_sends_timeout_and_wraps_status(monkeypatch):
+    monkeypatch.setitem(sys.modules, "groq", SimpleNamespace(Groq=lambda api_key: None))
+    adapter = GroqAdapter(api_key="test-key", requests_per_minute=0, timeout=12)
+    requests = []
+
+    def create(**kwargs):
+        requests.append(kwargs)
+        error = RuntimeError("Too Many Requests")
+        error.status_code = 429
+        error.response = SimpleNamespace(headers={"retry-after": "3"})
+        raise error
+
+    adapter.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+    with pytest.raises(LLMProviderError) as excinfo:
+        adapter.classify_email(*_EMAIL)
+
+    assert requests[0]["timeout"] == 12
+    assert (excinfo.value.status_code, excinfo.value.retry_after) == (429, 3.0)
+
+
+def test_factory_wraps_provider_with_fallback(monkeypatch):
+    monkeypatch.setitem(
+        sys.modules,
+        "app.llm.groq_adapter",
+        SimpleNamespace(GroqAdapter=lambda api_key, **options: "groq"),
+    )
+    monkeypatch.setitem(
+        sys.modules,
+        "app.llm.ollama_adapter",
+        SimpleNamespace(OllamaAdapter=lambda **options: "ollama"),
+    )
+    settings = SimpleNamespace(
+        llm_provider="groq",
+        groq_api_key="test-key",
+        groq_requests_per_minute=30,
+        llm_request_timeout_seconds=30,
+        llm_max_retries=2,
+        llm_retry_base_delay_seconds=1.0,
+        llm_retry_max_delay_seconds=20.0,
+        llm_circuit_failure_threshold=4,
+        llm_circuit_reset_seconds=90.0,
+        llm_fallback_provider="ollama",
+        llm_body_token_budget=350,
+        llm_near_duplicate_max_distance=0,
+        ats_templates_enabled=False,
+        llm_cache_max_entries=0,
+        preclassifier_model_path=None,
+    )
+
+    classifier = build_classifier(settings)
+
+    assert isinstance(classifier, ResilientClassifier)
+    assert classifier.providers == ["groq", "ollama"]
+    assert (classifier.max_retries, classifier.max_delay) == (2, 20.0)
+    assert classifier.breakers[1].reset_timeout == 90.0
@@ -0,0 +1,146 @@
+from datetime import datetime
+
+from app.llm.base import EmailClassification
+from app.llm.near_duplicate import (
+    SOURCE_NEAR_DUPLICATE,
+    NearDuplicateClassifier,
+    NearDuplicateIndex,
+    transplant_field,
+)
+from app.utils.fingerprint import from_signed64, hamming_distance, simhash, to_signed64
+
+_SENDER = "Hiring Team <no-reply@us.greenhouse-mail.io>"
+_CONFIRMATION = """Hi {name},
+Thank you for applying to the {role} position at {company}. We've received your
+application and our team is reviewing it. If your background is a match for the
+{role} role, someone from {company} will reach out to discuss next steps.
+In the meantime, you can check the status of your application in your profile.
+Best,
+{company} Recruiting Team"""
+_REJECTION = """Hello {name},
+Thanks for your interest in {company}! Unfortunately, after careful consideration
+we have decided not to move forward with your candidacy for the {role} role at
+this time. We encourage you to apply to future openings that match your skills.
+Regards, {company} Talent Acquisition"""
+
+
+def _email(template=_CONFIRMATION, company="Acme Robotics", role="Backend Engineer", name="Jo"):
+    subject = f"Thank you for applying to {company}"
+    return _SENDER, subject, template.format(name=name, company=company, role=role)
+
+
+class _CountingClassifier:
+    provider_name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def classify_email(self, sender, subject, body):
+        self.calls.append(subject)
+        return EmailClassification(
+            is_application=True, company="Acme Robotics", position="Backend Engineer",
+            stage="applied", confidence="high",
+        )
+
+
+def test_template_fills_are_near_and_other_templates_are_far():
+    first = simhash(_email()[2])
+    second = simhash(_email(company="Globex", role="Senior Data Scientist", name="Sam")[2])
+    rejection = simhash(_email(_REJECTION)[2])
+
+    assert hamming_distance(first, second) <= 6
+    assert hamming_distance(first, rejection) > 12
+    assert simhash("Thanks, got it.") is None
+    assert from_signed64(to_signed64(2**64 - 1)) == 2**64 - 1
+
+
+def test_band_lookup_finds_every_fingerprint_within_max_distance():
+    index = NearDuplicateIndex(max_distance=6)
+    result = EmailClassification(is_application=False)
+    base = 0x0123_4567_89AB_CDEF
+    index.add(_SENDER, "", "", result, fingerprint=base)
+
+    # Six flipped bits spread over the bands still share one band with the original.
+    near = base ^ sum(1 << bit for bit in (1, 12, 23, 34, 45, 56))
+    far = near ^ (1 << 63)
+    assert index.nearest(_SENDER, near).result is result
+    assert index.nearest(_SENDER, far) is None
+    assert index.nearest("other@lever.co", near) is None
+
+
+def test_transplant_reads_the_same_template_slot():
+    old_subject, old_body = _email()[1:]
+    subject, body = _email(company="Stark Industries", role="SRE")[1:]
+
+    assert transplant_field("Acme Robotics", old_subject, old_body, subject, body) == (
+        "Stark Industries"
+    )
+    assert transplant_field("Backend Engineer", old_subject, old_body, subject, body) == "SRE"
+    assert transplant_field("Initech", old_subject, old_body, subject, body) is None
+
+
+def test_near_duplicates_reuse_stage_with_their_own_company_and_position():
+    inner = _CountingClassifier()
+    classifier = NearDuplicateClassifier(inner)
+
+    classifier.classify_email(*_email())
+    reused = classifier.classify_email(*_email(company="Globex", role="Data Scientist"))
+
+    assert len(inner.calls) == 1
+    assert reused.source == SOURCE_NEAR_DUPLICATE
+    assert (reused.company, reused.position, reused.stage) == (
+        "Globex", "Data Scientist", "applied",
+    )
+    assert (classifier.hits, classifier.misses) == (1, 1)
+
+
+def test_other_senders_and_templates_go_to_the_llm():
+    inner = _CountingClassifier()
+    classifier = NearDuplicateClassifier(inner)
+    sender, subject, body = _email()
+
+    classifier.classify_email(sender, subject, body)
+    classifier.classify_email("jobs@lever.co", subject, body)
+    classifier.classify_email(*_email(_REJECTION, company="Globex"))
+
+    assert len(inner.calls) == 3
+
+
+def test_batches_answer_known_templates_and_send_the_rest():
+    inner = _CountingClassifier()
+    classifier = NearDuplicateClassifier(inner)
+    classifier.classify_email(*_email())
+
+    results = classifier.classify_emails(
+        [_email(company="Hooli", role="SRE"), _email(_REJECTION, company="Hooli")]
+    )
+
+    assert len(inner.calls) == 2
+    assert results[0].source == SOURCE_NEAR_DUPLICATE and results[0].company == "Hooli"
+    assert results[1].source is None
+
+
+def test_stored_emails_seed_the_index(db_session):
+    from app.db.models import EmailAnalysis
+    from app.db.repositories.email_repo import EmailRepository
+
+    repo = EmailRepository(db_session)
+    sender, subject, body = _email()
+    email = repo.create("<1@x>", "1", sender, subject, body, datetime(2024, 5, 1))
+    db_session.add(
+        EmailAnalysis(
+            email_id=email.id, is_application=True, detected_company="Acme Robotics",
+            detected_position="Backend Engineer", detected_stage="applied", confidence="high",
+        )
+    )
+    db_session.flush()
+    assert email.body_simhash is not None
+
+    inner = _CountingClassifier()
+    classifier = NearDuplicateClassifier(inner, repository=repo)
+    result = classifier.classify_email(*_email(company="Initech", role="SRE"))
+
+    assert inner.calls == []
+    assert (result.company, result.position, result.source) == (
+        "Initech", "SRE", SOURCE_NEAR_DUPLICATE,
+    )
@@ -0,0 +1,62 @@
+from email.message import EmailMessage
+
+from app.email_client import client
+from app.email_client.client import FetchOptions, SyncCheckpoint
+from tests.unit.imap_fakes import fetch_response
+
+
+class _PoolFakeMail:
+    def __init__(self, raw_by_uid: dict[int, bytes]) -> None:
+        self._raw_by_uid = raw_by_uid
+
+    def response(self, code):  # noqa: ANN001
+        return code, [b"3"]
+
+    def uid(self, command, *args):  # noqa: ANN001
+        if command == "search":
+            return "OK", [b" ".join(str(uid).encode() for uid in sorted(self._raw_by_uid))]
+        if command == "fetch":
+            return "OK", fetch_response(self._raw_by_uid, args[0], args[1])
+        raise AssertionError(f"Unexpected IMAP command: {command}")
+
+    def close(self) -> None:
+        return None
+
+    def logout(self) -> None:
+        return None
+
+
+def _html_message(uid: int) -> bytes:
+    msg = EmailMessage()
+    msg["Message-ID"] = f"<pool-{uid}@example.test>"
+    msg["From"] = "Talent <talent@acme.example>"
+    msg["Subject"] = f"Application update {uid}"
+    msg["Date"] = "Tue, 02 Jan 2024 09:00:00 +0000"
+    msg.set_content(f"Plain fallback {uid}")
+    msg.add_alternative(
+        f"<html><style>p{{}}</style><body><p>Hi,</p><ul><li>Role {uid}</li></ul>"
+        f"<p>Visit https://acme.example/{uid} -- footer</p></body></html>",
+        subtype="html",
+    )
+    return msg.as_bytes()
+
+
+def test_parse_pool_matches_serial_output_and_order(monkeypatch):
+    raw_by_uid = {uid: _html_message(uid) for uid in range(1, 12)}
+    raw_by_uid[5] = b"not a real email"
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: _PoolFakeMail(raw_by_uid))
+
+    serial_checkpoint = SyncCheckpoint()
+    serial = client.fetch_recent_emails(
+        20, checkpoint=serial_checkpoint, options=FetchOptions(batch_size=3)
+    )
+    pooled_checkpoint = SyncCheckpoint()
+    pooled = client.fetch_recent_emails(
+        20,
+        checkpoint=pooled_checkpoint,
+        options=FetchOptions(batch_size=3, parse_workers=2),
+    )
+
+    assert len(serial) == 10
+    assert pooled == serial
+    assert pooled_checkpoint == serial_checkpoint == SyncCheckpoint(uidvalidity=3, last_uid=11)
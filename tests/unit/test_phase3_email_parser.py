@@ -4,7 +4,9 @@ from email.message import EmailMessage
 from types import SimpleNamespace
 
 from app.email_client import client
+from app.email_client.quick_filter import QuickFilterStats
 from app.services.email_service import EmailData
+from tests.unit.imap_fakes import fetch_response
 
 
 class _FakeMail:
@@ -15,9 +17,8 @@ class _FakeMail:
         if command == "search":
             return "OK", [b" ".join(self._raw_by_uid.keys())]
         if command == "fetch":
-            uid = args[0]
-            raw = self._raw_by_uid[uid]
-            return "OK", [(b"RFC822", raw)]
+            raw_by_uid = {int(uid): raw for uid, raw in self._raw_by_uid.items()}
+            return "OK", fetch_response(raw_by_uid, args[0], args[1])
         raise AssertionError(f"Unexpected IMAP command: {command}")
 
     def close(self) -> None:
@@ -49,6 +50,96 @@ def _build_email_bytes(
     return msg.as_bytes()
 
 
+def _worker_settings(**overrides) -> SimpleNamespace:
+    values = {
+        "email_limit": 1,
+        "email_user": "me@example.test",
+        "imap_mailbox": "inbox",
+        "imap_incremental_sync": False,
+        "imap_fetch_batch_size": 50,
+        "imap_header_first": False,
+        "imap_partial_bodies": False,
+        "imap_body_max_bytes": 16384,
+        "email_parse_workers": 0,
+        "html_renderer": "stdlib",
+        "email_body_max_chars": 0,
+        "job_board_extra_domains": "",
+        "llm_max_concurrency": 1,
+        "llm_batch_size": 1,
+        "llm_daily_request_limit": 0,
+        "llm_max_requests_per_run": 0,
+        "db_persist_batch_size": 100,
+        "persist_rejected_emails": True,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class _FakeWorkerRunRepository:
+    runs: list[SimpleNamespace] = []
+
+    def __init__(self, session):  # noqa: ANN001
+        self.session = session
+
+    def create(self) -> SimpleNamespace:
+        run = SimpleNamespace(id=len(self.runs) + 1, status="running")
+        self.runs.append(run)
+        return run
+
+    def complete(self, run, **counts) -> None:  # noqa: ANN001
+        run.status = "completed"
+        run.__dict__.update(counts)
+
+    def fail(self, run, error_message) -> None:  # noqa: ANN001
+        run.status = "failed"
+        run.error_message = error_message
+
+
+class _FakeDeferredEmailRepository:
+    def __init__(self, session):  # noqa: ANN001
+        self.session = session
+
+    def get_all(self) -> list:
+        return []
+
+    def delete(self, deferred) -> None:  # noqa: ANN001
+        return None
+
+    def add(self, email_data, reason) -> None:  # noqa: ANN001
+        return None
+
+
+class _FakeProcessor:
+    """Stands in for EmailProcessor; set the class attributes to shape a run."""
+
+    application_emails: list[EmailData] = []
+    # UID the run advances the sync checkpoint to; None leaves it alone
+    last_uid: int | None = None
+
+    def __init__(self, classifier, fetch_options=None, **options):  # noqa: ANN001
+        self.classifier = classifier
+        self.fetched_count = 0
+        self.application_count = 0
+        self.high_confidence_count = 0
+        self.needs_review_count = 0
+        self.thread_followups = 0
+        self.company_domain_hits = 0
+        self.filter_stats = QuickFilterStats()
+        self.deferred = []
+        self.duplicates_skipped = 0
+
+    def settle_quota(self) -> None:
+        return None
+
+    def iter_application_batches(self, limit, checkpoint=None, batch_size=50):  # noqa: ANN001
+        if self.last_uid is not None:
+            checkpoint.last_uid = self.last_uid
+        self.fetched_count = len(self.application_emails)
+        self.application_count = len(self.application_emails)
+        if self.application_emails:
+            yield list(self.application_emails)
+
+
 def test_fetch_recent_emails_skips_when_message_id_missing(monkeypatch, capsys):
     raw_with_id = _build_email_bytes(message_id="<id-1@example.test>")
     raw_missing_id = _build_email_bytes(message_id=None)
@@ -96,6 +187,7 @@ def test_worker_logs_duplicate_message_id_skip(monkeypatch, capsys):
     )
     worker_module = importlib.import_module("app.worker")
     worker_module = importlib.reload(worker_module)
+    from app.db.repositories.bulk_persist_repo import BulkSaveResult
 
     class _FakeSession:
         def commit(self) -> None:
@@ -104,60 +196,30 @@ def test_worker_logs_duplicate_message_id_skip(monkeypatch, capsys):
         def close(self) -> None:
             return None
 
-    class _FakeEmailRepository:
-        def __init__(self, session):  # noqa: ANN001
-            self.session = session
-
-        def find_by_message_id(self, message_id):  # noqa: ANN001
-            return object()
-
-        def create_from_email_data(self, email_data):  # noqa: ANN001
-            raise AssertionError("Duplicate should skip create_from_email_data")
-
-    class _FakeCompanyRepository:
+    class _FakeBulkPersistRepository:
         def __init__(self, session):  # noqa: ANN001
             self.session = session
 
-    class _FakeApplicationRepository:
-        def __init__(self, session):  # noqa: ANN001
-            self.session = session
+        def save(self, emails, **options):  # noqa: ANN001
+            return BulkSaveResult(duplicates=[e.message_id for e in emails])
 
-    class _FakeProcessor:
-        def __init__(self, classifier):  # noqa: ANN001
-            self.classifier = classifier
-            self.email_list = []
-            self.application_emails = [
-                EmailData(
-                    message_id="<dup@example.test>",
-                    uid="uid-123",
-                    sender="sender@example.test",
-                    subject="subject",
-                    date=None,
-                    body="text",
-                )
-            ]
-
-        def fetch_emails(self, limit):  # noqa: ANN001
-            self.email_list = self.application_emails
-            return self.email_list
-
-        def analyze_emails(self):
-            return self.application_emails
-
-        def get_high_confidence(self):
-            return []
-
-        def get_needs_review(self):
-            return []
-
-    monkeypatch.setattr(worker_module, "get_settings", lambda: SimpleNamespace(email_limit=1))
+    monkeypatch.setattr(worker_module, "get_settings", lambda: _worker_settings())
     monkeypatch.setattr(worker_module.models.Base.metadata, "create_all", lambda bind: None)
-    monkeypatch.setattr(worker_module, "_build_classifier", lambda: object())
+    monkeypatch.setattr(worker_module, "_build_classifier", lambda session: object())
+    monkeypatch.setattr(worker_module, "_build_scheduler", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_threads", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_companies", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_known_emails", lambda session: None)
+    monkeypatch.setattr(
+        _FakeProcessor,
+        "application_emails",
+        [EmailData("<dup@example.test>", "uid-123", "sender@example.test", "subject", None, "")],
+    )
     monkeypatch.setattr(worker_module, "EmailProcessor", _FakeProcessor)
     monkeypatch.setattr(worker_module, "SessionLocal", lambda: _FakeSession())
-    monkeypatch.setattr(worker_module, "EmailRepository", _FakeEmailRepository)
-    monkeypatch.setattr(worker_module, "CompanyRepository", _FakeCompanyRepository)
-    monkeypatch.setattr(worker_module, "ApplicationRepository", _FakeApplicationRepository)
+    monkeypatch.setattr(worker_module, "WorkerRunRepository", _FakeWorkerRunRepository)
+    monkeypatch.setattr(worker_module, "DeferredEmailRepository", _FakeDeferredEmailRepository)
+    monkeypatch.setattr(worker_module, "BulkPersistRepository", _FakeBulkPersistRepository)
 
     worker_module.run()
 
@@ -286,8 +348,10 @@ def test_worker_processes_new_email_successfully(monkeypatch):
     )
     worker_module = importlib.import_module("app.worker")
     worker_module = importlib.reload(worker_module)
+    from app.db.repositories.bulk_persist_repo import BulkSaveResult
 
     created_records: list[EmailData] = []
+    run_ids: list[int] = []
 
     class _FakeSession:
         def commit(self) -> None:
@@ -296,65 +360,42 @@ def test_worker_processes_new_email_successfully(monkeypatch):
         def close(self) -> None:
             return None
 
-    class _FakeEmailRepository:
+    class _FakeBulkPersistRepository:
         def __init__(self, session):  # noqa: ANN001
             self.session = session
 
-        def find_by_message_id(self, message_id):  # noqa: ANN001
-            return None
-
-        def create_from_email_data(self, email_data):  # noqa: ANN001
-            created_records.append(email_data)
-            return object()
-
-    class _FakeCompanyRepository:
-        def __init__(self, session):  # noqa: ANN001
-            self.session = session
-
-    class _FakeApplicationRepository:
-        def __init__(self, session):  # noqa: ANN001
-            self.session = session
+        def save(self, emails, worker_run_id=None, **options):  # noqa: ANN001
+            created_records.extend(emails)
+            run_ids.append(worker_run_id)
+            return BulkSaveResult(saved=len(emails))
 
-    class _FakeProcessor:
-        def __init__(self, classifier):  # noqa: ANN001
-            self.classifier = classifier
-            self.application_emails = [
-                EmailData(
-                    message_id="<new@example.test>",
-                    uid="uid-200",
-                    sender="sender@example.test",
-                    subject="subject",
-                    date=None,
-                    body="text",
-                )
-            ]
-            self.email_list = self.application_emails
-
-        def fetch_emails(self, limit):  # noqa: ANN001
-            return self.email_list
-
-        def analyze_emails(self):
-            return self.application_emails
-
-        def get_high_confidence(self):
-            return []
-
-        def get_needs_review(self):
-            return []
-
-    monkeypatch.setattr(worker_module, "get_settings", lambda: SimpleNamespace(email_limit=1))
+    monkeypatch.setattr(worker_module, "get_settings", lambda: _worker_settings())
     monkeypatch.setattr(worker_module.models.Base.metadata, "create_all", lambda bind: None)
-    monkeypatch.setattr(worker_module, "_build_classifier", lambda: object())
+    monkeypatch.setattr(worker_module, "_build_classifier", lambda session: object())
+    monkeypatch.setattr(worker_module, "_build_scheduler", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_threads", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_companies", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_known_emails", lambda session: None)
+    monkeypatch.setattr(
+        _FakeProcessor,
+        "application_emails",
+        [EmailData("<new@example.test>", "uid-200", "sender@example.test", "subject", None, "")],
+    )
     monkeypatch.setattr(worker_module, "EmailProcessor", _FakeProcessor)
     monkeypatch.setattr(worker_module, "SessionLocal", lambda: _FakeSession())
-    monkeypatch.setattr(worker_module, "EmailRepository", _FakeEmailRepository)
-    monkeypatch.setattr(worker_module, "CompanyRepository", _FakeCompanyRepository)
-    monkeypatch.setattr(worker_module, "ApplicationRepository", _FakeApplicationRepository)
+    monkeypatch.setattr(worker_module, "WorkerRunRepository", _FakeWorkerRunRepository)
+    monkeypatch.setattr(worker_module, "DeferredEmailRepository", _FakeDeferredEmailRepository)
+    monkeypatch.setattr(worker_module, "BulkPersistRepository", _FakeBulkPersistRepository)
 
     worker_module.run()
 
     assert len(created_records) == 1
     assert created_records[0].message_id == "<new@example.test>"
+    worker_run = _FakeWorkerRunRepository.runs[-1]
+    assert run_ids == [worker_run.id]
+    assert worker_run.status == "completed"
+    assert worker_run.emails_saved == 1
+    assert worker_run.filter_stats == QuickFilterStats().to_dict()
 
 
 def test_worker_handles_zero_application_emails(monkeypatch, capsys):
@@ -372,32 +413,29 @@ def test_worker_handles_zero_application_emails(monkeypatch, capsys):
     worker_module = importlib.import_module("app.worker")
     worker_module = importlib.reload(worker_module)
 
-    class _FakeProcessor:
-        def __init__(self, classifier):  # noqa: ANN001
-            self.classifier = classifier
-            self.email_list = []
-            self.application_emails = []
-
-        def fetch_emails(self, limit):  # noqa: ANN001
-            return self.email_list
-
-        def analyze_emails(self):
-            return self.application_emails
-
-        def get_high_confidence(self):
-            return []
+    class _FakeSession:
+        def commit(self) -> None:
+            return None
 
-        def get_needs_review(self):
-            return []
+        def close(self) -> None:
+            return None
 
-    def _session_should_not_be_used():
-        raise AssertionError("SessionLocal should not be called for zero application emails")
+    class _BulkPersistShouldNotBeUsed:
+        def __init__(self, session):  # noqa: ANN001
+            raise AssertionError("Nothing should be persisted for zero application emails")
 
-    monkeypatch.setattr(worker_module, "get_settings", lambda: SimpleNamespace(email_limit=1))
+    monkeypatch.setattr(worker_module, "get_settings", lambda: _worker_settings())
     monkeypatch.setattr(worker_module.models.Base.metadata, "create_all", lambda bind: None)
-    monkeypatch.setattr(worker_module, "_build_classifier", lambda: object())
+    monkeypatch.setattr(worker_module, "_build_classifier", lambda session: object())
+    monkeypatch.setattr(worker_module, "_build_scheduler", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_threads", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_companies", lambda session: None)
+    monkeypatch.setattr(worker_module, "_build_known_emails", lambda session: None)
     monkeypatch.setattr(worker_module, "EmailProcessor", _FakeProcessor)
-    monkeypatch.setattr(worker_module, "SessionLocal", _session_should_not_be_used)
+    monkeypatch.setattr(worker_module, "SessionLocal", lambda: _FakeSession())
+    monkeypatch.setattr(worker_module, "WorkerRunRepository", _FakeWorkerRunRepository)
+    monkeypatch.setattr(worker_module, "DeferredEmailRepository", _FakeDeferredEmailRepository)
+    monkeypatch.setattr(worker_module, "BulkPersistRepository", _BulkPersistShouldNotBeUsed)
 
     worker_module.run()
 
@@ -10,11 +10,25 @@ from app.llm.groq_adapter import GroqAdapter
 from app.llm.ollama_adapter import OllamaAdapter
 from app.services.email_service import EmailData
 
+_NO_RETRIES = {
+    "llm_request_timeout_seconds": 0,
+    "llm_max_retries": 0,
+    "llm_circuit_failure_threshold": 0,
+    "llm_fallback_provider": "",
+    "llm_body_token_budget": 0,
+    "llm_near_duplicate_max_distance": 0,
+    "ats_templates_enabled": False,
+}
+
 
 def test_build_classifier_routes_to_ollama(monkeypatch):
-    fake_module = SimpleNamespace(OllamaAdapter=lambda: "ollama-classifier")
+    fake_module = SimpleNamespace(OllamaAdapter=lambda **options: "ollama-classifier")
     monkeypatch.setitem(sys.modules, "app.llm.ollama_adapter", fake_module)
-    settings = SimpleNamespace(llm_provider="ollama", groq_api_key=None)
+    settings = SimpleNamespace(
+        llm_provider="ollama", groq_api_key=None, preclassifier_model_path=None,
+        llm_cache_max_entries=0,
+        **_NO_RETRIES,
+    )
 
     classifier = build_classifier(settings)
 
@@ -22,9 +36,16 @@ def test_build_classifier_routes_to_ollama(monkeypatch):
 
 
 def test_build_classifier_routes_to_groq(monkeypatch):
-    fake_module = SimpleNamespace(GroqAdapter=lambda api_key: ("groq-classifier", api_key))
+    fake_module = SimpleNamespace(
+        GroqAdapter=lambda api_key, **options: ("groq-classifier", api_key)
+    )
     monkeypatch.setitem(sys.modules, "app.llm.groq_adapter", fake_module)
-    settings = SimpleNamespace(llm_provider="groq", groq_api_key="test-key")
+    settings = SimpleNamespace(
+        llm_provider="groq", groq_api_key="test-key", preclassifier_model_path=None,
+        groq_requests_per_minute=30,
+        llm_cache_max_entries=0,
+        **_NO_RETRIES,
+    )
 
     classifier = build_classifier(settings)
 
@@ -32,7 +53,11 @@ def test_build_classifier_routes_to_groq(monkeypatch):
 
 
 def test_build_classifier_rejects_invalid_provider():
-    settings = SimpleNamespace(llm_provider="bad-provider", groq_api_key=None)
+    settings = SimpleNamespace(
+        llm_provider="bad-provider", groq_api_key=None, preclassifier_model_path=None,
+        llm_cache_max_entries=0,
+        **_NO_RETRIES,
+    )
 
     with pytest.raises(ValueError, match="Invalid LLM_PROVIDER"):
         build_classifier(settings)
@@ -130,7 +155,9 @@ def test_pipeline_skips_llm_when_quick_filter_fails(monkeypatch):
             calls["count"] += 1
             return EmailClassification(is_application=True, confidence="high")
 
-    monkeypatch.setattr("app.services.email_service.quick_filter", lambda *args: False)
+    monkeypatch.setattr(
+        "app.services.email_service.quick_filter_reason", lambda *args: (False, "no_signal")
+    )
     email = EmailData(
         message_id="<m1@example.com>",
         uid="1",
@@ -159,7 +186,9 @@ def test_pipeline_classifies_with_provider_and_sets_fields(monkeypatch):
                 confidence="high",
             )
 
-    monkeypatch.setattr("app.services.email_service.quick_filter", lambda *args: True)
+    monkeypatch.setattr(
+        "app.services.email_service.quick_filter_reason", lambda *args: (True, "keyword_score")
+    )
     email = EmailData(
         message_id="<m2@example.com>",
         uid="2",
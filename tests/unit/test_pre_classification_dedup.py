@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.email_client.client import FetchOptions
+from app.llm.base import EmailClassification
+from app.services import email_service
+from app.services.email_service import EmailProcessor
+
+
+def _raw(uid, message_id):
+    return {
+        "message_id": message_id, "uid": uid, "sender": "jobs@acme.example",
+        "subject": "Thank you for applying to Acme", "received_date": None,
+        "body_text": "We received your application for the SRE role.", "raw_headers": {},
+    }
+
+
+class _Classifier:
+    provider_name = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def classify_email(self, sender, subject, body):
+        self.calls += 1
+        return EmailClassification(
+            is_application=True, company="Acme", position="SRE", stage="applied",
+            confidence="high",
+        )
+
+
+def test_find_known_resolves_ids_and_uids_in_chunks(db_session, monkeypatch):
+    from app.db.repositories import email_repo
+    from app.db.repositories.email_repo import EmailRepository
+
+    monkeypatch.setattr(email_repo, "_IN_CHUNK", 2)
+    repo = EmailRepository(db_session)
+    for uid in ("1", "2", "3"):
+        repo.create(f"<{uid}@acme.example>", uid, "a@acme.example", "s", "", datetime(2024, 5, 1))
+    repo.create(None, "9", "a@acme.example", "s", "", datetime(2024, 5, 1))
+
+    queries = []
+    event.listen(
+        db_session.get_bind(), "before_cursor_execute", lambda *args: queries.append(args[2])
+    )
+    known_ids, known_uids = repo.find_known(
+        ["<1@acme.example>", "<3@acme.example>", "<new@acme.example>", None], ["9", "10", "2"]
+    )
+
+    assert known_ids == {"<1@acme.example>", "<3@acme.example>"}
+    assert known_uids == {"9", "2"}
+    assert len(queries) == 2
+
+
+def test_stored_emails_are_dropped_before_the_filter_and_llm(monkeypatch):
+    raw = [
+        _raw("1", "<stored@acme.example>"),
+        _raw("2", "<new@acme.example>"),
+        _raw("3", None),
+        _raw("4", None),
+        _raw("5", "<reused-uid@acme.example>"),
+    ]
+    lookups = []
+
+    def known_emails(message_ids, uids):
+        lookups.append((message_ids, uids))
+        return {"<stored@acme.example>"}, {"3", "5"}
+
+    classifier = _Classifier()
+    processor = EmailProcessor(
+        classifier, FetchOptions(batch_size=3), known_emails=known_emails
+    )
+    monkeypatch.setattr(email_service, "iter_emails", lambda *args, **kwargs: iter(raw))
+
+    batches = list(processor.iter_application_batches(10))
+
+    # UID 5 was reused after a UIDVALIDITY reset; its Message-ID is new, so it stays.
+    assert [e.uid for batch in batches for e in batch] == ["2", "4", "5"]
+    assert classifier.calls == 3
+    assert [len(uids) for _, uids in lookups] == [3, 2]
+    assert (processor.fetched_count, processor.duplicates_skipped) == (5, 2)
+    assert processor.filter_stats.emails == 3
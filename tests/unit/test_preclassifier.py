@@ -0,0 +1,307 @@
+import random
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.llm.base import EmailClassification  # noqa: E402
+from app.llm.preclassifier import (  # noqa: E402
+    SOURCE_ACCEPT,
+    SOURCE_REJECT,
+    PreClassifierGate,
+    PreClassifierModel,
+    choose_thresholds,
+    data_split,
+    email_tokens,
+    evaluate,
+    fit,
+    load_labeled_emails,
+)
+from app.services.email_service import EmailData  # noqa: E402
+
+_APPLICATION_WORDS = [
+    "thank you for applying", "your application", "interview", "next steps", "recruiter",
+]
+_OTHER_WORDS = ["sale", "newsletter", "discount", "weekly digest", "order shipped", "webinar"]
+_COMMON_WORDS = ["hello", "team", "update", "today", "for", "you"]
+
+
+def _labeled_emails(count, seed):
+    rng = random.Random(seed)
+    emails, labels = [], []
+    for _ in range(count):
+        is_application = rng.random() < 0.3
+        signal = _APPLICATION_WORDS if is_application else _OTHER_WORDS
+        words = [rng.choice(signal) for _ in range(3)] + rng.sample(_COMMON_WORDS, 4)
+        rng.shuffle(words)
+        sender = "talent@acme.example" if is_application else "deals@shop.example"
+        emails.append((sender, " ".join(words[:3]), " ".join(words)))
+        labels.append(is_application)
+    return emails, labels
+
+
+class _RecordingClassifier:
+    provider_name = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def classify_email(self, sender, subject, body):
+        self.calls += 1
+        return EmailClassification(is_application=True, company="Acme", confidence="high")
+
+
+def test_email_tokens_are_namespaced_by_field():
+    tokens = email_tokens("Jane <jane@Mail.Acme.example>", "Your Application", "Thanks!")
+
+    assert tokens == [
+        "d:mail.acme.example",
+        "s:your",
+        "s:application",
+        "s:your application",
+        "b:thanks",
+    ]
+
+
+def test_trained_model_separates_held_out_emails():
+    emails, labels = _labeled_emails(600, seed=1)
+    model = fit(emails, labels, n_features=2**12)
+    held_out, held_out_labels = _labeled_emails(200, seed=2)
+
+    scores = model.score_many(held_out)
+
+    assert np.all(scores[np.array(held_out_labels)] > 0.5)
+    assert np.all(scores[~np.array(held_out_labels)] < 0.5)
+    assert scores[0] == pytest.approx(model.score(*held_out[0]))
+
+
+def test_fit_requires_both_classes():
+    with pytest.raises(ValueError, match="both"):
+        fit([("a@b.example", "Hi", "")], [False])
+
+
+def test_thresholds_reach_target_precision_with_maximum_coverage():
+    scores = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9])
+    labels = np.array([0, 0, 0, 1, 0, 1, 1, 1, 1])
+
+    assert choose_thresholds(scores, labels, 1.0) == (0.3, 0.6)
+    assert choose_thresholds(scores, labels, 0.8) == (0.5, 0.6)
+
+
+def test_splits_are_stable_and_disjoint():
+    splits = [data_split(email_id) for email_id in range(1000)]
+
+    assert splits == [data_split(email_id) for email_id in range(1000)]
+    assert set(splits) == {"train", "calibration", "test"}
+    # Thresholds are tuned on calibration, so the reported numbers need their own share.
+    assert 150 < splits.count("calibration") < 250
+    assert 150 < splits.count("test") < 250
+
+
+def test_thresholds_never_split_tied_scores():
+    scores = np.array([0.1, 0.2, 0.2, 0.9])
+    labels = np.array([0, 0, 1, 1])
+
+    assert choose_thresholds(scores, labels, 1.0) == (0.1, 0.9)
+    assert choose_thresholds(np.array([0.5, 0.5]), np.array([0, 1]), 0.9) == (
+        float("-inf"),
+        float("inf"),
+    )
+
+
+def test_report_counts_auto_decisions_and_their_precision():
+    model = PreClassifierModel(weights=np.zeros(4), bias=0.0, reject_below=0.3, accept_above=0.8)
+    report = evaluate(model, np.array([0.1, 0.2, 0.5, 0.9, 0.95]), [False, True, False, True, True])
+
+    assert (report.rejected, report.rejected_correct) == (2, 1)
+    assert (report.accepted, report.accepted_correct) == (2, 2)
+    assert report.llm_calls_saved() == 2
+    assert report.llm_calls_saved(auto_accept=True) == 4
+    assert "precision 50.0%" in report.format()
+
+
+def test_model_round_trips_through_npz(tmp_path):
+    emails, labels = _labeled_emails(200, seed=3)
+    model = fit(emails, labels, n_features=2**10, epochs=50)
+    model.reject_below, model.accept_above, model.target_precision = 0.2, 0.9, 0.98
+    path = tmp_path / "models" / "preclassifier.npz"
+
+    model.save(path)
+    loaded = PreClassifierModel.load(path)
+
+    assert loaded.n_features == 2**10
+    assert (loaded.reject_below, loaded.accept_above, loaded.target_precision) == (0.2, 0.9, 0.98)
+    assert loaded.score(*emails[0]) == pytest.approx(model.score(*emails[0]), abs=1e-5)
+
+
+def test_gate_auto_decides_confident_emails_and_forwards_the_rest():
+    emails, labels = _labeled_emails(600, seed=4)
+    model = fit(emails, labels, n_features=2**12)
+    model.reject_below, model.accept_above = 0.2, 0.8
+    inner = _RecordingClassifier()
+    gate = PreClassifierGate(model, inner)
+
+    rejected = gate.classify_email("deals@shop.example", "Weekly digest", "sale discount webinar")
+    forwarded = gate.classify_email("talent@acme.example", "Interview", "next steps recruiter")
+
+    assert gate.provider_name == "fake"
+    assert rejected == EmailClassification(
+        is_application=False, confidence="high", source=SOURCE_REJECT
+    )
+    assert forwarded.company == "Acme"
+    assert inner.calls == 1
+
+    gate.auto_accept = True
+    accepted = gate.classify_email("talent@acme.example", "Interview", "next steps recruiter")
+
+    assert accepted.source == SOURCE_ACCEPT
+    assert accepted.confidence == "low"
+    assert inner.calls == 1
+
+
+def test_classify_logs_the_source_of_model_decisions(capsys):
+    model = PreClassifierModel(weights=np.zeros(8), bias=-5.0, reject_below=0.5)
+    email = EmailData(None, "1", "talent@acme.example", "Your application", None, "interview")
+
+    assert email.classify(PreClassifierGate(model, _RecordingClassifier())) is False
+    assert f"outcome={SOURCE_REJECT} confidence=high" in capsys.readouterr().out
+
+
+def test_labeled_emails_load_from_stored_analyses(db_session):
+    from app.db.models import Email
+    from app.db.repositories.analysis_repo import AnalysisRepository
+
+    repo = AnalysisRepository(db_session)
+    for uid, confidence, is_application in [
+        ("1", "high", True),
+        ("2", "medium", False),
+        ("3", "low", True),
+    ]:
+        email = Email(
+            uid=uid,
+            sender=f"s{uid}@example.test",
+            subject=f"Subject {uid}",
+            received_date=datetime(2024, 1, 1),
+            body="body",
+        )
+        db_session.add(email)
+        db_session.flush()
+        repo.create(email.id, EmailClassification(is_application, confidence=confidence), "fake")
+    db_session.commit()
+
+    ids, emails, labels = load_labeled_emails(db_session)
+
+    assert len(ids) == 2
+    assert emails[0] == ("s1@example.test", "Subject 1", "body")
+    assert labels == [True, False]
+    assert load_labeled_emails(db_session, include_low_confidence=True)[2] == [True, False, True]
+
+
+def test_quick_filter_rejects_are_not_labels(db_session):
+    from app.db.models import Email
+    from app.db.repositories.analysis_repo import AnalysisRepository
+
+    repo = AnalysisRepository(db_session)
+    for uid, model_used in [("1", "fake"), ("2", "quick_filter"), ("3", "fake")]:
+        email = Email(
+            uid=uid, sender=f"s{uid}@example.test", subject=f"Subject {uid}",
+            received_date=datetime(2024, 1, 1), body="body",
+        )
+        db_session.add(email)
+        db_session.flush()
+        repo.create(
+            email.id, EmailClassification(uid == "1", confidence="high"), model_used
+        )
+    db_session.commit()
+
+    # The gate sits behind quick_filter, so its easy rejects would only inflate the metrics.
+    ids, emails, labels = load_labeled_emails(db_session, include_low_confidence=True)
+    assert [subject for _, subject, _ in emails] == ["Subject 1", "Subject 3"]
+    assert labels == [True, False]
+
+
+def test_rejected_emails_are_stored_as_negative_labels(db_session):
+    from app import worker
+    from app.db.models import Application, EmailAnalysis
+    from app.services.email_service import EmailProcessor
+
+    answers = {
+        "Thank you for applying to Acme": EmailClassification(
+            True, company="Acme", position="SRE", stage="applied", confidence="high"
+        ),
+        "Interview availability": EmailClassification(False, confidence="medium"),
+        "Your application to Globex": EmailClassification(
+            False, confidence="high", source=SOURCE_REJECT
+        ),
+    }
+
+    class _Classifier:
+        provider_name = "fake"
+
+        def classify_email(self, sender, subject, body):
+            return answers[subject]
+
+    processor = EmailProcessor(
+        _Classifier(),
+        store_rejected=lambda rejected: worker._persist_application_emails(
+            db_session, rejected, model_used="m"
+        ),
+    )
+    processor.email_list = [
+        EmailData(f"<{uid}@example.test>", uid, sender, subject, datetime(2024, 5, 1), body)
+        for uid, sender, subject, body in [
+            ("1", "jobs@acme.example", "Thank you for applying to Acme",
+             "We received your application for the SRE role."),
+            ("2", "deals@shop.example", "Weekly digest", "Our biggest sale of the year."),
+            ("3", "jo@friend.example", "Interview availability",
+             "Thank you for applying to be a guest on my podcast. Can we schedule an interview?"),
+            ("4", "jobs@globex.example", "Your application to Globex",
+             "Thank you for applying to Globex."),
+        ]
+    ]
+
+    applications = processor.analyze_emails()
+    worker._persist_application_emails(db_session, applications, model_used="m")
+
+    assert processor.rejected_emails == []
+    assert db_session.query(Application).count() == 1
+    assert not any(a.needs_review for a in db_session.query(EmailAnalysis))
+    ids, emails, labels = load_labeled_emails(db_session)
+    # Quick-filter rejects (uid 2) are not stored; the model's own rejection (uid 4)
+    # is, but never fed back into training.
+    assert db_session.query(EmailAnalysis).count() == 3
+    assert sorted((subject, label) for (_, subject, _), label in zip(emails, labels)) == [
+        ("Interview availability", False),
+        ("Thank you for applying to Acme", True),
+    ]
+
+
+def test_rejected_emails_are_stored_in_blocks_without_empty_batches(monkeypatch):
+    from app.services import email_service
+    from app.services.email_service import EmailProcessor
+
+    class _Classifier:
+        provider_name = "fake"
+
+        def classify_email(self, sender, subject, body):
+            return EmailClassification(False, confidence="high")
+
+    raw = [
+        {
+            "message_id": f"<{uid}@example.test>", "uid": str(uid),
+            "sender": "jobs@acme.example", "subject": "Thank you for applying",
+            "received_date": None, "body_text": "We received your application.",
+            "raw_headers": {},
+        }
+        for uid in range(5)
+    ]
+    monkeypatch.setattr(email_service, "iter_emails", lambda *args, **kwargs: iter(raw))
+    stored = []
+    processor = EmailProcessor(_Classifier(), store_rejected=stored.append)
+
+    batches = list(processor.iter_application_batches(10, batch_size=2))
+
+    assert batches == []
+    assert [len(block) for block in stored] == [2, 2, 1]
+    assert processor.rejected_emails == []
@@ -0,0 +1,237 @@
+import random
+import re
+from collections import Counter
+
+import pytest
+
+from app.email_client import quick_filter as quick_filter_module
+from app.email_client.quick_filter import (
+    _APPLICATION_CONFIRMATION_PATTERNS,
+    _APPLICATION_STATUS_PATTERNS,
+    JOB_BOARD_DOMAINS,
+    JOB_KEYWORDS,
+    JOB_POSTING_PATTERNS,
+    REASON_CONFIRMATION,
+    REASON_JOB_BOARD,
+    REASON_KEYWORDS,
+    REASON_NO_SIGNAL,
+    REASON_POSTING,
+    QuickFilterStats,
+    _compile_rule,
+    header_prefilter,
+    match_rules,
+    quick_filter,
+    quick_filter_batch,
+)
+
+
+@pytest.mark.parametrize(
+    ("sender", "subject"),
+    [
+        ("alerts@indeed.com", "Job alert: Backend Engineer"),
+        ("jobs-noreply@linkedin.com", "New jobs for you: Backend Engineer"),
+    ],
+)
+def test_header_prefilter_rejects_job_board_alerts(sender, subject):
+    assert header_prefilter(sender, subject) is False
+
+
+def test_header_prefilter_loses_job_board_alerts_that_confirm_in_the_body():
+    # The one recall loss of header-first fetching: the body never gets a look.
+    sender, subject = "alerts@indeed.com", "Job alert: Backend Engineer"
+    body = "Thank you for applying to Acme. Similar jobs below."
+
+    assert quick_filter(sender, subject, body) is True
+    assert header_prefilter(sender, subject) is False
+
+
+@pytest.mark.parametrize(
+    ("sender", "subject"),
+    [
+        ("no-reply@greenhouse.io", "Thank you for applying to Acme"),
+        ("talent@acme.example", "Your application for the new role at Acme"),
+        ("talent@acme.example", "Interview availability"),
+        # Postings from anyone but a job board may confirm an application in the body.
+        ("news@example.test", "We're hiring! Join our team"),
+        ("jobs@indeed.com", "Your weekly summary"),
+        ("someone@example.test", None),
+        (None, "Job alert: thank you for applying"),
+    ],
+)
+def test_header_prefilter_keeps_possible_applications(sender, subject):
+    assert header_prefilter(sender, subject) is True
+
+
+def _legacy_quick_filter(sender, subject, email_content):
+    # The per-pattern re.search implementation the compiled rules replaced.
+    text = f"{subject} {email_content}".lower()
+    match = re.search(r"@([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})", sender)
+    sender_domain = match.group(1).lower() if match else None
+    if sender_domain:
+        for domain in JOB_BOARD_DOMAINS:
+            if domain in sender_domain:
+                if not any(re.search(p, text) for p in _APPLICATION_CONFIRMATION_PATTERNS):
+                    return False
+                break
+    for pattern in JOB_POSTING_PATTERNS:
+        if re.search(pattern, text):
+            if any(re.search(p, text) for p in _APPLICATION_STATUS_PATTERNS):
+                break
+            return False
+    if sum(1 for kw in JOB_KEYWORDS if kw in text) >= 2:
+        return True
+    return any(re.search(p, text) for p in _APPLICATION_CONFIRMATION_PATTERNS)
+
+
+_PHRASES = [
+    "thank you for applying", "thank you for apply", "we received your application",
+    "your application has been received", "your application was submitted",
+    "application status", "application update", "next steps", "interview", "invitation",
+    "assessment", "job alert", "new job opening", "we're hiring", "join our team",
+    "apply now", "new role", "open position", "looking for an engineer",
+    "jobs you might like", "similar positions", "offer", "cv", "resume", "candidate",
+    "applied", "hello", "acme", "role", "new", "jobs", "job", "might", "like", "you",
+    "opening", "position", "available", "opportunity", "career", "engineer", "\n", "\n\n",
+]
+_SENDERS = [
+    "alerts@indeed.com", "team@mail.greenhouse.io", "talent@acme.example", "no-at-sign", "",
+]
+
+
+def _generated_emails(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        subject = " ".join(rng.choice(_PHRASES) for _ in range(rng.randint(0, 5))).title()
+        body = " ".join(rng.choice(_PHRASES) for _ in range(rng.randint(0, 20)))
+        yield rng.choice(_SENDERS), subject, body
+
+
+def test_quick_filter_decisions_match_legacy_implementation(capsys):
+    mismatches = [
+        email
+        for email in _generated_emails(5000, seed=3)
+        if quick_filter(*email) != _legacy_quick_filter(*email)
+    ]
+
+    assert mismatches == []
+
+
+def test_match_rules_reports_every_pattern_hit():
+    for sender, subject, body in _generated_emails(2000, seed=4):
+        text = f"{subject} {body}".lower()
+        hits = match_rules(sender, subject, body)
+
+        assert hits.posting == [p for p in JOB_POSTING_PATTERNS if re.search(p, text)]
+        assert hits.confirmation == [
+            p for p in _APPLICATION_CONFIRMATION_PATTERNS if re.search(p, text)
+        ]
+        assert hits.status == [p for p in _APPLICATION_STATUS_PATTERNS if re.search(p, text)]
+        assert hits.keywords == [kw for kw in JOB_KEYWORDS if kw in text]
+
+
+def test_wildcard_rules_do_not_match_across_lines():
+    assert match_rules("", "Job", "alert").posting == ["job.*alert"]
+    assert match_rules("", "Job\n", "alert").posting == []
+    assert match_rules("", "Job\n", "job: new alert").posting == ["job.*alert"]
+
+
+@pytest.mark.parametrize(
+    ("pattern", "literals"),
+    [
+        ("jobs.*you.*might.*like", ("jobs", "you", "might", "like")),
+        ("thank you for (applying|apply)", ("thank you for ",)),
+        ("ab?c.*(x|y)d", ("a",)),
+        ("a|b.*c", ()),
+    ],
+)
+def test_compiled_rules_only_require_literals_the_pattern_needs(pattern, literals):
+    assert _compile_rule(pattern).literals == literals
+
+
+@pytest.mark.parametrize(
+    ("domain", "expected"),
+    [
+        ("indeed.com", True),
+        ("mail.indeed.com", True),
+        ("eu.mail.greenhouse.io", True),
+        ("notindeed.com", False),
+        ("indeed.com.evil.example", False),
+        ("lever.com", False),
+        ("com", False),
+        (None, False),
+    ],
+)
+def test_job_board_lookup_matches_domains_and_their_subdomains(domain, expected):
+    assert quick_filter_module.is_job_board_domain(domain) is expected
+
+
+def test_registered_job_board_domains_are_matched(monkeypatch):
+    monkeypatch.setattr(
+        quick_filter_module,
+        "_JOB_BOARD_SUFFIXES",
+        set(quick_filter_module._JOB_BOARD_SUFFIXES),
+    )
+
+    subject = "New jobs for you: Backend Engineer"
+    assert header_prefilter("no-reply@ashbyhq.com", subject) is True
+
+    quick_filter_module.register_job_board_domains([" AshbyHQ.com ", "@smartrecruiters.com", ""])
+
+    assert quick_filter_module.is_job_board_domain("jobs.ashbyhq.com")
+    assert quick_filter_module.is_job_board_domain("smartrecruiters.com")
+    assert header_prefilter("no-reply@ashbyhq.com", subject) is False
+
+
+def test_quick_filter_batch_returns_decisions_and_reason_codes():
+    emails = [
+        ("alerts@indeed.com", "Job alert: Backend Engineer", "New roles near you"),
+        ("news@example.test", "We're hiring", "Join our team today"),
+        ("talent@acme.example", "Your application", "Thank you for applying, interview soon"),
+        ("talent@acme.example", "Update", "Application status update"),
+        ("friend@example.test", "Lunch?", "See you at noon"),
+    ]
+
+    decisions, reasons = quick_filter_batch(emails)
+
+    assert decisions == [False, False, True, True, False]
+    assert reasons == [
+        REASON_JOB_BOARD,
+        REASON_POSTING,
+        REASON_KEYWORDS,
+        REASON_CONFIRMATION,
+        REASON_NO_SIGNAL,
+    ]
+
+
+def test_quick_filter_batch_matches_quick_filter_and_records_stats(capsys):
+    emails = list(_generated_emails(1000, seed=5))
+    stats = QuickFilterStats()
+
+    decisions, reasons = quick_filter_batch(emails, stats)
+
+    assert decisions == [quick_filter(*email) for email in emails]
+    exported = stats.to_dict()
+    assert exported["emails"] == 1000
+    assert exported["passed"] == sum(decisions)
+    assert exported["llm_calls_saved"] == 1000 - sum(decisions)
+    assert exported["reasons"] == dict(Counter(reasons))
+    assert exported["rules"]["job_board"]["evaluated"] == 1000
+    posting_hits = sum(
+        rule["hits"] for key, rule in exported["rules"].items() if key.startswith("posting:")
+    )
+    assert posting_hits >= reasons.count(REASON_POSTING)
+
+
+def test_worker_run_stores_filter_stats(db_session):
+    from app.db.repositories.worker_run_repo import WorkerRunRepository
+
+    stats = QuickFilterStats()
+    quick_filter_batch([("alerts@indeed.com", "Job alert", "")], stats)
+    repo = WorkerRunRepository(db_session)
+    run = repo.create()
+    repo.complete(run, 1, 0, 0, filter_stats=stats.to_dict())
+    db_session.commit()
+
+    stored = repo.get_by_id(run.id).filter_stats
+    assert stored["reasons"] == {REASON_JOB_BOARD: 1}
+    assert stored["rules"]["job_board"]["hits"] == 1
@@ -0,0 +1,104 @@
+from app.email_client import client
+from app.email_client.client import FetchOptions, SyncCheckpoint
+from app.llm.base import EmailClassification
+from app.services.email_service import EmailProcessor
+from tests.unit.imap_fakes import fetch_response
+from tests.unit.test_phase3_email_parser import _build_email_bytes
+
+
+class _CountingMail:
+    def __init__(self, raw_by_uid: dict[int, bytes], fail_on: str | None = None) -> None:
+        self._raw_by_uid = raw_by_uid
+        self._fail_on = fail_on
+        self.fetches: list[str] = []
+
+    def response(self, code):  # noqa: ANN001
+        return code, [b"7"]
+
+    def uid(self, command, *args):  # noqa: ANN001
+        if command == "search":
+            return "OK", [b" ".join(str(uid).encode() for uid in sorted(self._raw_by_uid))]
+        if command == "fetch":
+            self.fetches.append(args[0])
+            if args[0] == self._fail_on:
+                raise OSError("connection reset")
+            return "OK", fetch_response(self._raw_by_uid, args[0], args[1])
+        raise AssertionError(f"Unexpected IMAP command: {command}")
+
+    def close(self) -> None:
+        return None
+
+    def logout(self) -> None:
+        return None
+
+
+def _mailbox(count: int) -> dict[int, bytes]:
+    return {
+        uid: _build_email_bytes(
+            message_id=f"<stream-{uid}@example.test>",
+            sender="talent@acme.example",
+            subject="Thank you for applying" if uid % 2 else "Weekly digest",
+            body=f"Body {uid}",
+        )
+        for uid in range(1, count + 1)
+    }
+
+
+def test_iter_emails_fetches_lazily_and_advances_checkpoint_per_batch(monkeypatch):
+    fake_mail = _CountingMail(_mailbox(6))
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+    checkpoint = SyncCheckpoint(uidvalidity=7)
+
+    stream = client.iter_emails(10, checkpoint=checkpoint, options=FetchOptions(batch_size=2))
+    first = next(stream)
+
+    assert first["uid"] == "1"
+    assert fake_mail.fetches == ["1:2"]
+    assert checkpoint.last_uid == 0
+
+    rest = list(stream)
+
+    assert [r["uid"] for r in rest] == ["2", "3", "4", "5", "6"]
+    assert fake_mail.fetches == ["1:2", "3:4", "5:6"]
+    assert checkpoint.last_uid == 6
+    assert "body" not in first and "date" not in first
+
+
+def test_iter_emails_holds_checkpoint_before_failed_batch(monkeypatch):
+    fake_mail = _CountingMail(_mailbox(6), fail_on="3:4")
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+    checkpoint = SyncCheckpoint(uidvalidity=7)
+
+    results = list(
+        client.iter_emails(10, checkpoint=checkpoint, options=FetchOptions(batch_size=2))
+    )
+
+    assert [r["uid"] for r in results] == ["1", "2", "5", "6"]
+    assert checkpoint.last_uid == 2
+
+
+def test_processor_streams_application_batches(monkeypatch):
+    fake_mail = _CountingMail(_mailbox(7))
+    monkeypatch.setattr(client, "_connect_to_inbox", lambda: fake_mail)
+    monkeypatch.setattr(
+        "app.services.email_service.quick_filter_reason",
+        lambda sender, subject, body, stats=None: (
+            "applying" in (subject or "").lower(),
+            "test",
+        ),
+    )
+
+    class _Classifier:
+        provider_name = "dummy"
+
+        def classify_email(self, sender, subject, body):  # noqa: ANN001
+            return EmailClassification(is_application=True, confidence="high")
+
+    processor = EmailProcessor(_Classifier(), FetchOptions(batch_size=3))
+    batches = list(processor.iter_application_batches(10, batch_size=2))
+
+    assert [[e.uid for e in batch] for batch in batches] == [["1", "3"], ["5", "7"]]
+    assert processor.fetched_count == 7
+    assert processor.application_count == 4
+    assert processor.high_confidence_count == 4
+    assert processor.email_list == []
@@ -0,0 +1,173 @@
+from datetime import datetime
+
+from app.email_client.client import _normalize_body_text
+from app.llm.base import EmailClassification
+from app.services import email_service
+from app.services.email_service import EmailData, EmailProcessor
+from app.services.threads import (
+    ThreadIndex,
+    ThreadLink,
+    may_change_stage,
+    parse_message_ids,
+    strip_quoted,
+)
+
+_ROOT = "<root@acme.example>"
+
+
+def _reply(uid, body, references=(_ROOT,), subject="Re: Backend Engineer at Acme"):
+    return EmailData(
+        f"<{uid}@acme.example>", uid, "talent@acme.example", subject,
+        datetime(2024, 5, 2), body, references=list(references),
+    )
+
+
+class _Classifier:
+    provider_name = "fake"
+
+    def __init__(self, result):
+        self.result = result
+        self.subjects = []
+
+    def classify_email(self, sender, subject, body):
+        self.subjects.append(subject)
+        return self.result
+
+
+def _linked_index():
+    return ThreadIndex(
+        [(_ROOT, _ROOT)],
+        {_ROOT: ThreadLink("Acme", "Backend Engineer", "interview", application_id=7)},
+    )
+
+
+def test_thread_ids_come_from_references_then_in_reply_to():
+    references = parse_message_ids("<a@x>\r\n <b@x> <c@x>")
+    assert references == ["<a@x>", "<b@x>", "<c@x>"]
+
+    assert EmailData("<d@x>", "1", "s", "S", None, "", references=references).thread_id == "<a@x>"
+    assert EmailData("<d@x>", "1", "s", "S", None, "", in_reply_to=["<c@x>"]).thread_id == "<c@x>"
+    assert EmailData("<d@x>", "1", "s", "S", None, "").thread_id == "<d@x>"
+
+
+def test_known_parents_win_over_a_truncated_references_root():
+    index = ThreadIndex([("<parent@x>", "<root@x>")])
+
+    assert index.resolve("<child@x>", ["<parent@x>"], []) == "<root@x>"
+    # The child is now known too, so its own replies join the thread.
+    assert index.resolve("<grandchild@x>", ["<child@x>"], []) == "<root@x>"
+
+
+def test_stage_cues_in_quoted_history_are_ignored():
+    # Fetched bodies arrive normalized: whitespace, including line breaks, collapsed.
+    reply = _normalize_body_text(
+        "Thanks, see you then!\n\n"
+        "On Mon, May 6, 2024, Jo <jo@acme.example> wrote:\n> We'd like to invite you to interview"
+    )
+
+    assert strip_quoted(reply).strip() == "Thanks, see you then!"
+    assert not may_change_stage(reply)
+    quoted_offer = _normalize_body_text("Sounds good.\n> We'd like to extend an offer")
+    assert not may_change_stage(quoted_offer)
+    assert not may_change_stage(
+        _normalize_body_text("Confirmed.\n\nFrom: Jo\nSent: Monday\nSubject: Your offer")
+    )
+    assert may_change_stage("Happy to move on to the next round. On Mon, Jo wrote: > Thanks")
+    assert may_change_stage("We'd like to extend an offer for the role.")
+
+
+def test_follow_ups_keep_their_application_without_the_llm():
+    classifier = _Classifier(EmailClassification(is_application=False))
+    processor = EmailProcessor(classifier, threads=_linked_index())
+    processor.email_list = [_reply("2", "Thanks! Talk to you Tuesday.")]
+
+    [email_data] = processor.analyze_emails()
+
+    assert classifier.subjects == []
+    assert (email_data.company, email_data.position, email_data.stage) == (
+        "Acme", "Backend Engineer", "interview",
+    )
+    assert (email_data.application_id, email_data.confidence) == (7, "high")
+    assert processor.thread_followups == 1
+
+
+def test_stage_changes_are_classified_but_stay_on_the_thread_application():
+    classifier = _Classifier(
+        EmailClassification(
+            is_application=True, company="Acme Corp", position="Software Engineer",
+            stage="rejected", confidence="high",
+        )
+    )
+    processor = EmailProcessor(classifier, threads=_linked_index())
+    processor.email_list = [
+        _reply("3", "Unfortunately, we have decided to move forward with other candidates.")
+    ]
+
+    [email_data] = processor.analyze_emails()
+
+    assert len(classifier.subjects) == 1
+    assert (email_data.company, email_data.position, email_data.stage) == (
+        "Acme", "Backend Engineer", "rejected",
+    )
+    assert email_data.application_id == 7
+
+
+def test_threads_classified_this_run_link_their_later_replies(monkeypatch):
+    classifier = _Classifier(
+        EmailClassification(
+            is_application=True, company="Globex", position="SRE", stage="applied",
+            confidence="high",
+        )
+    )
+    processor = EmailProcessor(classifier, threads=ThreadIndex())
+    raw = [
+        {
+            "message_id": "<new@globex.example>", "uid": "1", "sender": "jobs@globex.example",
+            "subject": "Thank you for applying to Globex", "received_date": None,
+            "body_text": "We received your application.", "raw_headers": {},
+        },
+        {
+            "message_id": "<reply@globex.example>", "uid": "2", "sender": "jobs@globex.example",
+            "subject": "Re: Thank you for applying to Globex", "received_date": None,
+            "body_text": "Quick question about your availability.",
+            "raw_headers": {"in-reply-to": "<new@globex.example>"},
+        },
+    ]
+    monkeypatch.setattr(email_service, "iter_emails", lambda *args, **kwargs: iter(raw))
+
+    batches = list(processor.iter_application_batches(10))
+
+    assert [e.uid for batch in batches for e in batch] == ["1", "2"]
+    assert len(classifier.subjects) == 1
+    assert batches[-1][-1].thread_id == "<new@globex.example>"
+    assert processor.thread_followups == 1
+
+
+def test_open_threads_load_from_linked_emails(db_session):
+    from app.db.models import Application, Company, Email, EmailAnalysis
+    from app.db.repositories.application_repo import ApplicationRepository
+
+    company = Company(name="Acme")
+    db_session.add(company)
+    db_session.flush()
+    open_app = Application(company_id=company.id, position="SRE", stage="interview")
+    closed_app = Application(company_id=company.id, position="PM", stage="rejected")
+    db_session.add_all([open_app, closed_app])
+    db_session.flush()
+    for uid, application in (("1", open_app), ("2", closed_app)):
+        email = Email(
+            message_id=f"<{uid}@acme.example>", uid=uid, sender="talent@acme.example",
+            received_date=datetime(2024, 5, 1), thread_id=f"<{uid}@acme.example>",
+        )
+        db_session.add(email)
+        db_session.flush()
+        db_session.add(
+            EmailAnalysis(email_id=email.id, application_id=application.id, is_application=True)
+        )
+    db_session.flush()
+
+    index = ThreadIndex.from_rows(ApplicationRepository(db_session).get_open_threads())
+
+    assert index.link("<1@acme.example>") == ThreadLink("Acme", "SRE", "interview", open_app.id)
+    assert index.link("<2@acme.example>") is None
+    assert index.resolve("<3@acme.example>", ["<1@acme.example>"], []) == "<1@acme.example>"